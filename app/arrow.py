@@ -0,0 +1,196 @@
+"""Batch evaluation of Apache Arrow IPC streams.
+
+pyarrow is an optional dependency; ARROW_AVAILABLE tells whether it is
+installed.
+"""
+
+import io
+import itertools
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import numpy as np
+from anyio import from_thread
+
+from app.batch import NON_FINITE, evaluate_coded
+from app.calculator import DivisionByZeroError
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - exercised only without pyarrow
+    pa = pc = None
+
+ARROW_AVAILABLE = pa is not None
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+ERRORS = [DivisionByZeroError().message, "Unsupported operation", NON_FINITE]
+
+
+class BlockingBody(io.RawIOBase):
+    """Synchronous file view of an async request body.
+
+    Reads block until the event loop delivers the next chunk, so the file can
+    be handed to pyarrow from a worker thread started by anyio (for example
+    with run_in_threadpool) while the body is still arriving.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = from_thread.run(self._next_chunk)
+            except StopAsyncIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    async def _next_chunk(self) -> bytes:
+        return await self._chunks.__anext__()
+
+
+def open_batches(source: Any) -> "pa.RecordBatchStreamReader":
+    """Open an Arrow IPC stream of operations and check its schema.
+
+    Args:
+        source: Readable file object or buffer with the IPC stream.
+
+    Returns:
+        Reader over the record batches.
+
+    Raises:
+        ValueError: If the stream is not valid Arrow IPC, or lacks op, a or
+            b columns of the right types.
+    """
+    try:
+        reader = pa.ipc.open_stream(source)
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow stream: {e}") from None
+    schema = reader.schema
+    for name in ("op", "a", "b"):
+        if schema.get_field_index(name) < 0:
+            raise ValueError(f"Missing column: {name}")
+    op_type = schema.field("op").type
+    if pa.types.is_dictionary(op_type):
+        op_type = op_type.value_type
+    if not (pa.types.is_string(op_type) or pa.types.is_large_string(op_type)):
+        raise ValueError("Column 'op' must be a string column")
+    for name in ("a", "b"):
+        field_type = schema.field(name).type
+        if not (pa.types.is_integer(field_type) or pa.types.is_floating(field_type)):
+            raise ValueError(f"Column {name!r} must be numeric")
+    return reader
+
+
+def read_first_batch(
+    reader: "pa.RecordBatchStreamReader",
+) -> "pa.RecordBatch | None":
+    """Read the first record batch of a stream, before any result is sent.
+
+    Args:
+        reader: Reader returned by open_batches().
+
+    Returns:
+        The first record batch, or None if the stream has none.
+
+    Raises:
+        ValueError: If the stream is cut off or corrupt.
+    """
+    try:
+        return reader.read_next_batch()
+    except StopIteration:
+        return None
+    except (pa.ArrowException, OSError) as e:
+        raise ValueError(f"Invalid Arrow stream: {e}") from None
+
+
+def _operands(column: "pa.Array") -> np.ndarray:
+    """Return a numeric column as float64, with nulls as NaN."""
+    values: np.ndarray = column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+    return values
+
+
+def result_schema(schema: "pa.Schema") -> "pa.Schema":
+    """Return the schema of the results for an input stream schema."""
+    fields = [
+        pa.field("result", pa.float64()),
+        pa.field("error", pa.dictionary(pa.int8(), pa.string())),
+    ]
+    if schema.get_field_index("id") >= 0:
+        fields.insert(0, schema.field("id"))
+    return pa.schema(fields)
+
+
+def evaluate_record_batch(batch: "pa.RecordBatch") -> "pa.RecordBatch":
+    """Evaluate one record batch of operations.
+
+    The op column is dictionary-encoded and each operation runs through its
+    vectorized kernel once, so no Python object is created per row.
+
+    Args:
+        batch: Record batch with op, a and b columns and an optional id
+            column, which is passed through unchanged.
+
+    Returns:
+        Record batch with a result column (null where the row failed) and
+        an error column (null where it succeeded), preceded by id if given.
+    """
+    ops = batch.column("op")
+    if not pa.types.is_dictionary(ops.type):
+        ops = pc.dictionary_encode(ops)
+    codes = ops.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    outcome = evaluate_coded(
+        ops.dictionary.to_pylist(),
+        codes,
+        _operands(batch.column("a")),
+        _operands(batch.column("b")),
+    )
+
+    error_codes = np.select(
+        [outcome.unsupported, outcome.non_finite], [1, 2], default=0
+    ).astype(np.int8)
+    errors = pa.DictionaryArray.from_arrays(
+        pa.array(error_codes, mask=~outcome.failed), pa.array(ERRORS)
+    )
+    columns = [pa.array(outcome.results, mask=outcome.failed), errors]
+    if batch.schema.get_field_index("id") >= 0:
+        columns.insert(0, batch.column("id"))
+    return pa.RecordBatch.from_arrays(columns, schema=result_schema(batch.schema))
+
+
+def evaluate_batches(
+    reader: "pa.RecordBatchStreamReader", first: "pa.RecordBatch | None" = None
+) -> Iterator[bytes]:
+    """Evaluate an Arrow stream of operations one record batch at a time.
+
+    Only one input and one output record batch are held in memory at once.
+
+    Args:
+        reader: Reader returned by open_batches().
+        first: Record batch already taken from reader by read_first_batch().
+
+    Yields:
+        Encoded pieces of an Arrow IPC stream of results.
+    """
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, result_schema(reader.schema)) as writer:
+        batches = reader if first is None else itertools.chain([first], reader)
+        for batch in batches:
+            writer.write_batch(evaluate_record_batch(batch))
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
@@ -0,0 +1,147 @@
+"""Vectorized evaluation of mixed calculator operations."""
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from app.calculator import (
+    ArrayLike,
+    DivisionByZeroError,
+    add_many,
+    divide_many,
+    multiply_many,
+    subtract_many,
+    zero_divisor_mask,
+)
+
+KERNELS: dict[str, Callable[[ArrayLike, ArrayLike], npt.NDArray[np.float64]]] = {
+    "add": add_many,
+    "sub": subtract_many,
+    "mul": multiply_many,
+    "div": divide_many,
+}
+
+NON_FINITE = "Result is not a finite number"
+
+
+@dataclass
+class BatchResult:
+    """Outcome of a batch evaluation.
+
+    Attributes:
+        results: Result per item; NaN where the item failed, infinite or NaN
+            where the operation overflowed.
+        division_by_zero: True for "div" items whose divisor was zero.
+        unsupported: True for items whose operation is not known.
+    """
+
+    results: npt.NDArray[np.float64]
+    division_by_zero: npt.NDArray[np.bool_]
+    unsupported: npt.NDArray[np.bool_]
+
+    @property
+    def non_finite(self) -> npt.NDArray[np.bool_]:
+        """True for evaluated items whose result is infinite or NaN."""
+        return ~np.isfinite(self.results) & ~self.division_by_zero & ~self.unsupported
+
+    @property
+    def failed(self) -> npt.NDArray[np.bool_]:
+        """Mask of items that produced an error instead of a result."""
+        return self.division_by_zero | self.unsupported | self.non_finite
+
+    def errors(self) -> list[str | None]:
+        """Error message per item, or None where the item succeeded."""
+        errors: list[str | None] = [None] * len(self.results)
+        for i in np.flatnonzero(self.division_by_zero):
+            errors[i] = DivisionByZeroError().message
+        for i in np.flatnonzero(self.unsupported):
+            errors[i] = "Unsupported operation"
+        for i in np.flatnonzero(self.non_finite):
+            errors[i] = NON_FINITE
+        return errors
+
+    def values(self) -> list[float | None]:
+        """Result per item as Python floats, or None where the item failed."""
+        values: list[float | None] = self.results.tolist()
+        for i in np.flatnonzero(self.failed):
+            values[i] = None
+        return values
+
+
+def evaluate_batch(
+    ops: Sequence[str] | npt.NDArray[np.str_], a: ArrayLike, b: ArrayLike
+) -> BatchResult:
+    """Evaluate a column of operations against two operand columns.
+
+    Items are grouped by operation and each group runs through its vectorized
+    kernel once, so the cost is one kernel call per distinct operation rather
+    than one function call per item.
+
+    Args:
+        ops: Operation name per item ("add", "sub", "mul" or "div").
+        a: First operand per item.
+        b: Second operand per item.
+
+    Returns:
+        Results together with per-item error masks.
+
+    Raises:
+        ValueError: If the three columns differ in length.
+    """
+    ops_arr = np.asarray(ops, dtype=np.str_)
+    names, codes = np.unique(ops_arr, return_inverse=True)
+    return evaluate_coded([str(name) for name in names], codes, a, b)
+
+
+def evaluate_coded(
+    names: Sequence[str], codes: npt.NDArray[np.integer], a: ArrayLike, b: ArrayLike
+) -> BatchResult:
+    """Evaluate operations given as integer codes into a list of names.
+
+    This is the dictionary-encoded form of evaluate_batch(): item i uses the
+    operation names[codes[i]], so columnar inputs that are already encoded
+    never need a string per item.
+
+    Args:
+        names: Distinct operation names.
+        codes: Index into names per item.
+        a: First operand per item.
+        b: Second operand per item.
+
+    Returns:
+        Results together with per-item error masks.
+
+    Raises:
+        ValueError: If the three columns differ in length.
+    """
+    a_arr = np.asarray(a, dtype=np.float64)
+    b_arr = np.asarray(b, dtype=np.float64)
+    if not len(codes) == len(a_arr) == len(b_arr):
+        raise ValueError("ops, a and b must have the same length")
+
+    results = np.full(len(codes), np.nan)
+    division_by_zero = np.zeros(len(codes), dtype=np.bool_)
+    unsupported = np.ones(len(codes), dtype=np.bool_)
+
+    for code, op in enumerate(names):
+        kernel = KERNELS.get(op)
+        if kernel is None:
+            continue
+        mask = codes == code
+        if not mask.any():
+            continue
+        unsupported[mask] = False
+        if mask.all():
+            results = kernel(a_arr, b_arr)
+            if op == "div":
+                division_by_zero = zero_divisor_mask(b_arr)
+            break
+        results[mask] = kernel(a_arr[mask], b_arr[mask])
+        if op == "div":
+            division_by_zero[mask] = zero_divisor_mask(b_arr[mask])
+
+    return BatchResult(
+        results=results, division_by_zero=division_by_zero, unsupported=unsupported
+    )
@@ -0,0 +1,67 @@
+"""Batch evaluation of raw little-endian float64 buffers."""
+
+from typing import Literal
+
+import numpy as np
+import numpy.typing as npt
+
+from app.batch import KERNELS
+
+FLOAT64 = np.dtype("<f8")
+
+Layout = Literal["planar", "interleaved"]
+
+
+def split_operands(
+    buffer: bytes | memoryview, layout: Layout = "planar"
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """View a buffer of float64 values as the a and b operand arrays.
+
+    The arrays are read-only views of the buffer; nothing is copied.
+
+    Args:
+        buffer: Little-endian float64 values.
+        layout: "planar" for all a values followed by all b values, or
+            "interleaved" for a0, b0, a1, b1, ...
+
+    Returns:
+        The a and b operands.
+
+    Raises:
+        ValueError: If the buffer does not hold an even number of float64s.
+    """
+    if len(buffer) % (2 * FLOAT64.itemsize):
+        raise ValueError("Body must hold an even number of float64 values")
+    values = np.frombuffer(buffer, dtype=FLOAT64)
+    if layout == "interleaved":
+        return values[0::2], values[1::2]
+    half = len(values) // 2
+    return values[:half], values[half:]
+
+
+def evaluate_binary(
+    op: str, buffer: bytes | memoryview, layout: Layout = "planar"
+) -> tuple[memoryview, int]:
+    """Apply one operation element-wise to the operands in a float64 buffer.
+
+    Divisions by zero give NaN, like in the JSON batch endpoint.
+
+    Args:
+        op: Operation name ("add", "sub", "mul" or "div").
+        buffer: Little-endian float64 operands, see split_operands().
+        layout: Operand layout of the buffer.
+
+    Returns:
+        The results as little-endian float64 bytes, and the number of
+        divisions by zero.
+
+    Raises:
+        ValueError: If op is not known or the buffer is malformed.
+    """
+    kernel = KERNELS.get(op)
+    if kernel is None:
+        raise ValueError("Unsupported operation")
+    a, b = split_operands(buffer, layout)
+    result = kernel(a, b).astype(FLOAT64, copy=False)
+    division_by_zero = int(np.count_nonzero(b == 0)) if op == "div" else 0
+    return result.data.cast("B"), division_by_zero
@@ -1,5 +1,19 @@
 """Calculator business logic module."""
 
+from collections.abc import Sequence
+from decimal import Decimal
+from fractions import Fraction
+from typing import Literal, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+
+# Scalar operations work unchanged on any of the supported numeric types; the
+# result has the same type as the operands.
+NumberT = TypeVar("NumberT", float, Decimal, Fraction)
+ArrayLike = Sequence[float] | npt.NDArray[np.float64]
+ZeroPolicy = Literal["nan", "raise"]
+
 
 class DivisionByZeroError(Exception):
     """Raised when attempting to divide by zero."""
@@ -9,7 +23,7 @@ class DivisionByZeroError(Exception):
         super().__init__(self.message)
 
 
-def add(a: float, b: float) -> float:
+def add(a: NumberT, b: NumberT) -> NumberT:
     """Add two numbers.
 
     Args:
@@ -22,7 +36,7 @@ def add(a: float, b: float) -> float:
     return a + b
 
 
-def subtract(a: float, b: float) -> float:
+def subtract(a: NumberT, b: NumberT) -> NumberT:
     """Subtract two numbers.
 
     Args:
@@ -35,7 +49,7 @@ def subtract(a: float, b: float) -> float:
     return a - b
 
 
-def multiply(a: float, b: float) -> float:
+def multiply(a: NumberT, b: NumberT) -> NumberT:
     """Multiply two numbers.
 
     Args:
@@ -48,7 +62,7 @@ def multiply(a: float, b: float) -> float:
     return a * b
 
 
-def divide(a: float, b: float) -> float:
+def divide(a: NumberT, b: NumberT) -> NumberT:
     """Divide two numbers.
 
     Args:
@@ -64,3 +78,112 @@ def divide(a: float, b: float) -> float:
     if b == 0:
         raise DivisionByZeroError()
     return a / b
+
+
+def _as_operands(
+    a: ArrayLike, b: ArrayLike
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """Convert two operand sequences into float64 arrays of equal shape.
+
+    Arrays that are already float64 are used as-is without copying.
+
+    Raises:
+        ValueError: If the operands cannot be broadcast together.
+    """
+    a_arr = np.asarray(a, dtype=np.float64)
+    b_arr = np.asarray(b, dtype=np.float64)
+    if a_arr.shape != b_arr.shape:
+        try:
+            a_arr, b_arr = np.broadcast_arrays(a_arr, b_arr)
+        except ValueError:
+            raise ValueError(
+                f"Operand shapes {a_arr.shape} and {b_arr.shape} do not match"
+            ) from None
+    return a_arr, b_arr
+
+
+def add_many(a: ArrayLike, b: ArrayLike) -> npt.NDArray[np.float64]:
+    """Add two sequences of numbers element-wise.
+
+    Args:
+        a: First operands.
+        b: Second operands.
+
+    Returns:
+        Array of element-wise sums.
+    """
+    a_arr, b_arr = _as_operands(a, b)
+    return np.add(a_arr, b_arr)
+
+
+def subtract_many(a: ArrayLike, b: ArrayLike) -> npt.NDArray[np.float64]:
+    """Subtract two sequences of numbers element-wise.
+
+    Args:
+        a: First operands.
+        b: Second operands.
+
+    Returns:
+        Array of element-wise differences.
+    """
+    a_arr, b_arr = _as_operands(a, b)
+    return np.subtract(a_arr, b_arr)
+
+
+def multiply_many(a: ArrayLike, b: ArrayLike) -> npt.NDArray[np.float64]:
+    """Multiply two sequences of numbers element-wise.
+
+    Args:
+        a: First operands.
+        b: Second operands.
+
+    Returns:
+        Array of element-wise products.
+    """
+    a_arr, b_arr = _as_operands(a, b)
+    return np.multiply(a_arr, b_arr)
+
+
+def zero_divisor_mask(b: ArrayLike) -> npt.NDArray[np.bool_]:
+    """Flag the divisors that would raise DivisionByZeroError in divide().
+
+    Args:
+        b: Divisors.
+
+    Returns:
+        Boolean array, True where the divisor is zero.
+    """
+    mask: npt.NDArray[np.bool_] = np.asarray(b, dtype=np.float64) == 0
+    return mask
+
+
+def divide_many(
+    a: ArrayLike, b: ArrayLike, on_zero: ZeroPolicy = "nan"
+) -> npt.NDArray[np.float64]:
+    """Divide two sequences of numbers element-wise.
+
+    Unlike divide(), a zero divisor does not abort the whole batch by default:
+    the affected elements are set to NaN. Use zero_divisor_mask() to tell them
+    apart from NaNs that were already present in the input.
+
+    Args:
+        a: Dividends.
+        b: Divisors.
+        on_zero: "nan" to fill zero-divisor elements with NaN, or "raise" to
+            raise DivisionByZeroError if any divisor is zero.
+
+    Returns:
+        Array of element-wise quotients.
+
+    Raises:
+        DivisionByZeroError: If on_zero is "raise" and any divisor is zero.
+    """
+    a_arr, b_arr = _as_operands(a, b)
+    zero = b_arr == 0
+    if zero.any():
+        if on_zero == "raise":
+            raise DivisionByZeroError()
+        result = np.full(a_arr.shape, np.nan)
+        np.divide(a_arr, b_arr, out=result, where=~zero)
+        return result
+    return np.divide(a_arr, b_arr)
@@ -0,0 +1,102 @@
+"""Response encodings negotiated from the Accept header."""
+
+from collections.abc import Callable, Mapping
+from contextvars import ContextVar
+from typing import Any
+
+import cbor2
+import msgpack
+import orjson
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CBOR = "application/cbor"
+
+
+def encode_json(content: Any) -> bytes:
+    """Encode content as compact JSON; NaN and infinities become null."""
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+ENCODERS: dict[str, Callable[[Any], bytes]] = {
+    JSON: encode_json,
+    MSGPACK: msgpack.packb,
+    CBOR: cbor2.dumps,
+}
+
+ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+
+_media_type: ContextVar[str] = ContextVar("response_media_type", default=JSON)
+
+
+def negotiate(accept: str | None, encoders: Mapping[str, object] = ENCODERS) -> str:
+    """Pick the response media type for an Accept header.
+
+    The supported type with the highest quality wins, earlier entries winning
+    ties. JSON is used when the header is missing, allows anything, or names
+    no supported type.
+
+    Args:
+        accept: Value of the Accept header.
+        encoders: Supported media types.
+
+    Returns:
+        One of the keys of encoders.
+    """
+    if not accept or accept in ("*/*", JSON):
+        return JSON
+    best, best_quality = JSON, 0.0
+    for entry in accept.split(","):
+        media_type, *params = (part.strip() for part in entry.split(";"))
+        media_type = ALIASES.get(media_type.lower(), media_type.lower())
+        if media_type in ("*/*", "application/*"):
+            media_type = JSON
+        if media_type not in encoders:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+class NegotiatedResponse(JSONResponse):
+    """Response encoded in the media type negotiated for the current request.
+
+    Outside a NegotiatingRoute it behaves like a JSON response.
+    """
+
+    def render(self, content: Any) -> bytes:
+        self.media_type = _media_type.get()
+        return ENCODERS[self.media_type](content)
+
+    def init_headers(self, headers: Mapping[str, str] | None = None) -> None:
+        super().init_headers(headers)
+        self.raw_headers.append((b"vary", b"Accept"))
+
+
+class NegotiatingRoute(APIRoute):
+    """Route that chooses the NegotiatedResponse encoding from Accept."""
+
+    def get_route_handler(self) -> Callable[[Request], Any]:
+        handler = super().get_route_handler()
+
+        async def negotiating_handler(request: Request) -> Response:
+            token = _media_type.set(negotiate(request.headers.get("accept")))
+            try:
+                response: Response = await handler(request)
+                return response
+            finally:
+                _media_type.reset(token)
+
+        return negotiating_handler
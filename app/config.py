@@ -13,6 +13,60 @@ class Settings:
         self.debug: bool = os.getenv("DEBUG", "false").lower() == "true"
         self.host: str = os.getenv("HOST", "0.0.0.0")  # noqa: S104
         self.port: int = int(os.getenv("PORT", "8000"))
+        self.expression_cache_size: int = int(
+            os.getenv("EXPRESSION_CACHE_SIZE", "1024")
+        )
+        self.eval_inline_operations: int = int(
+            os.getenv("EVAL_INLINE_OPERATIONS", "1000")
+        )
+        self.batch_inline_items: int = int(os.getenv("BATCH_INLINE_ITEMS", "10000"))
+        self.executor_threads: int = int(os.getenv("EXECUTOR_THREADS", "4"))
+        self.executor_processes: int = int(os.getenv("EXECUTOR_PROCESSES", "0"))
+        self.grid_chunk_size: int = int(os.getenv("GRID_CHUNK_SIZE", "65536"))
+        self.stream_max_line_bytes: int = int(
+            os.getenv("STREAM_MAX_LINE_BYTES", "65536")
+        )
+        self.ws_max_in_flight: int = int(os.getenv("WS_MAX_IN_FLIGHT", "64"))
+        self.jobs_workers: int = int(os.getenv("JOBS_WORKERS", "2"))
+        self.jobs_max_pending: int = int(os.getenv("JOBS_MAX_PENDING", "100"))
+        self.jobs_result_ttl: float = float(os.getenv("JOBS_RESULT_TTL", "3600"))
+        self.jobs_max_result_bytes: int = int(
+            os.getenv("JOBS_MAX_RESULT_BYTES", str(256 * 1024 * 1024))
+        )
+        self.jobs_db_path: str = os.getenv("JOBS_DB_PATH", "")
+        self.fast_path_enabled: bool = (
+            os.getenv("FAST_PATH_ENABLED", "false").lower() == "true"
+        )
+        self.metrics_enabled: bool = (
+            os.getenv("METRICS_ENABLED", "true").lower() == "true"
+        )
+        self.loop_monitor_enabled: bool = (
+            os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+        )
+        self.loop_monitor_interval: float = float(
+            os.getenv("LOOP_MONITOR_INTERVAL", "0.05")
+        )
+        self.loop_slow_callback_threshold: float = float(
+            os.getenv("LOOP_SLOW_CALLBACK_THRESHOLD", "0.1")
+        )
+        self.profiler_enabled: bool = (
+            os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+        )
+        self.profiler_token: str = os.getenv("PROFILER_TOKEN", "")
+        self.microbatch_enabled: bool = (
+            os.getenv("MICROBATCH_ENABLED", "false").lower() == "true"
+        )
+        self.microbatch_window_ms: float = float(
+            os.getenv("MICROBATCH_WINDOW_MS", "1.0")
+        )
+        self.microbatch_max_size: int = int(os.getenv("MICROBATCH_MAX_SIZE", "256"))
+        self.result_cache_routes: frozenset[str] = frozenset(
+            route.strip()
+            for route in os.getenv("RESULT_CACHE_ROUTES", "").split(",")
+            if route.strip()
+        )
+        self.result_cache_size: int = int(os.getenv("RESULT_CACHE_SIZE", "4096"))
+        self.result_cache_ttl: float = float(os.getenv("RESULT_CACHE_TTL", "60"))
 
 
 @lru_cache
@@ -0,0 +1,145 @@
+"""Offloading of expensive operations from the event loop by cost class."""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor as PoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from enum import StrEnum
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class Cost(StrEnum):
+    """How expensive an operation is, and so where it runs.
+
+    INLINE work is cheap enough to run on the event loop. THREAD work is
+    expensive but releases the GIL, like NumPy kernels, and runs in a thread.
+    PROCESS work is expensive and holds the GIL, like pure-Python evaluation,
+    and runs in a worker process, or in a thread if there is no process pool.
+    """
+
+    INLINE = "inline"
+    THREAD = "thread"
+    PROCESS = "process"
+
+
+def _timed(function: Callable[..., T], *args: Any) -> tuple[T, float]:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+class _PoolStats:
+    """Counters of one worker pool."""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.run_total = 0.0
+        self.run_max = 0.0
+        self.wait_total = 0.0
+
+    def as_dict(self) -> dict[str, int | float]:
+        in_flight = self.submitted - self.completed - self.failed
+        timed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "running": min(in_flight, self.workers),
+            "queued": max(in_flight - self.workers, 0),
+            "run_ms_avg": self.run_total / timed * 1000,
+            "run_ms_max": self.run_max * 1000,
+            "wait_ms_avg": self.wait_total / timed * 1000,
+        }
+
+
+class Executor:
+    """Run operations inline, in a thread pool or in a process pool.
+
+    Callers declare the cost class of each call; only INLINE work runs on the
+    event loop. Functions and arguments of PROCESS work must be picklable.
+    The pools are created on first use.
+    """
+
+    def __init__(self, threads: int = 4, processes: int = 0) -> None:
+        """Create an executor.
+
+        Args:
+            threads: Worker threads for THREAD work, and for PROCESS work if
+                processes is 0.
+            processes: Worker processes for PROCESS work; 0 disables the
+                process pool.
+        """
+        self.threads = threads
+        self.processes = processes
+        self._pools: dict[Cost, PoolExecutor] = {}
+        self._stats = {Cost.THREAD: _PoolStats(threads)}
+        if processes:
+            self._stats[Cost.PROCESS] = _PoolStats(processes)
+        self._lock = threading.Lock()
+
+    def _pool(self, cost: Cost) -> PoolExecutor:
+        with self._lock:
+            pool = self._pools.get(cost)
+            if pool is None:
+                if cost is Cost.PROCESS:
+                    # Spawned rather than forked: the server process has
+                    # threads, which fork does not carry over safely.
+                    pool = ProcessPoolExecutor(
+                        self.processes, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    pool = ThreadPoolExecutor(self.threads, thread_name_prefix="cpu")
+                self._pools[cost] = pool
+            return pool
+
+    async def run(self, cost: Cost, function: Callable[..., T], *args: Any) -> T:
+        """Run function(*args) where its cost class says it should run.
+
+        Args:
+            cost: Cost class of the call.
+            function: Function to call.
+            *args: Positional arguments of the call.
+
+        Returns:
+            The function's result; its exceptions propagate.
+        """
+        if cost is Cost.INLINE:
+            return function(*args)
+        if cost is Cost.PROCESS and not self.processes:
+            cost = Cost.THREAD
+        stats = self._stats[cost]
+        loop = asyncio.get_running_loop()
+        stats.submitted += 1
+        start = loop.time()
+        try:
+            result, elapsed = await loop.run_in_executor(
+                self._pool(cost), _timed, function, *args
+            )
+        except BaseException:
+            stats.failed += 1
+            raise
+        stats.completed += 1
+        stats.run_total += elapsed
+        stats.run_max = max(stats.run_max, elapsed)
+        stats.wait_total += max(loop.time() - start - elapsed, 0.0)
+        return result
+
+    def stats(self) -> dict[str, dict[str, int | float]]:
+        """Return queue depth and run time counters per pool."""
+        return {str(cost): stats.as_dict() for cost, stats in self._stats.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pools."""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,21 @@
+"""Infix expression engine built on the calculator primitives."""
+
+from app.expression.cache import ExpressionCache
+from app.expression.compiler import (
+    CompiledExpression,
+    UndefinedVariableError,
+    compile_expression,
+)
+from app.expression.optimizer import optimize
+from app.expression.parser import ExpressionError, ExpressionSyntaxError, parse
+
+__all__ = [
+    "CompiledExpression",
+    "ExpressionCache",
+    "ExpressionError",
+    "ExpressionSyntaxError",
+    "UndefinedVariableError",
+    "compile_expression",
+    "optimize",
+    "parse",
+]
@@ -0,0 +1,69 @@
+"""Size-bounded LRU cache of compiled expressions."""
+
+import threading
+from collections import OrderedDict
+
+from app.expression.compiler import CompiledExpression, compile_expression
+from app.expression.parser import normalize
+
+
+class ExpressionCache:
+    """Least-recently-used cache of compiled expressions.
+
+    Entries are keyed by normalized source, so spellings that differ only in
+    whitespace share one compiled form.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, CompiledExpression] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, source: str) -> CompiledExpression:
+        """Return the compiled form of an expression, compiling it on a miss.
+
+        Raises:
+            ExpressionSyntaxError: If the expression is malformed.
+        """
+        key = normalize(source)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = compile_expression(key)
+
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return compiled
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit, miss and eviction counters along with the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,220 @@
+"""Code generation from expression trees to Python callables."""
+
+import math
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
+from typing import Any
+
+from app.calculator import (
+    add,
+    add_many,
+    divide,
+    divide_many,
+    multiply,
+    multiply_many,
+    subtract,
+    subtract_many,
+)
+from app.expression.optimizer import optimize
+from app.expression.parser import (
+    BinaryOp,
+    ExpressionError,
+    Node,
+    Number,
+    UnaryOp,
+    Variable,
+    normalize,
+    parse,
+)
+
+PRIMITIVES: dict[str, Callable[[Any, Any], Any]] = {
+    "+": add,
+    "-": subtract,
+    "*": multiply,
+    "/": divide,
+}
+
+# Element-wise counterparts used for grid evaluation; division by zero yields
+# NaN for the affected elements instead of aborting the whole chunk.
+ARRAY_PRIMITIVES: dict[str, Callable[[Any, Any], Any]] = {
+    "+": add_many,
+    "-": subtract_many,
+    "*": multiply_many,
+    "/": divide_many,
+}
+
+_PRIMITIVE_NAMES = {"+": "_add", "-": "_sub", "*": "_mul", "/": "_div"}
+
+
+class UndefinedVariableError(ExpressionError):
+    """Raised when an expression is evaluated without one of its variables."""
+
+
+class _CodeGenerator:
+    """Lower an expression tree to straight-line Python source.
+
+    Every operation is assigned to its own local so that the generated code
+    never nests calls, however deep the tree. A node object that occurs more
+    than once is computed once and its local reused.
+    """
+
+    def __init__(self, variables: Mapping[str, str]) -> None:
+        self.variables = variables
+        self.lines: list[str] = []
+        self.emitted: dict[int, str] = {}
+
+    def temporary(self, value: str) -> str:
+        name = f"t{len(self.lines)}"
+        self.lines.append(f"    {name} = {value}")
+        return name
+
+    def emit(self, node: Node) -> str:
+        if isinstance(node, Number):
+            if math.isfinite(node.value):
+                return repr(node.value)
+            return f"float({repr(node.value)!r})"
+        if isinstance(node, Variable):
+            return self.variables[node.name]
+        name = self.emitted.get(id(node))
+        if name is None:
+            name = self.emitted[id(node)] = self.lower(node)
+        return name
+
+    def lower(self, node: UnaryOp | BinaryOp) -> str:
+        if isinstance(node, UnaryOp):
+            operand = self.emit(node.operand)
+            return operand if node.op == "+" else self.temporary(f"-{operand}")
+        left = self.emit(node.left)
+        right = self.emit(node.right)
+        return self.temporary(f"{_PRIMITIVE_NAMES[node.op]}({left}, {right})")
+
+
+def variables_of(tree: Node) -> tuple[str, ...]:
+    """Return the sorted names of the variables referenced by a tree."""
+    names: set[str] = set()
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Variable):
+            names.add(node.name)
+        elif isinstance(node, UnaryOp):
+            stack.append(node.operand)
+        elif isinstance(node, BinaryOp):
+            stack.extend((node.left, node.right))
+    return tuple(sorted(names))
+
+
+def generate_code(tree: Node, variables: tuple[str, ...]) -> str:
+    """Generate the source of a function evaluating a tree.
+
+    The function takes one positional argument per variable, in the order
+    given, and calls the primitives through the names _add, _sub, _mul and
+    _div.
+    """
+    params = {name: f"v{i}" for i, name in enumerate(variables)}
+    generator = _CodeGenerator(params)
+    result = generator.emit(tree)
+    signature = ", ".join(params.values())
+    body = "\n".join([*generator.lines, f"    return {result}"])
+    return f"def _expression({signature}):\n{body}\n"
+
+
+def build_function(
+    code: str, primitives: Mapping[str, Callable[[Any, Any], Any]] = PRIMITIVES
+) -> Callable[..., Any]:
+    """Turn generated source into a function bound to the given primitives."""
+    namespace: dict[str, Any] = {
+        _PRIMITIVE_NAMES[op]: fn for op, fn in primitives.items()
+    }
+    # The source comes from generate_code(), which only ever emits literals,
+    # locals and primitive calls for a parsed tree, never user text.
+    exec(compile(code, "<expression>", "exec"), namespace)  # noqa: S102
+    function: Callable[..., Any] = namespace["_expression"]
+    return function
+
+
+@dataclass(frozen=True)
+class CompiledExpression:
+    """An expression compiled to a Python function over the calculator primitives.
+
+    Attributes:
+        source: Normalized source the expression was compiled from.
+        tree: Parsed expression tree.
+        optimized: Tree after constant folding, simplification and common
+            subexpression sharing; this is what the code is generated from.
+        variables: Names of the variables the expression needs, sorted.
+        code: Generated Python source.
+    """
+
+    source: str
+    tree: Node
+    optimized: Node
+    variables: tuple[str, ...]
+    code: str
+    function: Callable[..., float] = field(repr=False, compare=False)
+
+    def evaluate(self, variables: Mapping[str, float] | None = None) -> float:
+        """Evaluate the expression.
+
+        Args:
+            variables: Value for each variable in the expression.
+
+        Returns:
+            Result of the expression.
+
+        Raises:
+            UndefinedVariableError: If a variable has no value.
+            DivisionByZeroError: If the expression divides by zero.
+        """
+        bindings = variables or {}
+        try:
+            args = [bindings[name] for name in self.variables]
+        except KeyError as e:
+            raise UndefinedVariableError(f"Undefined variable: {e.args[0]}") from None
+        return self.function(*args)
+
+    @cached_property
+    def operations(self) -> int:
+        """Number of operations the generated code performs per evaluation."""
+        return self.code.count(" = ")
+
+    def __reduce__(self) -> tuple[Callable[[str], "CompiledExpression"], tuple[str]]:
+        # The generated function cannot be pickled, so a pickled expression
+        # is just its source and is compiled again where it is unpickled,
+        # e.g. in a worker process.
+        return _recompile, (self.source,)
+
+
+@lru_cache(maxsize=256)
+def _recompile(source: str) -> CompiledExpression:
+    return compile_expression(source)
+
+
+def compile_expression(source: str) -> CompiledExpression:
+    """Parse and compile an infix expression.
+
+    Args:
+        source: Expression such as "3*(4+5)/2-x".
+
+    Returns:
+        Compiled expression.
+
+    Raises:
+        ExpressionSyntaxError: If the expression is malformed.
+    """
+    normalized = normalize(source)
+    tree = parse(normalized)
+    optimized = optimize(tree)
+    # Variables come from the parsed tree so that every variable the caller
+    # wrote must still be bound, even if optimization made it unnecessary.
+    variables = variables_of(tree)
+    code = generate_code(optimized, variables)
+    return CompiledExpression(
+        source=normalized,
+        tree=tree,
+        optimized=optimized,
+        variables=variables,
+        code=code,
+        function=build_function(code),
+    )
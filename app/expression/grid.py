@@ -0,0 +1,97 @@
+"""Chunked evaluation of one expression over columns of variable bindings."""
+
+from collections.abc import Callable, Iterator, Mapping
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from app.calculator import ArrayLike, divide_many, zero_divisor_mask
+from app.expression.compiler import (
+    ARRAY_PRIMITIVES,
+    CompiledExpression,
+    UndefinedVariableError,
+    build_function,
+)
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+GridChunk = tuple[int, npt.NDArray[np.float64], npt.NDArray[np.bool_]]
+
+
+def evaluate_grid(
+    compiled: CompiledExpression,
+    columns: Mapping[str, ArrayLike],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[GridChunk]:
+    """Evaluate an expression row by row over columns of variable values.
+
+    The arguments are validated immediately; the rows are evaluated lazily as
+    the returned iterator is consumed. Rows are processed in chunks of at most
+    chunk_size, so every intermediate array the expression creates is
+    chunk-sized no matter how many rows there are; the columns themselves are
+    held in memory whole. Rows that divide by zero evaluate to NaN and are
+    flagged, so they can be told apart from other NaN results.
+
+    Args:
+        compiled: Expression to evaluate.
+        columns: Equally long column of values per variable.
+        chunk_size: Maximum number of rows evaluated at once.
+
+    Returns:
+        Iterator over the offset of each chunk's first row, its results and
+        a mask of the rows that divided by zero.
+
+    Raises:
+        UndefinedVariableError: If a variable has no column.
+        ValueError: If no columns are given, the columns differ in length or
+            chunk_size is not positive.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    missing = [name for name in compiled.variables if name not in columns]
+    if missing:
+        raise UndefinedVariableError(f"Undefined variable: {missing[0]}")
+    if not columns:
+        raise ValueError("At least one column is required")
+
+    arrays = {
+        name: np.asarray(values, dtype=np.float64) for name, values in columns.items()
+    }
+    lengths = {len(array) for array in arrays.values()}
+    if len(lengths) != 1:
+        raise ValueError("All columns must have the same length")
+    rows = lengths.pop()
+    args = [arrays[name] for name in compiled.variables]
+    # The expression is bound to a division that records its zero divisors;
+    # NaN propagates through every operation, so a row whose result comes
+    # from a division by zero is one where any division had a zero divisor.
+    divisors: list[npt.NDArray[np.bool_]] = []
+
+    def divide(a: ArrayLike, b: ArrayLike) -> npt.NDArray[np.float64]:
+        divisors.append(zero_divisor_mask(b))
+        return divide_many(a, b)
+
+    function = build_function(compiled.code, {**ARRAY_PRIMITIVES, "/": divide})
+    return _chunks(function, divisors, args, rows, chunk_size)
+
+
+def _chunks(
+    function: Callable[..., Any],
+    divisors: list[npt.NDArray[np.bool_]],
+    args: list[npt.NDArray[np.float64]],
+    rows: int,
+    chunk_size: int,
+) -> Iterator[GridChunk]:
+    for start in range(0, rows, chunk_size):
+        stop = min(start + chunk_size, rows)
+        chunk = [column[start:stop] for column in args]
+        divisors.clear()
+        # Entered per chunk: a consumer may resume the generator from a
+        # different thread, and errstate cannot span contexts.
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            result = np.broadcast_to(function(*chunk), (stop - start,))
+        division_by_zero = np.zeros(stop - start, dtype=np.bool_)
+        for mask in divisors:
+            division_by_zero |= mask
+        yield start, np.asarray(result, dtype=np.float64), division_by_zero
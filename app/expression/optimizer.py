@@ -0,0 +1,113 @@
+"""Optimization pass run between parsing and code generation."""
+
+from collections.abc import Callable
+from typing import Any
+
+from app.calculator import DivisionByZeroError, add, divide, multiply, subtract
+from app.expression.parser import BinaryOp, Node, Number, UnaryOp, Variable
+
+_FOLDERS: dict[str, Callable[[Any, Any], Any]] = {
+    "+": add,
+    "-": subtract,
+    "*": multiply,
+    "/": divide,
+}
+_COMMUTATIVE = frozenset("+*")
+
+
+class _Optimizer:
+    """Rewrite a tree bottom-up and hash-cons the result.
+
+    Hash-consing returns the same node object for structurally identical
+    subtrees (treating + and * as commutative), which lets the code generator
+    eliminate common subexpressions by identity.
+    """
+
+    def __init__(self) -> None:
+        self.interned: dict[tuple[Any, ...], Node] = {}
+
+    def intern(self, key: tuple[Any, ...], factory: Callable[[], Node]) -> Node:
+        node = self.interned.get(key)
+        if node is None:
+            node = self.interned[key] = factory()
+        return node
+
+    def number(self, value: float) -> Node:
+        # repr() keeps 0.0 and -0.0 apart, which compare equal as floats.
+        return self.intern(("num", repr(value)), lambda: Number(value))
+
+    def visit(self, node: Node) -> Node:
+        if isinstance(node, Number):
+            return self.number(node.value)
+        if isinstance(node, Variable):
+            return self.intern(("var", node.name), lambda: node)
+        if isinstance(node, UnaryOp):
+            return self.unary(node.op, self.visit(node.operand))
+        return self.binary(node.op, self.visit(node.left), self.visit(node.right))
+
+    def unary(self, op: str, operand: Node) -> Node:
+        if op == "+":
+            return operand
+        if isinstance(operand, Number):
+            return self.number(-operand.value)
+        if isinstance(operand, UnaryOp):
+            return operand.operand
+        return self.intern(("neg", id(operand)), lambda: UnaryOp("-", operand))
+
+    def binary(self, op: str, left: Node, right: Node) -> Node:
+        if isinstance(left, Number) and isinstance(right, Number):
+            try:
+                return self.number(_FOLDERS[op](left.value, right.value))
+            except DivisionByZeroError:
+                pass  # Leave it to raise at evaluation time, like divide().
+        simplified = _simplify(op, left, right)
+        if simplified is not None:
+            return simplified
+        ids = (id(left), id(right))
+        if op in _COMMUTATIVE:
+            ids = (min(ids), max(ids))
+        return self.intern((op, *ids), lambda: BinaryOp(op, left, right))
+
+
+def _is_number(node: Node, value: float) -> bool:
+    return isinstance(node, Number) and node.value == value
+
+
+def _simplify(op: str, left: Node, right: Node) -> Node | None:
+    """Apply the algebraic identities x+0, 0+x, x-0, x*1, 1*x and x/1.
+
+    Identities that could hide a DivisionByZeroError or change NaN/infinity
+    results, such as x*0 or x-x, are deliberately not applied.
+    """
+    if op == "+":
+        if _is_number(right, 0):
+            return left
+        if _is_number(left, 0):
+            return right
+    elif op == "-":
+        if _is_number(right, 0):
+            return left
+    elif op == "*":
+        if _is_number(right, 1):
+            return left
+        if _is_number(left, 1):
+            return right
+    elif op == "/" and _is_number(right, 1):
+        return left
+    return None
+
+
+def optimize(tree: Node) -> Node:
+    """Fold constants, simplify identities and share common subexpressions.
+
+    Constant subexpressions are evaluated with the calculator primitives, so a
+    constant division by zero is kept in the tree and still raises
+    DivisionByZeroError when the expression is evaluated.
+
+    Args:
+        tree: Parsed expression tree.
+
+    Returns:
+        Equivalent tree in which identical subtrees are the same object.
+    """
+    return _Optimizer().visit(tree)
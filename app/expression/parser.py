@@ -0,0 +1,259 @@
+"""Tokenizer and recursive-descent parser for infix arithmetic expressions."""
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+MAX_SOURCE_LENGTH = 10_000
+MAX_DEPTH = 100
+MAX_HEIGHT = 300
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<op>[-+*/()])
+    |(?P<space>\s+)
+    |(?P<invalid>.)
+    """,
+    re.VERBOSE,
+)
+
+
+class ExpressionError(Exception):
+    """Base class for errors raised while handling an expression."""
+
+    def __init__(self, message: str) -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class ExpressionSyntaxError(ExpressionError):
+    """Raised when an expression cannot be parsed."""
+
+
+@dataclass(frozen=True, slots=True)
+class Number:
+    """Numeric literal."""
+
+    value: float
+
+    def __str__(self) -> str:
+        return repr(self.value)
+
+
+@dataclass(frozen=True, slots=True)
+class Variable:
+    """Reference to a variable bound at evaluation time."""
+
+    name: str
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@dataclass(frozen=True, slots=True)
+class UnaryOp:
+    """Unary plus or minus."""
+
+    op: str
+    operand: "Node"
+
+    def __str__(self) -> str:
+        return render(self)
+
+
+@dataclass(frozen=True, slots=True)
+class BinaryOp:
+    """One of the four calculator operations applied to two sub-expressions."""
+
+    op: str
+    left: "Node"
+    right: "Node"
+
+    def __str__(self) -> str:
+        return render(self)
+
+
+Node = Number | Variable | UnaryOp | BinaryOp
+
+
+def _wrap(node: Node, text: str) -> str:
+    """Parenthesize the rendering of a compound sub-expression."""
+    if isinstance(node, BinaryOp | UnaryOp):
+        return f"({text})"
+    return text
+
+
+def render(node: Node) -> str:
+    """Render an expression tree as infix source.
+
+    The tree is walked with an explicit stack, so trees of any height allowed
+    by parse render without hitting the recursion limit.
+    """
+    rendered: list[str] = []
+    stack: list[tuple[Node, bool]] = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if isinstance(current, Number | Variable):
+            rendered.append(str(current))
+        elif not expanded:
+            stack.append((current, True))
+            if isinstance(current, BinaryOp):
+                stack.append((current.right, False))
+                stack.append((current.left, False))
+            else:
+                stack.append((current.operand, False))
+        elif isinstance(current, BinaryOp):
+            right, left = rendered.pop(), rendered.pop()
+            rendered.append(
+                f"{_wrap(current.left, left)} {current.op} "
+                f"{_wrap(current.right, right)}"
+            )
+        else:
+            operand = rendered.pop()
+            rendered.append(f"{current.op}{_wrap(current.operand, operand)}")
+    return rendered[0]
+
+
+def tokenize(source: str) -> list[str]:
+    """Split an expression into tokens, dropping whitespace.
+
+    Raises:
+        ExpressionSyntaxError: If the source contains an invalid character or
+            is longer than MAX_SOURCE_LENGTH.
+    """
+    if len(source) > MAX_SOURCE_LENGTH:
+        raise ExpressionSyntaxError(
+            f"Expression is longer than {MAX_SOURCE_LENGTH} characters"
+        )
+    tokens: list[str] = []
+    for match in _TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        if kind == "invalid":
+            raise ExpressionSyntaxError(
+                f"Unexpected character {match.group()!r} at position {match.start()}"
+            )
+        tokens.append(match.group())
+    return tokens
+
+
+def normalize(source: str) -> str:
+    """Return a canonical spelling of an expression, ignoring whitespace."""
+    return " ".join(tokenize(source))
+
+
+class _Parser:
+    """Recursive-descent parser over a token list.
+
+    Grammar:
+        expr    := term (("+" | "-") term)*
+        term    := unary (("*" | "/") unary)*
+        unary   := ("+" | "-") unary | primary
+        primary := NUMBER | NAME | "(" expr ")"
+    """
+
+    def __init__(self, tokens: list[str]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+        self.depth = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def advance(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise ExpressionSyntaxError("Unexpected end of expression")
+        self.pos += 1
+        return token
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise ExpressionSyntaxError("Expression is empty")
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise ExpressionSyntaxError(f"Unexpected token {self.peek()!r}")
+        return node
+
+    def expr(self) -> Node:
+        node = self.term()
+        while self.peek() in ("+", "-"):
+            op = self.advance()
+            node = BinaryOp(op, node, self.term())
+        return node
+
+    def term(self) -> Node:
+        node = self.unary()
+        while self.peek() in ("*", "/"):
+            op = self.advance()
+            node = BinaryOp(op, node, self.unary())
+        return node
+
+    def unary(self) -> Node:
+        if self.peek() in ("+", "-"):
+            op = self.advance()
+            return UnaryOp(op, self.nested(self.unary))
+        return self.primary()
+
+    def primary(self) -> Node:
+        lexeme = self.advance()
+        if lexeme == "(":
+            node = self.nested(self.expr)
+            if self.advance() != ")":
+                raise ExpressionSyntaxError("Expected ')'")
+            return node
+        if lexeme[0].isdigit() or lexeme[0] == ".":
+            return Number(float(lexeme))
+        if lexeme[0].isalpha() or lexeme[0] == "_":
+            return Variable(lexeme)
+        raise ExpressionSyntaxError(f"Unexpected token {lexeme!r}")
+
+    def nested(self, rule: Callable[[], Node]) -> Node:
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ExpressionSyntaxError(
+                f"Expression is nested more than {MAX_DEPTH} levels deep"
+            )
+        try:
+            return rule()
+        finally:
+            self.depth -= 1
+
+
+def height(node: Node) -> int:
+    """Return the number of levels in an expression tree."""
+    deepest = 0
+    stack: list[tuple[Node, int]] = [(node, 1)]
+    while stack:
+        current, level = stack.pop()
+        deepest = max(deepest, level)
+        if isinstance(current, BinaryOp):
+            stack.append((current.left, level + 1))
+            stack.append((current.right, level + 1))
+        elif isinstance(current, UnaryOp):
+            stack.append((current.operand, level + 1))
+    return deepest
+
+
+def parse(source: str) -> Node:
+    """Parse an infix expression into an abstract syntax tree.
+
+    Args:
+        source: Expression such as "3*(4+5)/2-x".
+
+    Returns:
+        Root node of the expression tree.
+
+    Raises:
+        ExpressionSyntaxError: If the expression is malformed, nests more than
+            MAX_DEPTH levels of parentheses or has more than MAX_HEIGHT levels.
+    """
+    node = _Parser(tokenize(source)).parse()
+    if height(node) > MAX_HEIGHT:
+        raise ExpressionSyntaxError(
+            f"Expression has more than {MAX_HEIGHT} levels of operations"
+        )
+    return node
@@ -0,0 +1,16 @@
+"""Background jobs for long-running computations."""
+
+from app.jobs.queue import JobFunction, JobQueue, JobQueueFull, Progress
+from app.jobs.store import Job, JobStatus, JobStore, MemoryJobStore, SQLiteJobStore
+
+__all__ = [
+    "Job",
+    "JobFunction",
+    "JobQueue",
+    "JobQueueFull",
+    "JobStatus",
+    "JobStore",
+    "MemoryJobStore",
+    "Progress",
+    "SQLiteJobStore",
+]
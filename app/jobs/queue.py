@@ -0,0 +1,209 @@
+"""Bounded worker pool running background jobs."""
+
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+
+from app.jobs.store import Job, JobStatus, JobStore
+
+Progress = Callable[[float], None]
+JobFunction = Callable[[Progress], tuple[bytes, str]]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are waiting or running."""
+
+    def __init__(self, message: str = "Too many jobs in progress") -> None:
+        self.message = message
+        super().__init__(self.message)
+
+
+class JobQueue:
+    """Run submitted jobs on a fixed number of worker threads.
+
+    A job is a function that takes a progress callback and returns its
+    encoded result and the result's media type. Jobs waiting or running are
+    tracked in memory; finished jobs go to the store, where they stay for ttl
+    seconds.
+
+    While jobs are in progress, a lease thread renews them in the store every
+    lease / 3 seconds. Unfinished jobs that have not been renewed for lease
+    seconds belong to a process that is gone; they are failed when a queue
+    starts and on every renewal, while the jobs of other live processes
+    sharing the store are left alone. The worker threads are started on
+    first use and stopped by shutdown().
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        max_pending: int = 100,
+        ttl: float = 3600.0,
+        lease: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Create a queue.
+
+        Args:
+            store: Where finished jobs and their results are kept.
+            workers: Number of jobs run at the same time.
+            max_pending: Most jobs waiting or running before submit() fails.
+            ttl: Seconds a finished job and its result are kept.
+            lease: Seconds after which an unfinished job that is no longer
+                renewed is failed.
+            clock: Source of Unix timestamps.
+        """
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.lease = lease
+        self._clock = clock
+        self._executor: ThreadPoolExecutor | None = None
+        self._renewer: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._pending: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.succeeded = 0
+        self.failed = 0
+        now = clock()
+        store.interrupt(now, ttl, now - lease)
+
+    def submit(self, kind: str, function: JobFunction) -> Job:
+        """Queue a job.
+
+        Args:
+            kind: Kind of computation, reported with the job.
+            function: The computation.
+
+        Returns:
+            Snapshot of the queued job.
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already waiting or running.
+        """
+        now = self._clock()
+        self.store.purge(now)
+        job = Job(id=uuid.uuid4().hex, kind=kind, created_at=now)
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                raise JobQueueFull()
+            self._pending[job.id] = job
+        self.store.put(job)
+        queued = replace(job)
+        self._pool().submit(self._run, job, function)
+        return queued
+
+    def get(self, job_id: str) -> Job | None:
+        """Return a snapshot of a job, or None if it is unknown or expired."""
+        with self._lock:
+            job = self._pending.get(job_id)
+            if job is not None:
+                return replace(job)
+        return self.store.get(job_id, self._clock())
+
+    def result(self, job_id: str) -> bytes | None:
+        """Return the encoded result of a succeeded job, or None."""
+        return self.store.result(job_id, self._clock())
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.workers, thread_name_prefix="job"
+                )
+                self._stopped = threading.Event()
+                self._renewer = threading.Thread(
+                    target=self._renew,
+                    args=(self._stopped,),
+                    name="job-lease",
+                    daemon=True,
+                )
+                self._renewer.start()
+            return self._executor
+
+    def _renew(self, stopped: threading.Event) -> None:
+        while not stopped.wait(self.lease / 3):
+            with self._lock:
+                job_ids = list(self._pending)
+            now = self._clock()
+            if job_ids:
+                self.store.renew(job_ids, now)
+            self.store.interrupt(now, self.ttl, now - self.lease)
+
+    def _run(self, job: Job, function: JobFunction) -> None:
+        job.status = JobStatus.RUNNING
+
+        def progress(done: float) -> None:
+            job.progress = min(max(done, 0.0), 1.0)
+
+        result: bytes | None = None
+        try:
+            result, media_type = function(progress)
+            if len(result) > self.store.max_result_bytes:
+                raise ValueError(
+                    f"Result of {len(result)} bytes exceeds the limit of "
+                    f"{self.store.max_result_bytes} bytes"
+                )
+        except Exception as e:  # Any failure is reported through the job.
+            result = None
+            done = replace(
+                job,
+                status=JobStatus.FAILED,
+                error=getattr(e, "message", None) or str(e) or type(e).__name__,
+            )
+        else:
+            done = replace(
+                job,
+                status=JobStatus.SUCCEEDED,
+                progress=1.0,
+                media_type=media_type,
+                result_size=len(result),
+            )
+        done.finished_at = self._clock()
+        done.expires_at = done.finished_at + self.ttl
+        # Stored before it stops being pending, so a job never looks finished
+        # without its result being available.
+        self.store.put(done, result)
+        with self._lock:
+            del self._pending[job.id]
+            if done.status is JobStatus.SUCCEEDED:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def stats(self) -> dict[str, int]:
+        """Return counts of pending, running, stored and finished jobs."""
+        with self._lock:
+            running = sum(
+                job.status is JobStatus.RUNNING for job in self._pending.values()
+            )
+            pending = len(self._pending)
+        return {
+            "workers": self.workers,
+            "queued": pending - running,
+            "running": running,
+            "stored": len(self.store),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker threads, waiting for running jobs if wait is True.
+
+        Without waiting, queued jobs are cancelled; they stay unfinished in a
+        shared store until their lease runs out.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            renewer, self._renewer = self._renewer, None
+            stopped = self._stopped
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+        stopped.set()
+        if renewer is not None:
+            renewer.join()
@@ -0,0 +1,297 @@
+"""Storage of background jobs and their results."""
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Collection
+from dataclasses import dataclass, replace
+from enum import StrEnum
+
+
+class JobStatus(StrEnum):
+    """Lifecycle state of a job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """A background computation and, once finished, its outcome.
+
+    Attributes:
+        id: Unique job id.
+        kind: Kind of computation, e.g. "batch".
+        status: Lifecycle state.
+        progress: Fraction of the work done, from 0 to 1.
+        created_at: Submission time as a Unix timestamp.
+        finished_at: Completion time, once finished.
+        expires_at: Time after which a finished job is forgotten.
+        error: Error message of a failed job.
+        media_type: Media type of the result.
+        result_size: Size of the encoded result in bytes.
+    """
+
+    id: str
+    kind: str
+    status: JobStatus = JobStatus.QUEUED
+    progress: float = 0.0
+    created_at: float = 0.0
+    finished_at: float | None = None
+    expires_at: float | None = None
+    error: str | None = None
+    media_type: str | None = None
+    result_size: int = 0
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job succeeded or failed."""
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+
+class JobStore(ABC):
+    """Storage of jobs and the encoded results of succeeded ones.
+
+    Stored results are kept until their job expires or, oldest first, until
+    the results take up more than max_result_bytes in total.
+    """
+
+    def __init__(self, max_result_bytes: int) -> None:
+        self.max_result_bytes = max_result_bytes
+
+    @abstractmethod
+    def put(self, job: Job, result: bytes | None = None) -> None:
+        """Store a job, with its encoded result if it succeeded."""
+
+    @abstractmethod
+    def get(self, job_id: str, now: float) -> Job | None:
+        """Return a job that has not expired, or None."""
+
+    @abstractmethod
+    def result(self, job_id: str, now: float) -> bytes | None:
+        """Return the encoded result of a job that has not expired, or None."""
+
+    @abstractmethod
+    def purge(self, now: float) -> int:
+        """Drop expired jobs and return how many were dropped."""
+
+    @abstractmethod
+    def renew(self, job_ids: Collection[str], now: float) -> None:
+        """Record that unfinished jobs are still being worked on."""
+
+    @abstractmethod
+    def interrupt(self, now: float, ttl: float, stale_before: float) -> int:
+        """Mark unfinished jobs that nobody is working on any more as failed.
+
+        A job counts as abandoned when it was last renewed, or submitted,
+        before stale_before; jobs of other processes sharing the store keep
+        being renewed and are left alone.
+
+        Returns:
+            Number of jobs marked as failed.
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored jobs."""
+
+
+class MemoryJobStore(JobStore):
+    """In-process job store; jobs are lost when the process exits."""
+
+    def __init__(self, max_result_bytes: int = 256 * 1024 * 1024) -> None:
+        super().__init__(max_result_bytes)
+        self._jobs: OrderedDict[str, tuple[Job, bytes | None]] = OrderedDict()
+        self._result_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def put(self, job: Job, result: bytes | None = None) -> None:
+        with self._lock:
+            self._drop(job.id)
+            self._jobs[job.id] = (replace(job), result)
+            self._result_bytes += len(result or b"")
+            for old_id in list(self._jobs):
+                if self._result_bytes <= self.max_result_bytes:
+                    break
+                if old_id != job.id and self._jobs[old_id][1] is not None:
+                    self._drop(old_id)
+
+    def get(self, job_id: str, now: float) -> Job | None:
+        with self._lock:
+            entry = self._live(job_id, now)
+            return replace(entry[0]) if entry else None
+
+    def result(self, job_id: str, now: float) -> bytes | None:
+        with self._lock:
+            entry = self._live(job_id, now)
+            return entry[1] if entry else None
+
+    def purge(self, now: float) -> int:
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, (job, _) in self._jobs.items()
+                if job.expires_at is not None and job.expires_at <= now
+            ]
+            for job_id in expired:
+                self._drop(job_id)
+            return len(expired)
+
+    def renew(self, job_ids: Collection[str], now: float) -> None:
+        pass
+
+    def interrupt(self, now: float, ttl: float, stale_before: float) -> int:
+        return 0
+
+    def _live(self, job_id: str, now: float) -> tuple[Job, bytes | None] | None:
+        entry = self._jobs.get(job_id)
+        expires_at = entry[0].expires_at if entry else None
+        if expires_at is not None and expires_at <= now:
+            self._drop(job_id)
+            return None
+        return entry
+
+    def _drop(self, job_id: str) -> None:
+        entry = self._jobs.pop(job_id, None)
+        if entry is not None:
+            self._result_bytes -= len(entry[1] or b"")
+
+
+_COLUMNS = (
+    "id, kind, status, progress, created_at, finished_at, expires_at, error,"
+    " media_type, result_size"
+)
+
+
+class SQLiteJobStore(JobStore):
+    """Job store in a SQLite database, so results survive restarts."""
+
+    def __init__(self, path: str, max_result_bytes: int = 256 * 1024 * 1024) -> None:
+        super().__init__(max_result_bytes)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,"
+                " progress REAL NOT NULL, created_at REAL NOT NULL,"
+                " finished_at REAL, expires_at REAL, error TEXT, media_type TEXT,"
+                " result_size INTEGER NOT NULL, result BLOB, renewed_at REAL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            if "renewed_at" not in columns:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN renewed_at REAL")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._db.execute("SELECT count(*) FROM jobs").fetchone()[0])
+
+    def put(self, job: Job, result: bytes | None = None) -> None:
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO jobs ({_COLUMNS}, result, renewed_at)"  # noqa: S608
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job.id,
+                    job.kind,
+                    str(job.status),
+                    job.progress,
+                    job.created_at,
+                    job.finished_at,
+                    job.expires_at,
+                    job.error,
+                    job.media_type,
+                    job.result_size,
+                    result,
+                    job.created_at,
+                ),
+            )
+            total = self._db.execute(
+                "SELECT coalesce(sum(result_size), 0) FROM jobs"
+                " WHERE result IS NOT NULL"
+            ).fetchone()[0]
+            if total <= self.max_result_bytes:
+                return
+            oldest = self._db.execute(
+                "SELECT id, result_size FROM jobs"
+                " WHERE result IS NOT NULL AND id != ? ORDER BY finished_at",
+                (job.id,),
+            ).fetchall()
+            for job_id, size in oldest:
+                if total <= self.max_result_bytes:
+                    break
+                self._db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                total -= size
+
+    def get(self, job_id: str, now: float) -> Job | None:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_COLUMNS} FROM jobs"  # noqa: S608
+                " WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, now),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            id=row[0],
+            kind=row[1],
+            status=JobStatus(row[2]),
+            progress=row[3],
+            created_at=row[4],
+            finished_at=row[5],
+            expires_at=row[6],
+            error=row[7],
+            media_type=row[8],
+            result_size=row[9],
+        )
+
+    def result(self, job_id: str, now: float) -> bytes | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM jobs"
+                " WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, now),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def purge(self, now: float) -> int:
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM jobs WHERE expires_at <= ?", (now,)
+            ).rowcount
+
+    def renew(self, job_ids: Collection[str], now: float) -> None:
+        with self._lock:
+            self._db.executemany(
+                "UPDATE jobs SET renewed_at = ? WHERE id = ?",
+                [(now, job_id) for job_id in job_ids],
+            )
+
+    def interrupt(self, now: float, ttl: float, stale_before: float) -> int:
+        with self._lock:
+            return self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?,"
+                " expires_at = ? WHERE status IN (?, ?)"
+                " AND coalesce(renewed_at, created_at) < ?",
+                (
+                    str(JobStatus.FAILED),
+                    "Interrupted by a restart",
+                    now,
+                    now + ttl,
+                    str(JobStatus.QUEUED),
+                    str(JobStatus.RUNNING),
+                    stale_before,
+                ),
+            ).rowcount
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,103 @@
+"""Event loop lag measurement and detection of blocking callbacks."""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import suppress
+
+from app.telemetry import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measure how late the event loop runs its callbacks.
+
+    A task on the loop wakes up every interval seconds and records how much
+    later than asked it woke up. A watchdog thread checks that the task keeps
+    waking up; once the loop has been stuck for threshold seconds it takes a
+    snapshot of the loop thread's stack, which shows the callback that is
+    blocking it. When the loop resumes, the stall is counted and logged with
+    that stack.
+    """
+
+    def __init__(
+        self, metrics: Metrics, interval: float = 0.05, threshold: float = 0.1
+    ) -> None:
+        """Create a monitor.
+
+        Args:
+            metrics: Instruments to record the lag and slow callbacks in.
+            interval: Seconds between lag measurements.
+            threshold: Lag in seconds above which a callback counts as slow.
+        """
+        self.metrics = metrics
+        self.interval = interval
+        self.threshold = threshold
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._heartbeat = time.monotonic()
+        self._loop_thread = 0
+        self._stack: str | None = None
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        if self._watchdog is not None:
+            self._watchdog.join()
+        self._task = self._watchdog = None
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - start - self.interval, 0.0)
+            self._heartbeat = time.monotonic()
+            self.metrics.loop_lag.observe(lag)
+            if lag >= self.threshold:
+                self._report(lag)
+            else:
+                self._stack = None
+
+    def _report(self, lag: float) -> None:
+        stack, self._stack = self._stack, None
+        self.metrics.slow_callbacks.inc()
+        if stack is None:
+            logger.warning("Event loop blocked for %.3f s", lag)
+        else:
+            logger.warning("Event loop blocked for %.3f s in:\n%s", lag, stack.rstrip())
+
+    def _watch(self) -> None:
+        captured = 0.0
+        while not self._stopped.wait(self.threshold / 4):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat > self.interval + self.threshold
+            if stalled and captured != heartbeat:
+                # One snapshot per stall, taken while the loop is still stuck.
+                captured = heartbeat
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._stack = "".join(traceback.format_stack(frame))
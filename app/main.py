@@ -1,22 +1,158 @@
 """FastAPI Calculator Application Entry Point."""
 
+import asyncio
+import decimal
+import hmac
+import io
+import json
+import logging
+import math
+import threading
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Annotated, Any, Literal
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+import numpy as np
+from fastapi import (
+    Body,
+    FastAPI,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import (
+    FileResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from starlette.concurrency import run_in_threadpool
 
+from app.arrow import (
+    ARROW_AVAILABLE,
+    ARROW_STREAM,
+    BlockingBody,
+    evaluate_batches,
+    open_batches,
+    read_first_batch,
+)
+from app.batch import NON_FINITE, evaluate_batch
+from app.binary import Layout, evaluate_binary
 from app.calculator import DivisionByZeroError, add, divide, multiply, subtract
+from app.codecs import JSON, NegotiatedResponse, NegotiatingRoute, encode_json
 from app.config import get_settings
+from app.executor import Cost, Executor
+from app.expression import ExpressionCache, ExpressionError
+from app.expression.grid import GridChunk, evaluate_grid
+from app.fastpath import FastPathMiddleware
+from app.jobs import (
+    JobFunction,
+    JobQueue,
+    JobQueueFull,
+    JobStatus,
+    MemoryJobStore,
+    Progress,
+    SQLiteJobStore,
+)
+from app.loopmonitor import LoopMonitor
+from app.microbatch import MicroBatcher
+from app.numeric import Number, NumericMode, Rounding, context_for, to_json, to_number
+from app.profiler import collapsed, sample, speedscope
+from app.result_cache import ResultCache, operation_key
+from app.singleflight import SingleFlight
+from app.stream import DuplexStreamingResponse, evaluate_ndjson
+from app.telemetry import OPENMETRICS, PROMETHEUS, Metrics, MetricsMiddleware
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Run the event loop monitor while the app is serving.
+
+    On shutdown, queued background jobs are cancelled rather than awaited,
+    and the executor's worker threads and processes are stopped.
+    """
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    try:
+        yield
+    finally:
+        await loop_monitor.stop()
+        jobs.shutdown(wait=False)
+        executor.shutdown()
+
+
 app = FastAPI(
     title=settings.app_name,
     description="A production-ready calculator REST API",
     version="1.0.0",
+    default_response_class=NegotiatedResponse,
+    lifespan=lifespan,
+)
+app.router.route_class = NegotiatingRoute
+
+expression_cache = ExpressionCache(maxsize=settings.expression_cache_size)
+batcher = (
+    MicroBatcher(
+        window=settings.microbatch_window_ms / 1000,
+        max_size=settings.microbatch_max_size,
+    )
+    if settings.microbatch_enabled
+    else None
+)
+result_cache = (
+    ResultCache(maxsize=settings.result_cache_size, ttl=settings.result_cache_ttl)
+    if settings.result_cache_routes
+    else None
+)
+flights = SingleFlight()
+metrics = Metrics()
+loop_monitor = LoopMonitor(
+    metrics,
+    interval=settings.loop_monitor_interval,
+    threshold=settings.loop_slow_callback_threshold,
 )
+profiling = threading.Lock()
+executor = Executor(
+    threads=settings.executor_threads, processes=settings.executor_processes
+)
+jobs = JobQueue(
+    (
+        SQLiteJobStore(settings.jobs_db_path, settings.jobs_max_result_bytes)
+        if settings.jobs_db_path
+        else MemoryJobStore(settings.jobs_max_result_bytes)
+    ),
+    workers=settings.jobs_workers,
+    max_pending=settings.jobs_max_pending,
+    ttl=settings.jobs_result_ttl,
+)
+
+OPERATIONS: dict[str, Callable[[Any, Any], Any]] = {
+    "add": add,
+    "sub": subtract,
+    "mul": multiply,
+    "div": divide,
+}
+
+# Where each operation runs when its input is large; small batches and
+# expressions always run inline.
+COSTS: dict[str, Cost] = {
+    "add": Cost.INLINE,
+    "sub": Cost.INLINE,
+    "mul": Cost.INLINE,
+    "div": Cost.INLINE,
+    "batch": Cost.THREAD,
+    "eval": Cost.PROCESS,
+}
 
 # Serve static files
 static_dir = Path(__file__).parent / "static"
@@ -31,16 +167,230 @@ async def root():
 
 
 class OperationRequest(BaseModel):
-    """Request model for calculator operations."""
+    """Request model for calculator operations.
 
+    In decimal and fraction mode the operands may be given as strings, such
+    as "0.1" or "1/3", so that they never pass through a binary float.
+    Precision and rounding only apply to decimal mode.
+    """
+
+    a: float | str
+    b: float | str
+    mode: NumericMode = NumericMode.FLOAT
+    precision: int | None = Field(default=None, ge=1, le=1000)
+    rounding: Rounding | None = None
+
+    def operands(self) -> tuple[Number, Number]:
+        """Return the operands converted to the requested numeric mode.
+
+        Raises:
+            RequestValidationError: If an operand is not a valid number in
+                the requested mode.
+        """
+        try:
+            return to_number(self.a, self.mode), to_number(self.b, self.mode)
+        except ValueError as e:
+            raise RequestValidationError(
+                [{"type": "value_error", "loc": ("body",), "msg": str(e)}]
+            ) from None
+
+
+class OperationResponse(BaseModel):
+    """Response model for calculator operations.
+
+    Decimal and fraction results are returned as strings to keep them exact.
+    """
+
+    result: float | str
+
+
+class BatchItem(BaseModel):
+    """A single operation within a batch request."""
+
+    op: str
     a: float
     b: float
 
 
-class OperationResponse(BaseModel):
-    """Response model for calculator operations."""
+class BatchRequest(BaseModel):
+    """Request model for batch operations.
+
+    Operations are given either as a list of items or as three equally long
+    columns; the columnar form is cheaper to parse for large batches.
+    """
+
+    items: list[BatchItem] | None = None
+    ops: list[str] | None = None
+    a: list[float] | None = None
+    b: list[float] | None = None
+
+    @model_validator(mode="after")
+    def check_shape(self) -> "BatchRequest":
+        """Ensure exactly one of the two request forms is used."""
+        columns = (self.ops, self.a, self.b)
+        if self.items is not None:
+            if any(column is not None for column in columns):
+                raise ValueError("Provide either items or ops/a/b, not both")
+        elif any(column is None for column in columns):
+            raise ValueError("Provide either items or all of ops, a and b")
+        elif not len(self.ops) == len(self.a) == len(self.b):  # type: ignore[arg-type]
+            raise ValueError("ops, a and b must have the same length")
+        return self
+
+    def columns(self) -> tuple[list[str], list[float], list[float]]:
+        """Return the request as ops, a and b columns."""
+        if self.items is not None:
+            return (
+                [item.op for item in self.items],
+                [item.a for item in self.items],
+                [item.b for item in self.items],
+            )
+        return self.ops, self.a, self.b  # type: ignore[return-value]
+
+
+class BatchResponse(BaseModel):
+    """Response model for batch operations.
+
+    Both lists are aligned with the request; for each item exactly one of
+    result and error is set.
+    """
+
+    results: list[float | None]
+    errors: list[str | None]
+
+
+class EvalRequest(BaseModel):
+    """Request model for expression evaluation."""
+
+    expression: str
+    variables: dict[str, float] = {}
+
+
+class GridRequest(BaseModel):
+    """Request model for evaluating one expression over many bindings."""
+
+    expression: str
+    variables: dict[str, list[float]]
+    chunk_size: int | None = Field(default=None, gt=0)
+
+
+class ExplainRequest(BaseModel):
+    """Request model for the expression debug view."""
+
+    expression: str
+
+
+class ExplainResponse(BaseModel):
+    """Response model for the expression debug view."""
+
+    source: str
+    optimized: str
+    code: str
+
+
+class CacheStats(BaseModel):
+    """Counters of a cache."""
+
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+class ResultCacheStats(CacheStats):
+    """Counters of the result cache."""
+
+    expirations: int
+
+
+class MicroBatchStats(BaseModel):
+    """Counters of the micro-batcher."""
+
+    batches: int
+    items: int
+    max_size: int
+    fill_ratio: float
+    added_latency_ms_avg: float
+    added_latency_ms_max: float
+
+
+class SingleFlightStats(BaseModel):
+    """Counters of request coalescing."""
+
+    executions: int
+    shared: int
+    in_flight: int
+
+
+class ExecutorPoolStats(BaseModel):
+    """Counters of one executor worker pool."""
+
+    workers: int
+    submitted: int
+    completed: int
+    failed: int
+    running: int
+    queued: int
+    run_ms_avg: float
+    run_ms_max: float
+    wait_ms_avg: float
+
+
+class JobStats(BaseModel):
+    """Counters of the background job queue."""
 
-    result: float
+    workers: int
+    queued: int
+    running: int
+    stored: int
+    succeeded: int
+    failed: int
+
+
+class StatsResponse(BaseModel):
+    """Response model for runtime statistics."""
+
+    expression_cache: CacheStats
+    singleflight: SingleFlightStats
+    jobs: JobStats
+    executor: dict[str, ExecutorPoolStats]
+    result_cache: ResultCacheStats | None = None
+    microbatch: MicroBatchStats | None = None
+
+
+class BatchJob(BaseModel):
+    """Job evaluating a batch of operations, as POST /batch does."""
+
+    kind: Literal["batch"]
+    params: BatchRequest
+
+
+class EvalJob(BaseModel):
+    """Job evaluating an expression, as POST /eval does."""
+
+    kind: Literal["eval"]
+    params: EvalRequest
+
+
+class GridJob(BaseModel):
+    """Job evaluating an expression over columns, as POST /eval/grid does."""
+
+    kind: Literal["grid"]
+    params: GridRequest
+
+
+class JobResponse(BaseModel):
+    """Response model for the state of a background job."""
+
+    id: str
+    kind: str
+    status: JobStatus
+    progress: float
+    created_at: float
+    finished_at: float | None = None
+    error: str | None = None
 
 
 class HealthResponse(BaseModel):
@@ -59,6 +409,230 @@ async def health_check() -> HealthResponse:
     return HealthResponse(status="ok")
 
 
+@app.get(
+    "/metrics",
+    tags=["Health"],
+    response_class=Response,
+    responses={200: {"content": {PROMETHEUS: {}, OPENMETRICS: {}}}},
+)
+async def prometheus_metrics(
+    accept: Annotated[str, Header()] = "",
+) -> Response:
+    """Metrics endpoint for Prometheus.
+
+    Exposes request latency histograms per route and status, requests in
+    flight, calculator operation counts, division-by-zero errors, event loop
+    lag and the number of times the event loop was blocked. The
+    OpenMetrics format is used when the Accept header asks for it.
+
+    Returns:
+        Metrics in the Prometheus text format or OpenMetrics.
+    """
+    openmetrics = "application/openmetrics-text" in accept
+    return Response(
+        metrics.render(openmetrics),
+        media_type=OPENMETRICS if openmetrics else PROMETHEUS,
+    )
+
+
+@app.get("/debug/profile", include_in_schema=False)
+async def profile_workers(
+    authorization: Annotated[str, Header()] = "",
+    seconds: Annotated[float, Query(gt=0, le=60)] = 5.0,
+    interval: Annotated[float, Query(ge=0.001, le=1)] = 0.005,
+    output: Annotated[
+        Literal["collapsed", "speedscope"], Query(alias="format")
+    ] = "collapsed",
+) -> Response:
+    """Sample the stacks of this worker's threads for a number of seconds.
+
+    Only available when the profiler is enabled and a token is configured;
+    the token is sent as "Authorization: Bearer <token>". Collapsed stacks
+    can be fed to flamegraph.pl or inferno; speedscope JSON opens directly
+    in https://www.speedscope.app.
+
+    Args:
+        authorization: Bearer token.
+        seconds: How long to sample for.
+        interval: Seconds between samples.
+        output: "collapsed" stacks or "speedscope" JSON, from ?format=.
+
+    Returns:
+        The sampled stacks.
+
+    Raises:
+        HTTPException: If the profiler is disabled, the token is wrong or a
+            profile is already being taken.
+    """
+    if not settings.profiler_enabled or not settings.profiler_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(
+        authorization.encode(), f"Bearer {settings.profiler_token}".encode()
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid profiler token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not profiling.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        # Sampled from a worker thread so the event loop keeps running, and
+        # shows up in the profile, meanwhile.
+        profile = await run_in_threadpool(sample, seconds, interval)
+    finally:
+        profiling.release()
+    if output == "speedscope":
+        return Response(
+            encode_json(speedscope(profile, name=f"{settings.app_name} profile")),
+            media_type=JSON,
+        )
+    return PlainTextResponse(collapsed(profile))
+
+
+@app.get("/stats", response_model=StatsResponse, tags=["Health"])
+async def runtime_stats() -> StatsResponse:
+    """Runtime statistics endpoint.
+
+    Returns:
+        Counters of the in-process caches.
+    """
+    return StatsResponse(
+        expression_cache=CacheStats.model_validate(expression_cache.stats()),
+        singleflight=SingleFlightStats(**flights.stats()),
+        jobs=JobStats(**jobs.stats()),
+        executor={
+            name: ExecutorPoolStats.model_validate(pool)
+            for name, pool in executor.stats().items()
+        },
+        result_cache=(
+            ResultCacheStats.model_validate(result_cache.stats())
+            if result_cache
+            else None
+        ),
+        microbatch=(
+            MicroBatchStats.model_validate(batcher.stats()) if batcher else None
+        ),
+    )
+
+
+def _calculate(
+    operation: Callable[[Any, Any], Any], request: OperationRequest
+) -> OperationResponse:
+    """Run a calculator operation in the numeric mode of a request.
+
+    Raises:
+        HTTPException: If a decimal result falls outside the context's range
+            or a result is too large to return.
+    """
+    # Fast path: JSON numbers already arrive as floats, so the default mode
+    # needs no conversion at all.
+    a, b = request.a, request.b
+    if request.mode is NumericMode.FLOAT and type(a) is float and type(b) is float:
+        return OperationResponse(result=operation(a, b))
+    x, y = request.operands()
+    try:
+        with context_for(request.mode, request.precision, request.rounding):
+            result = operation(x, y)
+    except decimal.DecimalException as e:
+        raise HTTPException(
+            status_code=400, detail=f"Decimal arithmetic error: {type(e).__name__}"
+        ) from None
+    try:
+        return OperationResponse(result=to_json(result))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+
+def _cached(route: str) -> ResultCache | None:
+    """Return the result cache if a route opted in to it."""
+    if result_cache is not None and route in settings.result_cache_routes:
+        return result_cache
+    return None
+
+
+def _check_finite(result: Any) -> None:
+    """Reject the infinities and NaN, which JSON cannot carry.
+
+    Raises:
+        HTTPException: If the result is a non-finite float.
+    """
+    if isinstance(result, float) and not math.isfinite(result):
+        raise HTTPException(status_code=400, detail=NON_FINITE)
+
+
+async def _dispatch(op: str, request: OperationRequest) -> OperationResponse:
+    """Run a named operation through the result cache, if the route opted in.
+
+    Raises:
+        HTTPException: If the result is not a finite number.
+    """
+    metrics.operations.inc(op)
+    cache = _cached(op)
+    if cache is None:
+        response = await _compute(op, request)
+        _check_finite(response.result)
+        return response
+    key = operation_key(
+        op, request.a, request.b, request.mode, request.precision, request.rounding
+    )
+    cached = cache.get(key)
+    if cached is not None:
+        return OperationResponse(result=cached)
+    response = await _compute(op, request)
+    _check_finite(response.result)
+    cache.put(key, response.result)
+    return response
+
+
+async def _compute(op: str, request: OperationRequest) -> OperationResponse:
+    """Run a named operation, coalescing float requests when batching is on."""
+    a, b = request.a, request.b
+    if (
+        batcher is not None
+        and request.mode is NumericMode.FLOAT
+        and type(a) is float
+        and type(b) is float
+    ):
+        return OperationResponse(result=await batcher.submit(op, a, b))
+    return await executor.run(COSTS[op], _calculate, OPERATIONS[op], request)
+
+
+def _fast_path_applies(op: str) -> bool:
+    """Leave operations served through the micro-batcher or cache to FastAPI."""
+    return batcher is None and _cached(op) is None
+
+
+def _counted(
+    op: str, operation: Callable[[Any, Any], Any]
+) -> Callable[[Any, Any], Any]:
+    """Wrap an operation so the fast path updates the operation metrics."""
+
+    def counted(a: Any, b: Any) -> Any:
+        metrics.operations.inc(op)
+        try:
+            return operation(a, b)
+        except DivisionByZeroError:
+            metrics.division_by_zero.inc(f"/{op}")
+            raise
+
+    return counted
+
+
+if settings.fast_path_enabled:
+    app.add_middleware(
+        FastPathMiddleware,
+        operations={op: _counted(op, fn) for op, fn in OPERATIONS.items()},
+        applies=_fast_path_applies,
+    )
+
+# Added last so it is outermost and also measures fast path requests.
+if settings.metrics_enabled:
+    app.add_middleware(
+        MetricsMiddleware, metrics=metrics, paths=[f"/{op}" for op in OPERATIONS]
+    )
+
+
 @app.post("/add", response_model=OperationResponse, tags=["Operations"])
 async def add_numbers(request: OperationRequest) -> OperationResponse:
     """Add two numbers.
@@ -69,8 +643,7 @@ async def add_numbers(request: OperationRequest) -> OperationResponse:
     Returns:
         Result of the addition.
     """
-    result = add(request.a, request.b)
-    return OperationResponse(result=result)
+    return await _dispatch("add", request)
 
 
 @app.post("/sub", response_model=OperationResponse, tags=["Operations"])
@@ -83,8 +656,7 @@ async def subtract_numbers(request: OperationRequest) -> OperationResponse:
     Returns:
         Result of the subtraction.
     """
-    result = subtract(request.a, request.b)
-    return OperationResponse(result=result)
+    return await _dispatch("sub", request)
 
 
 @app.post("/mul", response_model=OperationResponse, tags=["Operations"])
@@ -97,8 +669,7 @@ async def multiply_numbers(request: OperationRequest) -> OperationResponse:
     Returns:
         Result of the multiplication.
     """
-    result = multiply(request.a, request.b)
-    return OperationResponse(result=result)
+    return await _dispatch("mul", request)
 
 
 @app.post("/div", response_model=OperationResponse, tags=["Operations"])
@@ -115,7 +686,542 @@ async def divide_numbers(request: OperationRequest) -> OperationResponse:
         HTTPException: If division by zero is attempted.
     """
     try:
-        result = divide(request.a, request.b)
-        return OperationResponse(result=result)
+        return await _dispatch("div", request)
     except DivisionByZeroError as e:
+        metrics.division_by_zero.inc("/div")
         raise HTTPException(status_code=400, detail=e.message) from None
+
+
+@app.post("/batch", response_model=BatchResponse, tags=["Operations"])
+async def batch_operations(request: BatchRequest) -> BatchResponse:
+    """Evaluate many operations in one request.
+
+    Args:
+        request: Batch request as items or as columns.
+
+    Returns:
+        Per-item results and per-item errors.
+    """
+    ops, a, b = request.columns()
+    cost = COSTS["batch"] if len(ops) > settings.batch_inline_items else Cost.INLINE
+    batch = await executor.run(cost, evaluate_batch, ops, a, b)
+    metrics.division_by_zero.inc("/batch", amount=int(batch.division_by_zero.sum()))
+    return BatchResponse(results=batch.values(), errors=batch.errors())
+
+
+@app.post(
+    "/batch/binary",
+    tags=["Operations"],
+    response_class=Response,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/octet-stream": {}},
+        }
+    },
+    responses={
+        200: {
+            "content": {"application/octet-stream": {}},
+            "description": "Little-endian float64 results, NaN where a "
+            "division by zero occurred.",
+        }
+    },
+)
+async def batch_binary(
+    request: Request,
+    op: Annotated[str, Header(alias="X-Operation")],
+    layout: Annotated[Layout, Header(alias="X-Layout")] = "planar",
+) -> Response:
+    """Apply one operation element-wise to raw float64 operand arrays.
+
+    The body holds little-endian float64 values: all a operands followed by
+    all b operands, or a0, b0, a1, b1, ... with X-Layout: interleaved. The
+    operands are read from the body and the results written back without
+    any text encoding or copying. The number of divisions by zero is
+    returned in the X-Division-By-Zero header.
+
+    Args:
+        request: Request whose body holds the operands.
+        op: Operation name ("add", "sub", "mul" or "div").
+        layout: Operand layout of the body.
+
+    Returns:
+        Little-endian float64 results.
+
+    Raises:
+        HTTPException: If the operation is unknown or the body is malformed.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.split(";")[0].strip() != "application/octet-stream":
+        raise HTTPException(
+            status_code=415, detail="Expected an application/octet-stream body"
+        )
+    try:
+        results, division_by_zero = evaluate_binary(op, await request.body(), layout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    metrics.division_by_zero.inc("/batch/binary", amount=division_by_zero)
+    return Response(
+        results,
+        media_type="application/octet-stream",
+        headers={"X-Division-By-Zero": str(division_by_zero)},
+    )
+
+
+@app.post(
+    "/batch/arrow",
+    tags=["Operations"],
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {"required": True, "content": {ARROW_STREAM: {}}},
+    },
+    responses={
+        200: {
+            "content": {ARROW_STREAM: {}},
+            "description": "Arrow IPC stream with a result and an error column, "
+            "one record batch per input record batch.",
+        }
+    },
+)
+async def batch_arrow(request: Request) -> StreamingResponse:
+    """Evaluate an Arrow IPC stream of operations.
+
+    The body is an Arrow IPC stream whose record batches have op (string), a
+    and b (numeric) columns and optionally an id column that is echoed back.
+    Record batches are read, evaluated and written back one at a time while
+    the body is still arriving, so memory is bounded by the batch size. The
+    first batch is read before the response starts, so a stream that is cut
+    off or corrupt early is rejected with 400.
+
+    Args:
+        request: Request whose body is an Arrow IPC stream.
+
+    Returns:
+        Arrow IPC stream of results.
+
+    Raises:
+        HTTPException: If pyarrow is not installed or the stream is invalid.
+    """
+    if not ARROW_AVAILABLE:
+        raise HTTPException(status_code=501, detail="Arrow support is not installed")
+    body = io.BufferedReader(BlockingBody(request.stream()))
+    try:
+        reader = await run_in_threadpool(open_batches, body)
+        first = await run_in_threadpool(read_first_batch, reader)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    return DuplexStreamingResponse(
+        evaluate_batches(reader, first), media_type=ARROW_STREAM
+    )
+
+
+def _bindings_key(variables: dict[str, float]) -> list[tuple[str, str]]:
+    """Return variable bindings in a hashable, order-independent form."""
+    return sorted((name, repr(value)) for name, value in variables.items())
+
+
+@app.post("/eval", response_model=OperationResponse, tags=["Expressions"])
+async def evaluate_expression(request: EvalRequest) -> OperationResponse:
+    """Evaluate an infix expression such as "3*(4+5)/2-x".
+
+    Args:
+        request: Expression and the values of its variables.
+
+    Returns:
+        Result of the expression.
+
+    Raises:
+        HTTPException: If the expression is invalid, references an undefined
+            variable or divides by zero.
+    """
+    try:
+        return OperationResponse(result=await _evaluate(request))
+    except DivisionByZeroError as e:
+        metrics.division_by_zero.inc("/eval")
+        raise HTTPException(status_code=400, detail=e.message) from None
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=e.message) from None
+
+
+async def _evaluate(request: EvalRequest) -> float:
+    """Evaluate an expression through the result cache and singleflight layer.
+
+    Raises:
+        ExpressionError: If the expression is invalid or a variable is unbound.
+        DivisionByZeroError: If the expression divides by zero.
+        HTTPException: If the result is not a finite number.
+    """
+    metrics.operations.inc("eval")
+    compiled = expression_cache.get(request.expression)
+    cache = _cached("eval")
+    key = None
+    if cache is not None:
+        # Keyed by normalized source, so "1+2" and "1 + 2" share an entry.
+        key = ("eval", compiled.source, *_bindings_key(request.variables))
+        cached = cache.get(key)
+        if cached is not None:
+            return float(cached)
+    if compiled.operations <= settings.eval_inline_operations:
+        result = compiled.evaluate(request.variables)
+    else:
+        # Large expressions run off the event loop, and identical ones
+        # already running are awaited instead of being recomputed.
+        flight = (compiled.source, *_bindings_key(request.variables))
+        result = await flights.do(
+            flight,
+            lambda: executor.run(COSTS["eval"], compiled.evaluate, request.variables),
+        )
+    _check_finite(result)
+    if cache is not None:
+        cache.put(key, result)
+    return result
+
+
+@app.post("/eval/explain", response_model=ExplainResponse, tags=["Expressions"])
+async def explain_expression(request: ExplainRequest) -> ExplainResponse:
+    """Show how an expression is optimized and compiled.
+
+    Args:
+        request: Expression to inspect.
+
+    Returns:
+        Normalized source, optimized form and generated code.
+
+    Raises:
+        HTTPException: If the expression is invalid.
+    """
+    try:
+        compiled = expression_cache.get(request.expression)
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=e.message) from None
+    return ExplainResponse(
+        source=compiled.source, optimized=str(compiled.optimized), code=compiled.code
+    )
+
+
+@app.post(
+    "/eval/grid",
+    tags=["Expressions"],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": 'One {"offset": int, "results": [float | string '
+            "| null]} object per line, null where a row divides by zero and "
+            '"NaN", "Infinity" or "-Infinity" for other non-finite results.',
+        }
+    },
+)
+async def evaluate_expression_grid(request: GridRequest) -> StreamingResponse:
+    """Evaluate one expression over columns of variable values.
+
+    Rows are evaluated in fixed-size chunks and each chunk is streamed back as
+    soon as it is ready, so temporaries stay bounded by the chunk size. The
+    request body is parsed whole, though, so the columns themselves take
+    memory in proportion to the number of rows.
+
+    Args:
+        request: Expression, one column of values per variable and an optional
+            chunk size (capped by the configured grid chunk size).
+
+    Returns:
+        Newline-delimited JSON stream of result chunks.
+
+    Raises:
+        HTTPException: If the expression is invalid, a variable has no column
+            or the columns differ in length.
+    """
+    chunk_size = min(
+        request.chunk_size or settings.grid_chunk_size, settings.grid_chunk_size
+    )
+    try:
+        compiled = expression_cache.get(request.expression)
+        chunks = evaluate_grid(compiled, request.variables, chunk_size)
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=e.message) from None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+
+    return StreamingResponse(_grid_lines(chunks), media_type="application/x-ndjson")
+
+
+def _grid_lines(chunks: Iterator[GridChunk]) -> Iterator[str]:
+    """Encode grid result chunks as NDJSON lines.
+
+    Rows that divide by zero are null; other non-finite results, which JSON
+    has no literal for, are the strings "NaN", "Infinity" and "-Infinity".
+    """
+    for offset, results, division_by_zero in chunks:
+        values: list[float | str | None] = results.tolist()
+        for i in np.flatnonzero(~np.isfinite(results)):
+            if division_by_zero[i]:
+                values[i] = None
+            elif np.isnan(results[i]):
+                values[i] = "NaN"
+            else:
+                values[i] = "Infinity" if results[i] > 0 else "-Infinity"
+        yield json.dumps({"offset": offset, "results": values}, allow_nan=False) + "\n"
+
+
+def _batch_job(request: BatchRequest) -> JobFunction:
+    """Build the job function of a batch request."""
+
+    def run(progress: Progress) -> tuple[bytes, str]:
+        batch = evaluate_batch(*request.columns())
+        return encode_json({"results": batch.values(), "errors": batch.errors()}), JSON
+
+    return run
+
+
+def _eval_job(request: EvalRequest) -> JobFunction:
+    """Build the job function of an expression, compiling it right away."""
+    compiled = expression_cache.get(request.expression)
+
+    def run(progress: Progress) -> tuple[bytes, str]:
+        result = compiled.evaluate(request.variables)
+        if not math.isfinite(result):
+            raise ValueError(NON_FINITE)
+        return encode_json({"result": result}), JSON
+
+    return run
+
+
+def _grid_job(request: GridRequest) -> JobFunction:
+    """Build the job function of a grid request, validating it right away."""
+    chunk_size = min(
+        request.chunk_size or settings.grid_chunk_size, settings.grid_chunk_size
+    )
+    compiled = expression_cache.get(request.expression)
+    chunks = evaluate_grid(compiled, request.variables, chunk_size)
+    rows = len(next(iter(request.variables.values())))
+
+    def run(progress: Progress) -> tuple[bytes, str]:
+        def reporting() -> Iterator[GridChunk]:
+            for chunk in chunks:
+                yield chunk
+                progress((chunk[0] + len(chunk[1])) / rows)
+
+        return "".join(_grid_lines(reporting())).encode(), "application/x-ndjson"
+
+    return run
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def submit_job(
+    request: Annotated[BatchJob | EvalJob | GridJob, Body(discriminator="kind")],
+) -> JobResponse:
+    """Run a batch, expression or grid evaluation in the background.
+
+    The job runs on a bounded pool of worker threads; poll GET /jobs/{id} for
+    its progress and fetch its result from GET /jobs/{id}/result.
+
+    Args:
+        request: Kind of job and the request body of the matching route.
+
+    Returns:
+        The queued job.
+
+    Raises:
+        HTTPException: If the request is invalid or too many jobs are pending.
+    """
+    try:
+        if isinstance(request, BatchJob):
+            function = _batch_job(request.params)
+        elif isinstance(request, EvalJob):
+            function = _eval_job(request.params)
+        else:
+            function = _grid_job(request.params)
+        job = jobs.submit(request.kind, function)
+    except ExpressionError as e:
+        raise HTTPException(status_code=400, detail=e.message) from None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=e.message) from None
+    return JobResponse(**vars(job))
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def get_job(job_id: str) -> JobResponse:
+    """Return the status and progress of a background job.
+
+    Raises:
+        HTTPException: If the job is unknown or has expired.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**vars(job))
+
+
+@app.get(
+    "/jobs/{job_id}/result",
+    tags=["Jobs"],
+    response_class=Response,
+    responses={
+        200: {
+            "content": {"application/json": {}, "application/x-ndjson": {}},
+            "description": "The response body the matching route would have "
+            "returned; NDJSON for grid jobs.",
+        }
+    },
+)
+async def get_job_result(
+    job_id: str, wait: Annotated[float, Query(ge=0, le=30)] = 0
+) -> Response:
+    """Return the result of a finished background job.
+
+    Args:
+        job_id: Id returned by POST /jobs.
+        wait: Seconds to wait for the job to finish before answering.
+
+    Returns:
+        The encoded result.
+
+    Raises:
+        HTTPException: If the job is unknown or expired (404), or has not
+            succeeded (409).
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    job = jobs.get(job_id)
+    while job is not None and not job.finished and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+        job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status is JobStatus.FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if not job.finished:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    result = jobs.result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job result has expired")
+    return Response(result, media_type=job.media_type)
+
+
+@app.post(
+    "/stream",
+    tags=["Operations"],
+    response_class=StreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"op": "add", "a": 1, "b": 2, "id": 1}\n'
+                    '{"op": "div", "a": 1, "b": 0, "id": 2}\n'
+                }
+            },
+        }
+    },
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": 'One {"result": float} or {"error": str} object per '
+            'input line, in input order, with the input\'s "id" echoed back.',
+        }
+    },
+)
+async def stream_operations(request: Request) -> StreamingResponse:
+    """Evaluate a newline-delimited JSON stream of operations.
+
+    The body is read incrementally and results are written back as soon as
+    each received chunk has been evaluated, so the input never has to fit in
+    memory.
+
+    Args:
+        request: Request whose body is a stream of {"op", "a", "b"} lines.
+
+    Returns:
+        Newline-delimited JSON stream of results.
+    """
+    return DuplexStreamingResponse(
+        evaluate_ndjson(request.stream(), settings.stream_max_line_bytes),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _session_reply(text: str) -> dict[str, Any]:
+    """Compute the reply to one WebSocket session message."""
+    try:
+        message = json.loads(text)
+    except (ValueError, RecursionError):  # RecursionError: nested too deeply
+        return {"id": None, "error": "Invalid JSON"}
+    if not isinstance(message, dict):
+        return {"id": None, "error": "Expected a JSON object"}
+
+    reply: dict[str, Any] = {"id": message.get("id")}
+    try:
+        if "expression" in message:
+            reply["result"] = await _evaluate(EvalRequest.model_validate(message))
+        elif message.get("op") in OPERATIONS:
+            request = OperationRequest.model_validate(message)
+            reply["result"] = (await _dispatch(message["op"], request)).result
+        else:
+            reply["error"] = "Expected an expression or one of: " + ", ".join(
+                OPERATIONS
+            )
+    except (ValidationError, RequestValidationError) as e:
+        error = e.errors()[0]
+        field = ".".join(str(part) for part in error["loc"] if part != "body")
+        reply["error"] = f"{field}: {error['msg']}" if field else error["msg"]
+    except DivisionByZeroError as e:
+        metrics.division_by_zero.inc("/ws")
+        reply["error"] = e.message
+    except ExpressionError as e:
+        reply["error"] = e.message
+    except HTTPException as e:
+        reply["error"] = e.detail
+    except Exception:
+        # Any other failure still answers its id, or the client would wait
+        # for the reply forever.
+        logger.exception("Failed to answer WebSocket message %r", reply["id"])
+        reply["error"] = "Internal error"
+    return reply
+
+
+@app.websocket("/ws")
+async def calculator_session(websocket: WebSocket) -> None:
+    """Multiplex calculations over one persistent WebSocket connection.
+
+    Each text message is a JSON object with a client-chosen "id" and either
+    an operation ({"op": "add", "a": 1, "b": 2}, with the same optional
+    fields as the HTTP routes) or an expression ({"expression": "a*b",
+    "variables": {...}}). Each reply is {"id": ..., "result": ...} or
+    {"id": ..., "error": ...}. Messages are processed concurrently, so
+    replies may arrive out of order. Binary messages are answered with an
+    error.
+    """
+    await websocket.accept()
+    slots = asyncio.Semaphore(settings.ws_max_in_flight)
+    send_lock = asyncio.Lock()
+    tasks: set[asyncio.Task[None]] = set()
+
+    async def handle(text: str) -> None:
+        try:
+            reply = await _session_reply(text)
+        finally:
+            slots.release()
+        async with send_lock:
+            await websocket.send_json(reply)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            text = message.get("text")
+            if text is None:
+                async with send_lock:
+                    await websocket.send_json(
+                        {"id": None, "error": "Expected a text message"}
+                    )
+                continue
+            await slots.acquire()
+            task = asyncio.create_task(handle(text))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except WebSocketDisconnect:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,121 @@
+"""In-process micro-batching of concurrent single-operation requests."""
+
+import asyncio
+from dataclasses import dataclass, field
+
+from app.batch import KERNELS
+from app.calculator import DivisionByZeroError, zero_divisor_mask
+
+
+@dataclass
+class _Pending:
+    """Requests waiting to be flushed for one operation."""
+
+    a: list[float] = field(default_factory=list)
+    b: list[float] = field(default_factory=list)
+    futures: list["asyncio.Future[float]"] = field(default_factory=list)
+    started: float = 0.0
+    timer: asyncio.TimerHandle | None = None
+
+
+class MicroBatcher:
+    """Coalesce concurrent requests for the same operation into one kernel call.
+
+    The first request for an operation opens a window; every request for that
+    operation arriving before the window closes, or until max_size requests
+    have been collected, is evaluated with a single vectorized kernel call and
+    each caller gets its own result back.
+
+    A batcher is not thread-safe and must only be used from the event loop.
+    """
+
+    def __init__(self, window: float = 0.001, max_size: int = 256) -> None:
+        """Create a batcher.
+
+        Args:
+            window: Longest time in seconds a request waits for companions.
+            max_size: Number of requests that triggers an immediate flush.
+        """
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[str, _Pending] = {}
+        self.batches = 0
+        self.items = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def submit(self, op: str, a: float, b: float) -> float:
+        """Queue one operation and wait for its result.
+
+        Args:
+            op: Operation name ("add", "sub", "mul" or "div").
+            a: First operand.
+            b: Second operand.
+
+        Returns:
+            Result of the operation.
+
+        Raises:
+            DivisionByZeroError: If op is "div" and b is zero.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[float] = loop.create_future()
+        pending = self._pending.get(op)
+        if pending is None:
+            pending = self._pending[op] = _Pending(started=loop.time())
+            pending.timer = loop.call_later(self.window, self._flush, op)
+        pending.a.append(a)
+        pending.b.append(b)
+        pending.futures.append(future)
+        if len(pending.futures) >= self.max_size:
+            self._flush(op)
+        return await future
+
+    def _flush(self, op: str) -> None:
+        pending = self._pending.pop(op, None)
+        if pending is None:
+            return
+        if pending.timer is not None:
+            pending.timer.cancel()
+
+        try:
+            results = KERNELS[op](pending.a, pending.b).tolist()
+            failed = zero_divisor_mask(pending.b) if op == "div" else None
+        except Exception as e:  # Hand any kernel failure to every caller.
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for i, future in enumerate(pending.futures):
+            if future.done():  # The caller went away.
+                continue
+            if failed is not None and failed[i]:
+                future.set_exception(DivisionByZeroError())
+            else:
+                future.set_result(results[i])
+
+        waited = asyncio.get_running_loop().time() - pending.started
+        self.batches += 1
+        self.items += len(pending.futures)
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+
+    def stats(self) -> dict[str, int | float]:
+        """Return batch counts, mean fill ratio and added latency in ms.
+
+        The added latency is measured from the first request of a batch to
+        the flush, which is the longest any request in the batch waited.
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "max_size": self.max_size,
+            "fill_ratio": (
+                self.items / (self.batches * self.max_size) if self.batches else 0.0
+            ),
+            "added_latency_ms_avg": (
+                self._wait_total / self.batches * 1000 if self.batches else 0.0
+            ),
+            "added_latency_ms_max": self._wait_max * 1000,
+        }
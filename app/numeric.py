@@ -0,0 +1,126 @@
+"""Numeric backends for the calculator operations."""
+
+import decimal
+import re
+from contextlib import AbstractContextManager, nullcontext
+from decimal import Decimal
+from enum import StrEnum
+from fractions import Fraction
+from typing import Literal
+
+Number = float | Decimal | Fraction
+
+# Bounds on decimal and fraction operands. A Fraction is built from the exact
+# integers an operand denotes, so without them a short string such as
+# "1e30000000" takes seconds of CPU and megabytes of memory to convert.
+MAX_DIGITS = 1000
+MAX_EXPONENT = 1000
+
+_EXPONENT = re.compile(r"[eE]([+-]?[0-9_]+)$")
+
+Rounding = Literal[
+    "ROUND_CEILING",
+    "ROUND_DOWN",
+    "ROUND_FLOOR",
+    "ROUND_HALF_DOWN",
+    "ROUND_HALF_EVEN",
+    "ROUND_HALF_UP",
+    "ROUND_UP",
+    "ROUND_05UP",
+]
+
+
+class NumericMode(StrEnum):
+    """Number type the operands are converted to before calculating."""
+
+    FLOAT = "float"
+    DECIMAL = "decimal"
+    FRACTION = "fraction"
+
+
+def to_number(value: float | str, mode: NumericMode) -> Number:
+    """Convert an operand to the number type of a mode.
+
+    Floats are converted through their shortest repr, so 0.1 becomes
+    Decimal("0.1") or Fraction(1, 10) rather than the exact binary value.
+
+    Args:
+        value: Operand as a float or a numeric string.
+        mode: Target numeric mode.
+
+    Returns:
+        The operand as a float, Decimal or Fraction.
+
+    Raises:
+        ValueError: If the value is not a finite number in the target mode,
+            or has more than MAX_DIGITS digits or an exponent beyond
+            MAX_EXPONENT.
+    """
+    if mode is NumericMode.FLOAT:
+        return float(value)
+    text = repr(value) if isinstance(value, float) else value.strip()
+    _check_size(text)
+    try:
+        if mode is NumericMode.DECIMAL:
+            number = Decimal(text)
+            if not number.is_finite():
+                raise ValueError(f"Not a finite number: {value!r}")
+            return number
+        return Fraction(text)
+    except (decimal.InvalidOperation, ZeroDivisionError):
+        raise ValueError(f"Not a valid {mode} number: {value!r}") from None
+
+
+def _check_size(text: str) -> None:
+    """Reject a numeric string that denotes an overly large exact number."""
+    match = _EXPONENT.search(text)
+    mantissa = text[: match.start()] if match else text
+    if sum(char.isdigit() for char in mantissa) > MAX_DIGITS:
+        raise ValueError(f"Too many digits, at most {MAX_DIGITS} allowed")
+    if match:
+        exponent = match.group(1).lstrip("+-").replace("_", "").lstrip("0")
+        if len(exponent) > len(str(MAX_EXPONENT)) or int(exponent or 0) > MAX_EXPONENT:
+            raise ValueError(f"Exponent too large, at most {MAX_EXPONENT} allowed")
+
+
+def context_for(
+    mode: NumericMode, precision: int | None = None, rounding: Rounding | None = None
+) -> AbstractContextManager[object]:
+    """Return a context manager that applies per-request arithmetic settings.
+
+    Only the decimal mode has settings; the other modes get a no-op context.
+
+    Args:
+        mode: Numeric mode of the calculation.
+        precision: Significant digits for decimal results.
+        rounding: Decimal rounding mode name, e.g. "ROUND_HALF_UP".
+
+    Returns:
+        Context manager to run the calculation in.
+    """
+    if mode is not NumericMode.DECIMAL or (precision is None and rounding is None):
+        return nullcontext()
+    context = decimal.getcontext().copy()
+    if precision is not None:
+        context.prec = precision
+    if rounding is not None:
+        context.rounding = rounding
+    return decimal.localcontext(context)
+
+
+def to_json(value: Number) -> float | str:
+    """Return a result in its JSON form.
+
+    Floats stay numbers; decimals and fractions become strings so that no
+    precision is lost on the way to the client.
+
+    Raises:
+        ValueError: If a fraction has too many digits to convert to a string.
+    """
+    if isinstance(value, float):
+        return value
+    try:
+        return str(value)
+    except ValueError:
+        # Integers longer than sys.get_int_max_str_digits() are not converted.
+        raise ValueError("Result has too many digits to return") from None
@@ -0,0 +1,135 @@
+"""Statistical sampling profiler of the threads of the running process."""
+
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from types import FrameType
+from typing import Any
+
+Frame = tuple[str, str, int]
+Stack = tuple[str, tuple[Frame, ...]]
+
+
+@dataclass
+class Profile:
+    """Stacks seen while sampling, with how often each was seen.
+
+    Attributes:
+        stacks: Number of samples per (thread name, frames from the outermost
+            call to the innermost) stack.
+        interval: Seconds between samples.
+        duration: Seconds spent sampling.
+        samples: Number of sampling passes over the threads.
+    """
+
+    stacks: Counter[Stack] = field(default_factory=Counter)
+    interval: float = 0.0
+    duration: float = 0.0
+    samples: int = 0
+
+
+def _frames(frame: FrameType | None) -> tuple[Frame, ...]:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return tuple(reversed(frames))
+
+
+def sample(duration: float, interval: float = 0.005) -> Profile:
+    """Sample the stacks of every other thread for a while.
+
+    The calling thread blocks for duration seconds and is itself left out of
+    the samples, so this should run in a worker thread while the event loop
+    keeps serving requests.
+
+    Args:
+        duration: Seconds to sample for.
+        interval: Seconds between samples.
+
+    Returns:
+        The sampled stacks.
+    """
+    own = threading.get_ident()
+    profile = Profile(interval=interval)
+    start = time.perf_counter()
+    deadline = start + duration
+    while True:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != own:
+                name = names.get(ident, f"thread-{ident}")
+                profile.stacks[name, _frames(frame)] += 1
+        profile.samples += 1
+        now = time.perf_counter()
+        if now + interval > deadline:
+            break
+        time.sleep(interval)
+    profile.duration = time.perf_counter() - start
+    return profile
+
+
+def _label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({filename}:{line})"
+
+
+def collapsed(profile: Profile) -> str:
+    """Render a profile as collapsed stacks, one "a;b;c count" line each.
+
+    The first element of each stack is the thread name. The output is the
+    input format of flamegraph.pl, inferno and speedscope.
+    """
+    lines = [
+        ";".join([thread, *map(_label, frames)]) + f" {count}"
+        for (thread, frames), count in sorted(profile.stacks.items())
+    ]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def speedscope(profile: Profile, name: str = "profile") -> dict[str, Any]:
+    """Render a profile in the speedscope file format, one profile per thread.
+
+    Args:
+        profile: The sampled stacks.
+        name: Name of the file shown by speedscope.
+
+    Returns:
+        JSON-serializable speedscope document.
+    """
+    frames: list[dict[str, Any]] = []
+    index: dict[Frame, int] = {}
+    threads: dict[str, dict[str, Any]] = {}
+    for (thread, stack), count in sorted(profile.stacks.items()):
+        sampled = threads.setdefault(
+            thread,
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": 0.0,
+                "samples": [],
+                "weights": [],
+            },
+        )
+        indices = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            indices.append(index[frame])
+        weight = count * profile.interval
+        sampled["samples"].append(indices)
+        sampled["weights"].append(weight)
+        sampled["endValue"] += weight
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "calculator-webapp",
+        "shared": {"frames": frames},
+        "profiles": list(threads.values()),
+    }
@@ -0,0 +1,96 @@
+"""Memoizing cache for results of the pure calculator operations."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+COMMUTATIVE_OPERATIONS = frozenset({"add", "mul"})
+
+
+def operation_key(
+    op: str, a: float | str, b: float | str, *mode: Hashable
+) -> tuple[Hashable, ...]:
+    """Build the cache key of a scalar operation.
+
+    Operands are keyed by their repr, which keeps 0.0 and -0.0 apart, and are
+    put in a fixed order for commutative operations so that a+b and b+a share
+    an entry. Anything else that affects the result, such as the numeric mode
+    and decimal context, goes in mode.
+    """
+    a_key = repr(a) if isinstance(a, float) else a
+    b_key = repr(b) if isinstance(b, float) else b
+    if op in COMMUTATIVE_OPERATIONS and b_key < a_key:
+        a_key, b_key = b_key, a_key
+    return (op, a_key, b_key, *mode)
+
+
+class ResultCache:
+    """LRU cache with a time-to-live for computed results.
+
+    Entries are evicted when they are older than ttl seconds or when more than
+    maxsize entries are stored, least recently used first.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached result for a key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a result, evicting the least recently used entries if full."""
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> dict[str, int | float]:
+        """Return hit, miss, eviction and expiration counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,66 @@
+"""Coalescing of identical in-flight computations (singleflight)."""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one computation between concurrent callers asking for the same key.
+
+    The first caller for a key starts the computation as a task; callers that
+    arrive while it is running await the same task instead of starting their
+    own. The task is shielded, so a caller that is cancelled (for example
+    because its client disconnected) does not cancel it for the others.
+
+    A SingleFlight is not thread-safe and must only be used from the event
+    loop.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Task[Any]] = {}
+        self.executions = 0
+        self.shared = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of computations currently running."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of fn(), sharing it with concurrent callers.
+
+        Args:
+            key: Identity of the computation; equal keys must mean equal results.
+            fn: Coroutine factory, only called if no computation for key runs.
+
+        Returns:
+            Result of the computation.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.executions += 1
+        else:
+            self.shared += 1
+        result: T = await asyncio.shield(task)
+        return result
+
+    def _finish(self, key: Hashable, task: asyncio.Task[Any]) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away.
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        """Return how many computations ran and how many callers shared one."""
+        return {
+            "executions": self.executions,
+            "shared": self.shared,
+            "in_flight": self.in_flight,
+        }
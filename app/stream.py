@@ -0,0 +1,125 @@
+"""Incremental evaluation of newline-delimited JSON operation streams."""
+
+import json
+from collections.abc import AsyncIterator
+from typing import Any, TypeGuard
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from app.batch import evaluate_batch
+
+_LINE_TOO_LONG = b'{"error": "Line too long"}\n'
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streaming response whose body is produced while the request is read.
+
+    StreamingResponse listens for a client disconnect by reading from the
+    ASGI receive channel concurrently with the body iterator, which would
+    steal the request body chunks from an iterator that consumes the request
+    stream. Here the body iterator is the only reader; a disconnect surfaces
+    as ClientDisconnect from the request stream instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def _reject_constant(name: str) -> Any:
+    """Refuse the NaN and Infinity literals, which are not valid JSON."""
+    raise ValueError(f"Invalid JSON constant: {name}")
+
+
+def _is_number(value: Any) -> TypeGuard[int | float]:
+    """Tell whether a decoded JSON value is a number, excluding booleans."""
+    return isinstance(value, int | float) and not isinstance(value, bool)
+
+
+def _parse(line: bytes, max_line_bytes: int) -> tuple[str, float, float, Any] | str:
+    """Parse one operation line, returning an error message if it is invalid."""
+    if len(line) > max_line_bytes:
+        return "Line too long"
+    try:
+        item = json.loads(line, parse_constant=_reject_constant)
+    except (ValueError, RecursionError):  # RecursionError: nested too deeply
+        return "Invalid JSON"
+    if not isinstance(item, dict):
+        return "Expected a JSON object"
+    op, a, b = item.get("op"), item.get("a"), item.get("b")
+    if not isinstance(op, str):
+        return "Field 'op' must be a string"
+    if not _is_number(a) or not _is_number(b):
+        return "Fields 'a' and 'b' must be numbers"
+    try:
+        return op, float(a), float(b), item.get("id")
+    except OverflowError:
+        return "Fields 'a' and 'b' must be within the float range"
+
+
+def _evaluate_lines(lines: list[bytes], max_line_bytes: int) -> bytes:
+    """Evaluate complete lines with one batch call and encode the results."""
+    parsed = [_parse(line, max_line_bytes) for line in lines if line.strip()]
+    valid = [item for item in parsed if not isinstance(item, str)]
+    batch = evaluate_batch(
+        [op for op, _, _, _ in valid],
+        [a for _, a, _, _ in valid],
+        [b for _, _, b, _ in valid],
+    )
+    values = iter(batch.values())
+    errors = iter(batch.errors())
+
+    out: list[str] = []
+    for item in parsed:
+        if isinstance(item, str):
+            record: dict[str, Any] = {"error": item}
+        else:
+            value, error = next(values), next(errors)
+            record = {"result": value} if error is None else {"error": error}
+            if item[3] is not None:
+                record = {"id": item[3], **record}
+        out.append(json.dumps(record, allow_nan=False))
+    return "".join(line + "\n" for line in out).encode()
+
+
+async def evaluate_ndjson(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = 65_536
+) -> AsyncIterator[bytes]:
+    """Evaluate a stream of NDJSON operations as it arrives.
+
+    Each input line is an object such as {"op": "add", "a": 1, "b": 2} with
+    an optional "id" that is echoed back. Each output line is either
+    {"result": ...} or {"error": ...}, in input order. The lines completed by
+    each incoming chunk are evaluated together and their results yielded
+    before the next chunk is read, so memory is bounded by the chunk size and
+    max_line_bytes, and a slow reader slows down consumption of the input.
+
+    Args:
+        chunks: Request body chunks.
+        max_line_bytes: Longest accepted line; longer lines are answered with
+            an error and skipped.
+
+    Yields:
+        Encoded result lines.
+    """
+    pending = b""
+    skipping = False
+    async for chunk in chunks:
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        if skipping and lines:
+            lines.pop(0)  # The rest of an over-long line that was cut off.
+            skipping = False
+        output = _evaluate_lines(lines, max_line_bytes) if lines else b""
+        if skipping:
+            pending = b""
+        elif len(pending) > max_line_bytes:
+            output += _LINE_TOO_LONG
+            pending = b""
+            skipping = True
+        if output:
+            yield output
+    if pending.strip():
+        yield _evaluate_lines([pending], max_line_bytes)
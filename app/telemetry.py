@@ -0,0 +1,298 @@
+"""Request and calculator metrics in the Prometheus text formats.
+
+Instruments are updated from the event loop thread only, so they are plain
+dictionaries and lists changed without locks, and each histogram series
+preallocates its buckets when its label set is first seen.
+"""
+
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Collection, Iterator, Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Seconds; most requests finish well under a millisecond, so the low end is
+# finer than the usual Prometheus defaults.
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Seconds the event loop runs late; a healthy loop stays in the first buckets.
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = tuple[str, ...]
+Sample = tuple[str, Labels, Labels, float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric(ABC):
+    """A named family of samples with a fixed list of label names."""
+
+    type = "untyped"
+    suffix = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """Yield (name suffix, label names, label values, value) tuples."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    type = "counter"
+    suffix = "_total"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Add amount to the count of a label set."""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        """Return the count of a label set."""
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in list(self._values.items()):
+            yield "_total", self.labelnames, labels, value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, without labels."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str) -> None:
+        super().__init__(name, documentation)
+        self.value = 0.0
+
+    def inc(self) -> None:
+        """Add one to the value."""
+        self.value += 1
+
+    def dec(self) -> None:
+        """Subtract one from the value."""
+        self.value -= 1
+
+    def samples(self) -> Iterator[Sample]:
+        yield "", (), (), self.value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets per label set."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket, the count above the last bucket,
+        # then the sum of all observations.
+        self._series: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for a label set."""
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        """Return the number of observations of a label set."""
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> Iterator[Sample]:
+        names = (*self.labelnames, "le")
+        bounds = (*(repr(float(bound)) for bound in self.buckets), "+Inf")
+        for labels, series in list(self._series.items()):
+            cumulative = 0.0
+            for bound, count in zip(bounds, series, strict=False):
+                cumulative += count
+                yield "_bucket", names, (*labels, bound), cumulative
+            yield "_sum", self.labelnames, labels, series[-1]
+            yield "_count", self.labelnames, labels, cumulative
+
+
+class Metrics:
+    """The instruments of the calculator service."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Create the instruments.
+
+        Args:
+            buckets: Upper bounds of the request latency buckets, in seconds.
+        """
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by route and status.",
+            ("method", "route", "status"),
+            buckets,
+        )
+        self.in_flight = Gauge("http_requests_in_flight", "HTTP requests being served.")
+        self.operations = Counter(
+            "calculator_operations",
+            "Scalar calculator operations and expression evaluations.",
+            ("op",),
+        )
+        self.division_by_zero = Counter(
+            "calculator_division_by_zero",
+            "Divisions by zero reported to clients, by route.",
+            ("route",),
+        )
+        self.loop_lag = Histogram(
+            "event_loop_lag_seconds",
+            "How late the event loop ran a callback scheduled to run.",
+            buckets=LAG_BUCKETS,
+        )
+        self.slow_callbacks = Counter(
+            "event_loop_slow_callbacks",
+            "Times the event loop was blocked for longer than the threshold.",
+        )
+        self.metrics: list[_Metric] = [
+            self.request_duration,
+            self.in_flight,
+            self.operations,
+            self.division_by_zero,
+            self.loop_lag,
+            self.slow_callbacks,
+        ]
+
+    def render(self, openmetrics: bool = False) -> str:
+        """Render every metric in the Prometheus or OpenMetrics text format.
+
+        Args:
+            openmetrics: Use the OpenMetrics format instead of the Prometheus
+                text format 0.0.4.
+
+        Returns:
+            The exposition text.
+        """
+        lines = []
+        for metric in self.metrics:
+            family = metric.name if openmetrics else metric.name + metric.suffix
+            lines.append(f"# HELP {family} {metric.documentation}")
+            lines.append(f"# TYPE {family} {metric.type}")
+            for suffix, names, values, value in metric.samples():
+                labels = ",".join(
+                    f'{name}="{_escape(label)}"'
+                    for name, label in zip(names, values, strict=True)
+                )
+                sample = metric.name + suffix
+                if labels:
+                    sample += "{" + labels + "}"
+                lines.append(f"{sample} {_format(value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+HTTP_METHODS = frozenset(
+    ["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"]
+)
+
+
+class MetricsMiddleware:
+    """Record the latency, status and concurrency of every HTTP request.
+
+    Requests are labelled with the template of the route that served them,
+    e.g. /jobs/{job_id}, and with their method if it is a standard HTTP
+    method or "OTHER", so the number of series stays bounded. Requests
+    answered before routing, such as those of the arithmetic fast path, are
+    labelled with their path if it is one of paths, and as "other" otherwise.
+    """
+
+    def __init__(
+        self, app: ASGIApp, metrics: Metrics, paths: Collection[str] = ()
+    ) -> None:
+        """Wrap an app.
+
+        Args:
+            app: ASGI app to measure.
+            metrics: Instruments to update.
+            paths: Paths used as route labels for requests answered without
+                a matched route.
+        """
+        self.app = app
+        self.metrics = metrics
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight.dec()
+            route = scope.get("route")
+            if route is not None:
+                label = route.path
+            elif scope["path"] in self.paths:
+                label = scope["path"]
+            else:
+                label = "other"
+            method = scope["method"]
+            metrics.request_duration.observe(
+                elapsed,
+                method if method in HTTP_METHODS else "OTHER",
+                label,
+                str(status),
+            )
@@ -0,0 +1,71 @@
+"""Benchmark columnar JSON batches against raw float64 buffers.
+
+The same element-wise addition is sent in process to POST /batch as JSON
+columns and to POST /batch/binary as a planar float64 body, for several
+batch sizes.
+
+Usage:
+    python -m benchmarks.bench_binary
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+
+from app.main import app
+
+ROUNDS = 5
+SIZES = [100, 10_000, 1_000_000]
+
+
+async def best_of(client: httpx.AsyncClient, url: str, **kwargs: object) -> float:
+    """Return the best seconds per request over several rounds."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        response = await client.post(url, **kwargs)  # type: ignore[arg-type]
+        response.raise_for_status()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def run() -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=60
+    ) as client:
+        print(f"{'size':>10}{'json ms':>12}{'binary ms':>12}")  # noqa: T201
+        for size in SIZES:
+            a = np.random.default_rng(0).random(size)
+            b = np.random.default_rng(1).random(size)
+            body = json.dumps({"ops": ["add"] * size, "a": a.tolist(), "b": b.tolist()})
+            as_json = await best_of(
+                client,
+                "/batch",
+                content=body,
+                headers={"Content-Type": "application/json"},
+            )
+            as_binary = await best_of(
+                client,
+                "/batch/binary",
+                content=np.concatenate([a, b]).astype("<f8").tobytes(),
+                headers={
+                    "Content-Type": "application/octet-stream",
+                    "X-Operation": "add",
+                },
+            )
+            print(  # noqa: T201
+                f"{size:>10}{as_json * 1000:>12.2f}{as_binary * 1000:>12.2f}"
+            )
+
+
+def main() -> None:
+    """Run the benchmark and print milliseconds per request."""
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
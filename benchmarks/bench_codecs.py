@@ -0,0 +1,88 @@
+"""Benchmark the per-request CPU cost of each response encoding.
+
+Requests go through the ASGI app in process, so the CPU time measured is
+the whole server-side request plus the in-process client. Each codec is
+measured on POST /add and on a POST /batch with BATCH_SIZE items, next to
+the encoded size of BATCH_SIZE results. The "json (stdlib)" row encodes
+JSON the way Starlette's JSONResponse does, as the baseline orjson replaced.
+
+Usage:
+    python -m benchmarks.bench_codecs
+"""
+
+import asyncio
+import json
+import time
+from typing import Any
+
+import httpx
+
+from app import codecs
+from app.main import app
+
+ROUNDS = 5
+REQUESTS = 2_000
+BATCH_SIZE = 1_000
+
+ADD_BODY = b'{"a": 1.25, "b": 2.5}'
+BATCH_BODY = json.dumps(
+    {
+        "ops": ["add", "sub", "mul", "div"] * (BATCH_SIZE // 4),
+        "a": [i * 1.5 for i in range(BATCH_SIZE)],
+        "b": [i % 7 for i in range(BATCH_SIZE)],
+    }
+).encode()
+
+
+def stdlib_json(content: Any) -> bytes:
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode()
+
+
+CASES = [
+    ("json (stdlib)", codecs.JSON, stdlib_json),
+    ("json (orjson)", codecs.JSON, codecs.encode_json),
+    ("msgpack", codecs.MSGPACK, codecs.ENCODERS[codecs.MSGPACK]),
+    ("cbor", codecs.CBOR, codecs.ENCODERS[codecs.CBOR]),
+]
+
+
+async def cpu_per_request(path: str, body: bytes, accept: str, requests: int) -> float:
+    """Return the best CPU seconds per request over several rounds."""
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Content-Type": "application/json", "Accept": accept}
+    best = float("inf")
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(ROUNDS):
+            start = time.process_time()
+            for _ in range(requests):
+                await client.post(path, content=body, headers=headers)
+            best = min(best, (time.process_time() - start) / requests)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark and print CPU microseconds per request."""
+    print(f"{'codec':<16}{'/add us':>10}{'/batch us':>12}{'bytes':>8}")  # noqa: T201
+    json_encoder = codecs.ENCODERS[codecs.JSON]
+    try:
+        for name, media_type, encoder in CASES:
+            codecs.ENCODERS[media_type] = encoder
+            add = asyncio.run(cpu_per_request("/add", ADD_BODY, media_type, REQUESTS))
+            batch = asyncio.run(
+                cpu_per_request("/batch", BATCH_BODY, media_type, REQUESTS // 10)
+            )
+            sample = {"results": [i * 1.5 for i in range(BATCH_SIZE)]}
+            print(  # noqa: T201
+                f"{name:<16}{add * 1e6:>10.1f}{batch * 1e6:>12.1f}"
+                f"{len(encoder(sample)):>8}"
+            )
+    finally:
+        codecs.ENCODERS[codecs.JSON] = json_encoder
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Benchmark listing workflow runs repo-wide versus per workflow.
+
+A local fixture server stands in for the GitHub REST API: a repository
+whose recent runs mostly belong to workflows the metrics do not use, served
+100 per page with Link headers and a fixed delay per request. The
+collector's workflow runs are fetched through the repo-wide /actions/runs
+listing filtered by name, with and without the collector's page limit, and
+through /actions/workflows/{id}/runs, counting requests, bytes and the runs
+found. Then a full collection is run twice against an on-disk HTTP cache,
+the second one revalidating every response with If-None-Match. Last,
+incremental collections with a local store are run with different windows,
+counting the requests each one makes.
+
+Usage:
+    python -m benchmarks.bench_collector
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from metrics.main import MAX_PAGES, GitHubMetricsCollector
+
+REPO = "octo/calculator"
+DELAY = 0.02  # Seconds of simulated API latency per request
+PER_WORKFLOW = {
+    "CI": 600,
+    "Security": 40,
+    "CD - Azure Web App": 150,
+    "Lint": 900,
+    "Docs": 400,
+    "Nightly": 120,
+    "Preview": 800,
+}
+WORKFLOWS = [
+    {"id": index, "name": name} for index, name in enumerate(PER_WORKFLOW, start=1)
+]
+USED = ("CD - Azure Web App", "CI", "Security")
+
+
+def fixture_pulls() -> list[dict[str, Any]]:
+    """Return closed pull requests, a third of them from Dependabot."""
+    now = datetime.now(UTC)
+    pulls = []
+    for i in range(250):
+        created = now - timedelta(hours=9 * i + 30)
+        merged = created + timedelta(hours=5 + i % 20)
+        pulls.append(
+            {
+                "number": 1000 - i,
+                "state": "closed",
+                "user": {"login": "dependabot[bot]" if i % 3 == 0 else "dev"},
+                "created_at": created.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "merged_at": merged.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "updated_at": merged.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+        )
+    return sorted(pulls, key=lambda pull: pull["updated_at"], reverse=True)
+
+
+def fixture_runs() -> list[dict[str, Any]]:
+    """Return the repository's runs, newest first, all within two weeks."""
+    now = datetime.now(UTC)
+    runs = []
+    for workflow in WORKFLOWS:
+        for i in range(PER_WORKFLOW[workflow["name"]]):
+            created = now - timedelta(minutes=17 * i + workflow["id"])
+            stamp = created.strftime("%Y-%m-%dT%H:%M:%SZ")
+            runs.append(
+                {
+                    "id": workflow["id"] * 100_000 + i,
+                    "name": workflow["name"],
+                    "workflow_id": workflow["id"],
+                    "status": "completed",
+                    "conclusion": "failure" if i % 9 == 0 else "success",
+                    "created_at": stamp,
+                    "run_started_at": stamp,
+                    "updated_at": stamp,
+                    "head_branch": "main",
+                    "event": "push",
+                }
+            )
+    return sorted(runs, key=lambda run: run["created_at"], reverse=True)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """HTTP server answering the runs listings of one fixture repository."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FixtureHandler)
+        self.runs = fixture_runs()
+        self.pulls = fixture_pulls()
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serve paginated GitHub-like listings."""
+
+    server: FixtureServer
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def do_GET(self) -> None:  # noqa: N802
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        prefix = f"/repos/{REPO}/actions"
+        if url.path == f"/repos/{REPO}/pulls":
+            state = query.get("state", "open")
+            key = ""
+            items = [
+                pull for pull in self.server.pulls if state in ("all", pull["state"])
+            ]
+        elif url.path == f"{prefix}/workflows":
+            key, items = "workflows", WORKFLOWS
+        elif url.path == f"{prefix}/runs":
+            key, items = "workflow_runs", self.server.runs
+        elif url.path.startswith(f"{prefix}/workflows/"):
+            workflow_id = int(url.path.split("/")[-2])
+            status = query.get("status")
+            created = query.get("created", ">=").removeprefix(">=")
+            key = "workflow_runs"
+            items = [
+                run
+                for run in self.server.runs
+                if run["workflow_id"] == workflow_id
+                and status in (None, run["status"], run["conclusion"])
+                and run["created_at"] >= created
+            ]
+        else:
+            self.send_error(404)
+            return
+
+        per_page = int(query.get("per_page", "30"))
+        page = int(query.get("page", "1"))
+        last = max((len(items) + per_page - 1) // per_page, 1)
+        page_items = items[(page - 1) * per_page :][:per_page]
+        body = json.dumps(
+            {"total_count": len(items), key: page_items} if key else page_items
+        ).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        links = []
+        base = f"http://{self.headers['Host']}{url.path}?per_page={per_page}&page="
+        if page < last:
+            links.append(f'<{base}{page + 1}>; rel="next"')
+        links.append(f'<{base}{last}>; rel="last"')
+
+        time.sleep(DELAY)
+        if self.headers.get("If-None-Match") == etag:
+            with self.server.lock:
+                self.server.requests += 1
+                self.server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.bytes += len(body)
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Link", ", ".join(links))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def repo_wide(
+    collector: GitHubMetricsCollector, max_pages: int = MAX_PAGES
+) -> dict[str, int]:
+    """List runs the old way: every run in the repo, filtered by name."""
+    runs = collector._get_paginated(
+        f"/repos/{REPO}/actions/runs", items_key="workflow_runs", max_pages=max_pages
+    )
+    return {name: sum(run["name"] == name for run in runs) for name in USED}
+
+
+def repo_wide_uncapped(collector: GitHubMetricsCollector) -> dict[str, int]:
+    """List every run in the repo without the page limit."""
+    return repo_wide(collector, max_pages=1000)
+
+
+def per_workflow(collector: GitHubMetricsCollector) -> dict[str, int]:
+    """List runs per workflow with server-side filters."""
+    return {name: len(collector.get_workflow_runs(name)) for name in USED}
+
+
+def main() -> None:
+    """Run the benchmark and print requests, bytes, time and runs found."""
+    server = FixtureServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ.update(
+        GITHUB_API_URL=f"http://127.0.0.1:{server.server_port}",
+        GITHUB_REPOSITORY=REPO,
+        METRICS_WINDOW_DAYS="30",
+    )
+    print(f"{'strategy':<14}{'requests':>9}{'kB':>9}{'s':>7}  runs found")  # noqa: T201
+    strategies = (
+        ("repo-wide", repo_wide),
+        ("repo, all", repo_wide_uncapped),
+        ("per workflow", per_workflow),
+    )
+    for label, strategy in strategies:
+        collector = GitHubMetricsCollector()
+        server.requests = server.bytes = 0
+        start = time.perf_counter()
+        found = strategy(collector)
+        elapsed = time.perf_counter() - start
+        counts = ", ".join(
+            f"{name} {found[name]}/{PER_WORKFLOW[name]}" for name in USED
+        )
+        print(  # noqa: T201
+            f"{label:<14}{server.requests:>9}{server.bytes / 1000:>9.0f}"
+            f"{elapsed:>7.2f}  {counts}"
+        )
+
+    print()  # noqa: T201
+    print(f"{'collection':<14}{'requests':>9}{'304':>6}{'kB':>9}{'s':>7}")  # noqa: T201
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ["METRICS_CACHE_DIR"] = cache_dir
+        for label in ("cold cache", "warm cache"):
+            server.requests = server.not_modified = server.bytes = 0
+            start = time.perf_counter()
+            GitHubMetricsCollector().collect_all_metrics()
+            elapsed = time.perf_counter() - start
+            print(  # noqa: T201
+                f"{label:<14}{server.requests:>9}{server.not_modified:>6}"
+                f"{server.bytes / 1000:>9.0f}{elapsed:>7.2f}"
+            )
+        del os.environ["METRICS_CACHE_DIR"]
+
+    print()  # noqa: T201
+    print(f"{'incremental':<22}{'requests':>9}")  # noqa: T201
+    with tempfile.TemporaryDirectory() as store_dir:
+        os.environ["METRICS_STORE_PATH"] = os.path.join(store_dir, "metrics.db")
+        for label, days in (
+            ("first run, 30 days", "30"),
+            ("next run, 30 days", "30"),
+            ("backfill to 90 days", "90"),
+            ("next run, 90 days", "90"),
+            ("next run, 1 day", "1"),
+        ):
+            os.environ["METRICS_WINDOW_DAYS"] = days
+            server.requests = 0
+            collector = GitHubMetricsCollector()
+            collector.collect_all_metrics()
+            collector.close()
+            print(f"{label:<22}{server.requests:>9}")  # noqa: T201
+        del os.environ["METRICS_STORE_PATH"]
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
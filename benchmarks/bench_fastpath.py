@@ -0,0 +1,73 @@
+"""Benchmark the raw ASGI fast path against the full FastAPI routes.
+
+Requests are driven straight through the ASGI interface, without a server
+or HTTP client, so the numbers are the requests per second one worker
+process can serve for POST /add with and without FastPathMiddleware.
+
+Usage:
+    python -m benchmarks.bench_fastpath
+"""
+
+import asyncio
+import time
+
+from starlette.types import ASGIApp, Message
+
+from app.fastpath import FastPathMiddleware
+from app.main import OPERATIONS, app
+
+ROUNDS = 5
+REQUESTS = 20_000
+
+BODY = b'{"a": 1.25, "b": 2.5}'
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "POST",
+    "scheme": "http",
+    "path": "/add",
+    "raw_path": b"/add",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [
+        (b"host", b"bench"),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(BODY)).encode()),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("127.0.0.1", 8000),
+}
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": BODY, "more_body": False}
+
+
+async def send(message: Message) -> None:
+    if message["type"] == "http.response.start" and message["status"] != 200:
+        raise RuntimeError(f"Unexpected status {message['status']}")
+
+
+async def requests_per_second(target: ASGIApp) -> float:
+    """Return the best requests per second over several rounds."""
+    best = 0.0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await target(dict(SCOPE), receive, send)
+        best = max(best, REQUESTS / (time.perf_counter() - start))
+    return best
+
+
+def main() -> None:
+    """Run the benchmark and print requests per second."""
+    before = asyncio.run(requests_per_second(app))
+    after = asyncio.run(requests_per_second(FastPathMiddleware(app, OPERATIONS)))
+    print(f"{'route':<12}{'req/s':>10}")  # noqa: T201
+    print(f"{'fastapi':<12}{before:>10.0f}")  # noqa: T201
+    print(f"{'fast path':<12}{after:>10.0f}{after / before:>8.1f}x")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
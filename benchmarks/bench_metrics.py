@@ -0,0 +1,94 @@
+"""Benchmark the per-request cost of the Prometheus instrumentation.
+
+Requests are driven straight through the ASGI interface, first into an app
+that answers immediately, with and without MetricsMiddleware, so the
+difference is the instrumentation overhead alone; then through the full
+POST /add route for scale. Rendering /metrics is timed separately.
+
+Usage:
+    python -m benchmarks.bench_metrics
+"""
+
+import asyncio
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.main import OPERATIONS, app
+from app.telemetry import Metrics, MetricsMiddleware
+
+ROUNDS = 5
+REQUESTS = 50_000
+
+BODY = b'{"a": 1.25, "b": 2.5}'
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "POST",
+    "scheme": "http",
+    "path": "/add",
+    "raw_path": b"/add",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [
+        (b"host", b"bench"),
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(BODY)).encode()),
+    ],
+    "client": ("127.0.0.1", 50000),
+    "server": ("127.0.0.1", 8000),
+}
+START = {"type": "http.response.start", "status": 200, "headers": []}
+END = {"type": "http.response.body", "body": b"{}"}
+
+
+async def answer(scope: Scope, receive: Receive, send: Send) -> None:
+    await send(START)
+    await send(END)
+
+
+async def receive() -> Message:
+    return {"type": "http.request", "body": BODY, "more_body": False}
+
+
+async def send(message: Message) -> None:
+    if message["type"] == "http.response.start" and message["status"] != 200:
+        raise RuntimeError(f"Unexpected status {message['status']}")
+
+
+async def microseconds_per_request(target: ASGIApp, requests: int) -> float:
+    """Return the best microseconds per request over several rounds."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await target(dict(SCOPE), receive, send)
+        best = min(best, (time.perf_counter() - start) / requests * 1e6)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark and print microseconds per request."""
+    metrics = Metrics()
+    middleware = MetricsMiddleware(
+        answer, metrics, paths=[f"/{op}" for op in OPERATIONS]
+    )
+    bare = asyncio.run(microseconds_per_request(answer, REQUESTS))
+    wrapped = asyncio.run(microseconds_per_request(middleware, REQUESTS))
+    full = asyncio.run(microseconds_per_request(app, REQUESTS // 10))
+
+    start = time.perf_counter()
+    size = len(metrics.render())
+    render = (time.perf_counter() - start) * 1e6
+
+    print(f"{'target':<24}{'us/req':>10}")  # noqa: T201
+    print(f"{'bare asgi app':<24}{bare:>10.2f}")  # noqa: T201
+    print(f"{'with metrics':<24}{wrapped:>10.2f}")  # noqa: T201
+    print(f"{'overhead':<24}{wrapped - bare:>10.2f}")  # noqa: T201
+    print(f"{'POST /add (instrumented)':<24}{full:>10.2f}")  # noqa: T201
+    print(f"render /metrics: {render:.0f} us, {size} bytes")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark the per-request cost of each numeric mode.
+
+Two measurements are taken for POST /add bodies:
+
+* model layer: request validation, the calculation and the response model,
+  which isolates the cost of numeric-mode dispatch;
+* end to end: full requests through the ASGI app in process.
+
+Both compare the float mode with a copy of the original float-only models to
+show that the float fast path did not regress.
+
+Usage:
+    python -m benchmarks.bench_numeric
+"""
+
+import asyncio
+import time
+import timeit
+
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from app.calculator import add
+from app.main import OperationRequest, _calculate
+from app.main import app as current_app
+
+ROUNDS = 7
+NUMBER = 50_000
+REQUESTS = 3_000
+
+
+class BaselineRequest(BaseModel):
+    """The float-only request model the numeric modes replaced."""
+
+    a: float
+    b: float
+
+
+class BaselineResponse(BaseModel):
+    """The float-only response model the numeric modes replaced."""
+
+    result: float
+
+
+baseline_app = FastAPI()
+
+
+@baseline_app.post("/add", response_model=BaselineResponse)
+async def baseline_add(request: BaselineRequest) -> BaselineResponse:
+    return BaselineResponse(result=add(request.a, request.b))
+
+
+def baseline(body: bytes) -> BaselineResponse:
+    request = BaselineRequest.model_validate_json(body)
+    return BaselineResponse(result=add(request.a, request.b))
+
+
+def current(body: bytes) -> object:
+    return _calculate(add, OperationRequest.model_validate_json(body))
+
+
+FLOAT_BODY = b'{"a": 1.25, "b": 2.5}'
+CASES = [
+    ("baseline float", baseline, baseline_app, FLOAT_BODY),
+    ("float", current, current_app, FLOAT_BODY),
+    ("decimal", current, current_app, b'{"a": "1.25", "b": "2.5", "mode": "decimal"}'),
+    (
+        "decimal prec=50",
+        current,
+        current_app,
+        b'{"a": "1.25", "b": "2.5", "mode": "decimal", "precision": 50}',
+    ),
+    ("fraction", current, current_app, b'{"a": "5/4", "b": "5/2", "mode": "fraction"}'),
+]
+
+
+async def end_to_end(app: FastAPI, body: bytes) -> float:
+    """Return the best mean seconds per request over several rounds."""
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Content-Type": "application/json"}
+    best = float("inf")
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            for _ in range(REQUESTS):
+                await client.post("/add", content=body, headers=headers)
+            best = min(best, (time.perf_counter() - start) / REQUESTS)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark and print microseconds per request."""
+    print(f"{'mode':<18}{'model us':>10}{'e2e us':>10}")  # noqa: T201
+    for name, handler, app, body in CASES:
+        model = min(
+            timeit.repeat(lambda h=handler, b=body: h(b), number=NUMBER, repeat=ROUNDS)
+        )
+        e2e = asyncio.run(end_to_end(app, body))
+        print(  # noqa: T201
+            f"{name:<18}{model / NUMBER * 1e6:>10.2f}{e2e * 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
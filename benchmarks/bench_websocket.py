@@ -0,0 +1,99 @@
+"""Benchmark per-operation latency over a WebSocket session versus HTTP.
+
+A uvicorn server is started in a background thread on a local port, then the
+same sequence of additions is sent:
+
+* over HTTP with a keep-alive client, one POST /add per operation;
+* over one /ws session, one message at a time (request/reply latency);
+* over one /ws session, pipelined with up to WINDOW messages in flight.
+
+Usage:
+    python -m benchmarks.bench_websocket
+"""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+import websockets
+
+from app.main import app
+
+ROUNDS = 5
+OPERATIONS = 2_000
+WINDOW = 32
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def start_server(port: int) -> uvicorn.Server:
+    """Start the app on a local port and wait until it accepts connections."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def over_http(port: int) -> float:
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        start = time.perf_counter()
+        for i in range(OPERATIONS):
+            await client.post("/add", json={"a": i, "b": 1})
+        return time.perf_counter() - start
+
+
+async def over_websocket(port: int) -> float:
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws") as ws:
+        start = time.perf_counter()
+        for i in range(OPERATIONS):
+            await ws.send(json.dumps({"id": i, "op": "add", "a": i, "b": 1}))
+            await ws.recv()
+        return time.perf_counter() - start
+
+
+async def over_websocket_pipelined(port: int) -> float:
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ws") as ws:
+        start = time.perf_counter()
+        sent = received = 0
+        while received < OPERATIONS:
+            while sent < OPERATIONS and sent - received < WINDOW:
+                await ws.send(json.dumps({"id": sent, "op": "add", "a": sent, "b": 1}))
+                sent += 1
+            await ws.recv()
+            received += 1
+        return time.perf_counter() - start
+
+
+CASES = [
+    ("http keep-alive", over_http),
+    ("websocket", over_websocket),
+    (f"websocket x{WINDOW}", over_websocket_pipelined),
+]
+
+
+def main() -> None:
+    """Run the benchmark and print microseconds per operation."""
+    port = free_port()
+    server = start_server(port)
+    try:
+        print(f"{'transport':<18}{'us/op':>10}")  # noqa: T201
+        for name, run in CASES:
+            best = min(asyncio.run(run(port)) for _ in range(ROUNDS))
+            print(f"{name:<18}{best / OPERATIONS * 1e6:>10.1f}")  # noqa: T201
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,319 @@
 """Metrics collection module using GitHub REST API."""
 
+import hashlib
 import json
 import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
 from datetime import UTC, datetime, timedelta
+from functools import wraps
+from pathlib import Path
 from typing import Any
+from urllib.parse import parse_qs, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.models import PreparedRequest
+from requests.structures import CaseInsensitiveDict
+
+MAX_PAGES = 10  # Safety limit per paginated listing
+
+
+class DiskCache:
+    """On-disk cache of GitHub API responses for conditional requests.
+
+    Each URL's body is stored with its ETag, Last-Modified and Link headers
+    in one JSON file. Stored validators are sent with the next request for
+    the URL, and a 304 Not Modified answer is served from the file, without
+    counting against the rate limit. Entries older than max_age seconds are
+    dropped, and the oldest entries go first when the files take up more
+    than max_bytes. Entries are keyed by URL and scope, e.g. the API token,
+    so callers with different credentials never share responses.
+    """
+
+    def __init__(
+        self, directory: str, max_age: float, max_bytes: int, scope: str = ""
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._scope = hashlib.sha256(scope.encode()).hexdigest()
+        self.not_modified = 0
+        self.stored = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        key = hashlib.sha256(f"{self._scope} {url}".encode()).hexdigest()
+        return self.directory / f"{key}.json"
+
+    def _write(self, url: str, entry: dict[str, Any]) -> None:
+        """Write an entry through a temporary file, so readers never see part."""
+        path = self._path(url)
+        temporary = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temporary.write_text(json.dumps(entry), encoding="utf-8")
+        temporary.replace(path)
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        """Return the stored entry of a URL, or None if missing or too old."""
+        path = self._path(url)
+        try:
+            entry: dict[str, Any] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("stored_at", 0) > self.max_age:
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def validators(self, entry: dict[str, Any] | None) -> dict[str, str]:
+        """Return the conditional request headers for a stored entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url: str, response: requests.Response) -> None:
+        """Store a response if it carries a validator."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "link": response.headers.get("Link"),
+            "body": response.text,
+            "stored_at": time.time(),
+        }
+        self._write(url, entry)
+        with self._lock:
+            self.stored += 1
+
+    def revalidated(self, url: str, entry: dict[str, Any]) -> requests.Response:
+        """Count a 304 answer and rebuild the response from its entry."""
+        with self._lock:
+            self.not_modified += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = entry["body"].encode("utf-8")
+        response.headers = CaseInsensitiveDict(
+            {
+                name: value
+                for name, value in (
+                    ("ETag", entry.get("etag")),
+                    ("Last-Modified", entry.get("last_modified")),
+                    ("Link", entry.get("link")),
+                )
+                if value
+            }
+        )
+        # Refresh the entry's age, since the server confirmed it is current.
+        entry["stored_at"] = time.time()
+        self._write(url, entry)
+        return response
+
+    def evict(self) -> None:
+        """Drop entries that are too old, then the oldest over the size cap.
+
+        Temporary files left behind by interrupted writes are removed too.
+        """
+        now = time.time()
+        for path in self.directory.glob("*.tmp"):
+            with suppress(FileNotFoundError):
+                if now - path.stat().st_mtime > 60:
+                    path.unlink()
+        files = []
+        for path in self.directory.glob("*.json"):
+            stat = path.stat()
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+                self.evicted += 1
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evicted += 1
+
+    def reset_stats(self) -> None:
+        """Zero the cache counters."""
+        with self._lock:
+            self.not_modified = self.stored = self.evicted = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache counters."""
+        return {
+            "not_modified": self.not_modified,
+            "stored": self.stored,
+            "evicted": self.evicted,
+        }
+
+
+class MetricsStore:
+    """Local SQLite copy of workflow runs and pull requests.
+
+    Records are kept in a normalized form, indexed by the timestamps the
+    metrics filter on. Per listing, a watermark holds the newest timestamp
+    seen and a floor the oldest timestamp the copy is complete from, so later
+    collections only fetch what changed since the watermark.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY, workflow_id INTEGER NOT NULL,
+                name TEXT, status TEXT, conclusion TEXT, created_at TEXT NOT NULL,
+                run_started_at TEXT, updated_at TEXT);
+            CREATE INDEX IF NOT EXISTS runs_created_at
+                ON runs (workflow_id, created_at);
+            CREATE TABLE IF NOT EXISTS pulls (
+                number INTEGER PRIMARY KEY, state TEXT NOT NULL, author TEXT,
+                created_at TEXT NOT NULL, merged_at TEXT, updated_at TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS pulls_merged_at ON pulls (merged_at);
+            CREATE INDEX IF NOT EXISTS pulls_state ON pulls (state, created_at);
+            CREATE TABLE IF NOT EXISTS watermarks (
+                listing TEXT PRIMARY KEY, floor TEXT NOT NULL, latest TEXT NOT NULL);
+            """)
+
+    def watermark(self, listing: str) -> tuple[str, str] | None:
+        """Return the (floor, latest) timestamps of a listing, if synced."""
+        row = self._db.execute(
+            "SELECT floor, latest FROM watermarks WHERE listing = ?", (listing,)
+        ).fetchone()
+        return (row["floor"], row["latest"]) if row else None
+
+    def set_watermark(self, listing: str, floor: str, latest: str) -> None:
+        """Record how far a listing has been synced."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+            (listing, floor, latest),
+        )
+
+    def put_runs(self, runs: list[dict[str, Any]]) -> None:
+        """Insert or update workflow runs."""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    run["id"],
+                    run.get("workflow_id", 0),
+                    run.get("name"),
+                    run.get("status"),
+                    run.get("conclusion"),
+                    run["created_at"],
+                    run.get("run_started_at"),
+                    run.get("updated_at"),
+                )
+                for run in runs
+            ],
+        )
+
+    def put_pulls(self, pulls: list[dict[str, Any]]) -> None:
+        """Insert or update pull requests."""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO pulls VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    pull["number"],
+                    pull["state"],
+                    (pull.get("user") or {}).get("login"),
+                    pull["created_at"],
+                    pull.get("merged_at"),
+                    pull.get("updated_at") or pull["created_at"],
+                )
+                for pull in pulls
+            ],
+        )
+
+    def oldest_unfinished_run(self, workflow_id: int, since: str) -> str | None:
+        """Return when the oldest run of a workflow not yet completed was created."""
+        row = self._db.execute(
+            "SELECT min(created_at) FROM runs WHERE workflow_id = ?"
+            " AND created_at >= ? AND (status IS NULL OR status != 'completed')",
+            (workflow_id, since),
+        ).fetchone()
+        return row[0] if row else None
+
+    def replace_open_pulls(self, pulls: list[dict[str, Any]]) -> None:
+        """Make a complete listing of open pull requests the stored open set."""
+        self.put_pulls(pulls)
+        self._db.execute(
+            "DELETE FROM pulls WHERE state = 'open'"
+            " AND number NOT IN (SELECT value FROM json_each(?))",
+            (json.dumps([pull["number"] for pull in pulls]),),
+        )
+
+    def runs(
+        self, workflow_ids: list[int], since: str, status: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Return runs of some workflows created since a timestamp."""
+        placeholders = ", ".join("?" * len(workflow_ids))
+        query = (
+            "SELECT * FROM runs"  # noqa: S608
+            f" WHERE workflow_id IN ({placeholders}) AND created_at >= ?"
+        )
+        args: list[Any] = [*workflow_ids, since]
+        if status:
+            query += " AND (status = ? OR conclusion = ?)"
+            args += [status, status]
+        return [dict(row) for row in self._db.execute(query, args)]
+
+    def pulls(self, state: str) -> list[dict[str, Any]]:
+        """Return pull requests in a state, shaped like API records."""
+        rows = self._db.execute(
+            "SELECT * FROM pulls WHERE state = ? ORDER BY updated_at DESC", (state,)
+        )
+        return [
+            {
+                "number": row["number"],
+                "state": row["state"],
+                "user": {"login": row["author"]},
+                "created_at": row["created_at"],
+                "merged_at": row["merged_at"],
+                "updated_at": row["updated_at"],
+            }
+            for row in rows
+        ]
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of stored runs and pull requests."""
+        runs = self._db.execute("SELECT count(*) FROM runs").fetchone()[0]
+        pulls = self._db.execute("SELECT count(*) FROM pulls").fetchone()[0]
+        return {"runs": int(runs), "pulls": int(pulls)}
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._db.close()
+
+
+def _collection(
+    method: Callable[["GitHubMetricsCollector"], dict[str, Any]],
+) -> Callable[["GitHubMetricsCollector"], dict[str, Any]]:
+    """Run a collect_* method inside a collection."""
+
+    @wraps(method)
+    def collect(self: "GitHubMetricsCollector") -> dict[str, Any]:
+        with self.collection():
+            return method(self)
+
+    return collect
 
 
 class GitHubMetricsCollector:
@@ -15,41 +323,184 @@ class GitHubMetricsCollector:
         self.token = os.environ.get("GITHUB_TOKEN", "")
         self.repo = os.environ.get("GITHUB_REPOSITORY", "")
         self.window_days = int(os.environ.get("METRICS_WINDOW_DAYS", "30"))
-        self.base_url = "https://api.github.com"
+        self.max_concurrency = int(os.environ.get("METRICS_MAX_CONCURRENCY", "8"))
+        self.base_url = os.environ.get("GITHUB_API_URL", "https://api.github.com")
         self.headers = {
             "Authorization": f"Bearer {self.token}",
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
         }
+        # One keep-alive connection pool, large enough for concurrent pages.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_maxsize=max(self.max_concurrency, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Responses of the current collection, so collectors asking for the
+        # same endpoint and parameters share one request.
+        self._responses: dict[
+            tuple[str, tuple[tuple[str, str], ...]], requests.Response
+        ] = {}
+        self._collections = 0
+        self._lock = threading.Lock()
+        self.api_calls = 0
+        self.api_calls_saved = 0
+        self.truncated: list[str] = []
+        # Workflow ids by lowercased name, resolved once per collector.
+        self._workflow_ids: dict[str, list[int]] | None = None
+        cache_dir = os.environ.get("METRICS_CACHE_DIR", "")
+        self.http_cache = (
+            DiskCache(
+                cache_dir,
+                max_age=float(os.environ.get("METRICS_CACHE_MAX_AGE_DAYS", "7"))
+                * 86400,
+                max_bytes=int(os.environ.get("METRICS_CACHE_MAX_MB", "100"))
+                * 1024
+                * 1024,
+                scope=self.token,
+            )
+            if cache_dir
+            else None
+        )
+        # Incremental mode: records are synced into a local store and the
+        # metrics computed from it.
+        store_path = os.environ.get("METRICS_STORE_PATH", "")
+        self.store = MetricsStore(store_path) if store_path else None
+        self.overlap = timedelta(
+            hours=float(os.environ.get("METRICS_OVERLAP_HOURS", "6"))
+        )
+        self._synced: set[str] = set()
+
+    @contextmanager
+    def collection(self) -> Iterator[None]:
+        """Share responses between the requests made inside the block.
+
+        The outermost block starts a collection: the memo, the API call
+        counters and the truncated listings are reset on entry, and the memo
+        is dropped again on exit. Requests made outside any collection are
+        not memoized.
+        """
+        with self._lock:
+            self._collections += 1
+            if self._collections == 1:
+                self._responses.clear()
+                self.api_calls = self.api_calls_saved = 0
+                self.truncated = []
+                self._synced.clear()
+                if self.http_cache:
+                    self.http_cache.reset_stats()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._collections -= 1
+                if self._collections == 0:
+                    self._responses.clear()
+
+    def _get_response(
+        self, endpoint: str, params: dict[str, Any] | None = None
+    ) -> requests.Response:
+        """Make GET request to GitHub API and return the raw response.
+
+        Responses are reused for the rest of the collection and, with a disk
+        cache, revalidated with conditional requests in later collections.
+        Outside a collection every call makes a request.
+        """
+        key = (
+            endpoint,
+            tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+        )
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self.api_calls_saved += 1
+                return cached
+        request = PreparedRequest()
+        request.prepare_url(f"{self.base_url}{endpoint}", params)
+        url = str(request.url)
+        entry = self.http_cache.get(url) if self.http_cache else None
+        headers = self.http_cache.validators(entry) if self.http_cache else {}
+        response = self.session.get(url, headers=headers, timeout=30)
+        if response.status_code == 304 and self.http_cache and entry:
+            response = self.http_cache.revalidated(url, entry)
+        else:
+            response.raise_for_status()
+            if self.http_cache:
+                self.http_cache.put(url, response)
+        with self._lock:
+            self.api_calls += 1
+            if self._collections:
+                self._responses[key] = response
+        return response
 
     def _get(self, endpoint: str, params: dict[str, Any] | None = None) -> Any:
         """Make GET request to GitHub API."""
-        url = f"{self.base_url}{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        return self._get_response(endpoint, params).json()
 
     def _get_paginated(
-        self, endpoint: str, params: dict[str, Any] | None = None
+        self,
+        endpoint: str,
+        params: dict[str, Any] | None = None,
+        items_key: str | None = None,
+        max_pages: int = MAX_PAGES,
     ) -> list[Any]:
-        """Fetch all pages from a paginated endpoint."""
-        params = params or {}
-        params["per_page"] = 100
-        params["page"] = 1
-        all_items: list[Any] = []
-
-        while True:
-            items = self._get(endpoint, params)
-            if not items:
-                break
-            all_items.extend(items)
-            if len(items) < 100:
-                break
-            params["page"] += 1
-            if params["page"] > 10:  # Safety limit
-                break
+        """Fetch all pages from a paginated endpoint.
+
+        The first page is fetched alone; once its Link header tells how many
+        pages there are, the others are fetched concurrently, at most
+        max_concurrency at a time, and joined in page order.
+
+        Args:
+            endpoint: API path, e.g. "/repos/o/r/pulls".
+            params: Query parameters.
+            items_key: Key of the item list in each page, for endpoints that
+                wrap it in an object, e.g. "workflow_runs".
+            max_pages: Most pages fetched; listings cut short are recorded
+                in truncated.
+        """
+        params = {**(params or {}), "per_page": 100, "page": 1}
+        first = self._get_response(endpoint, params)
+        pages = [self._items(first.json(), items_key)]
+
+        last = first.links.get("last", {}).get("url")
+        last_page = parse_qs(urlparse(last).query).get("page") if last else None
+        if last_page:
+            count = int(last_page[0])
+            if count > max_pages:
+                with self._lock:
+                    self.truncated.append(endpoint)
+                count = max_pages
+            rest = [{**params, "page": page} for page in range(2, count + 1)]
+            if rest:
+                workers = max(min(self.max_concurrency, len(rest)), 1)
+                with ThreadPoolExecutor(workers) as pool:
+                    pages.extend(
+                        pool.map(
+                            lambda page: self._items(
+                                self._get(endpoint, page), items_key
+                            ),
+                            rest,
+                        )
+                    )
+        else:
+            # No page count advertised: follow "next" links one by one.
+            response = first
+            while "next" in response.links:
+                if params["page"] >= max_pages:
+                    with self._lock:
+                        self.truncated.append(endpoint)
+                    break
+                params["page"] += 1
+                response = self._get_response(endpoint, params)
+                pages.append(self._items(response.json(), items_key))
 
-        return all_items
+        return [item for page in pages for item in page]
+
+    @staticmethod
+    def _items(page: Any, items_key: str | None) -> list[Any]:
+        """Return the item list of one page."""
+        items = page.get(items_key, []) if items_key else page
+        return list(items or [])
 
     def _get_window_start(self) -> datetime:
         """Get the start of the metrics window."""
@@ -59,17 +510,153 @@ class GitHubMetricsCollector:
         """Parse GitHub datetime string."""
         return datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
 
-    def get_workflow_runs(self, workflow_name: str) -> list[dict[str, Any]]:
-        """Get workflow runs for a specific workflow."""
-        endpoint = f"/repos/{self.repo}/actions/runs"
-        params = {"created": f">={self._get_window_start().strftime('%Y-%m-%d')}"}
-        all_runs = self._get_paginated(endpoint, params)
-        return [
-            run
-            for run in all_runs
-            if run.get("name", "").lower() == workflow_name.lower()
-        ]
+    def get_workflow_ids(self, workflow_name: str) -> list[int]:
+        """Get the ids of the workflows with a given name."""
+        if self._workflow_ids is None:
+            workflows = self._get_paginated(
+                f"/repos/{self.repo}/actions/workflows", items_key="workflows"
+            )
+            ids: dict[str, list[int]] = {}
+            for workflow in workflows:
+                ids.setdefault(workflow.get("name", "").lower(), []).append(
+                    workflow["id"]
+                )
+            self._workflow_ids = ids
+        return self._workflow_ids.get(workflow_name.lower(), [])
+
+    def get_workflow_runs(
+        self, workflow_name: str, status: str | None = None
+    ) -> list[dict[str, Any]]:
+        """Get workflow runs for a specific workflow.
+
+        Runs are listed per workflow and filtered by creation date, and
+        optionally by status or conclusion, on the server.
+
+        Args:
+            workflow_name: Name of the workflow, matched case-insensitively.
+            status: Status or conclusion to filter on, e.g. "success".
+        """
+        window_start = self._get_window_start().strftime("%Y-%m-%d")
+        if self.store:
+            workflow_ids = self.get_workflow_ids(workflow_name)
+            for workflow_id in workflow_ids:
+                self._sync_runs(workflow_id, window_start)
+            return self.store.runs(workflow_ids, window_start, status)
+
+        params = {"created": f">={window_start}"}
+        if status:
+            params["status"] = status
+        runs: list[dict[str, Any]] = []
+        for workflow_id in self.get_workflow_ids(workflow_name):
+            endpoint = f"/repos/{self.repo}/actions/workflows/{workflow_id}/runs"
+            runs.extend(
+                self._get_paginated(endpoint, params, items_key="workflow_runs")
+            )
+        return runs
+
+    def _since(self, listing: str, window_start: str) -> str:
+        """Return the timestamp a listing must be fetched from.
+
+        That is the window start for a listing never synced or synced from a
+        later date, and otherwise the watermark minus the overlap, so records
+        that changed shortly after being stored are fetched again.
+        """
+        assert self.store is not None
+        mark = self.store.watermark(listing)
+        if mark is None or window_start < mark[0]:
+            return window_start
+        latest = self._parse_datetime(mark[1]) - self.overlap
+        return max(latest.strftime("%Y-%m-%dT%H:%M:%SZ"), window_start)
+
+    def _sync_runs(self, workflow_id: int, window_start: str) -> None:
+        """Fetch the runs of a workflow created since its watermark.
+
+        The listing can only be filtered by creation date, so it also goes
+        back to the oldest stored run that had not completed, to pick up the
+        status and conclusion of runs that finished since.
+        """
+        assert self.store is not None
+        listing = f"runs:{workflow_id}"
+        if listing in self._synced:
+            return
+        since = self._since(listing, window_start)
+        unfinished = self.store.oldest_unfinished_run(workflow_id, window_start)
+        if unfinished and unfinished < since:
+            since = unfinished
+        endpoint = f"/repos/{self.repo}/actions/workflows/{workflow_id}/runs"
+        truncated = len(self.truncated)
+        runs = self._get_paginated(
+            endpoint, {"created": f">={since}"}, items_key="workflow_runs"
+        )
+        for run in runs:
+            run.setdefault("workflow_id", workflow_id)
+        self.store.put_runs(runs)
+        mark = self.store.watermark(listing)
+        floor = mark[0] if mark and since > mark[0] else since
+        if len(self.truncated) > truncated and runs:
+            # Cut short by the page limit: only the newest runs are complete.
+            floor = min(run["created_at"] for run in runs)
+        latest = max(
+            [run["created_at"] for run in runs] + ([mark[1]] if mark else []),
+            default=since,
+        )
+        self.store.set_watermark(listing, floor, latest)
+        self._synced.add(listing)
+
+    def _sync_pulls(self, window_start: str) -> None:
+        """Fetch the open pull requests and those closed since the watermark.
+
+        Open pull requests are listed in full, however long ago they were
+        last updated, and replace the stored open set. Closed ones are listed
+        most recently updated first until a page passes the watermark, at
+        most MAX_PAGES pages.
+        """
+        assert self.store is not None
+        if "pulls" in self._synced:
+            return
+        endpoint = f"/repos/{self.repo}/pulls"
+        truncated = len(self.truncated)
+        open_pulls = self._get_paginated(endpoint, {"state": "open"})
+        if len(self.truncated) > truncated:
+            self.store.put_pulls(open_pulls)
+        else:
+            self.store.replace_open_pulls(open_pulls)
+
+        since = self._since("pulls", window_start)
+        params = {"state": "closed", "sort": "updated", "direction": "desc"}
+        closed: list[dict[str, Any]] = []
+        cut_short = False
+        for page in range(1, MAX_PAGES + 1):
+            pulls = self._get(endpoint, {**params, "per_page": 100, "page": page})
+            closed.extend(pulls)
+            if len(pulls) < 100 or pulls[-1]["updated_at"] < since:
+                break
+        else:
+            cut_short = True
+            with self._lock:
+                self.truncated.append(endpoint)
+        self.store.put_pulls(closed)
+
+        mark = self.store.watermark("pulls")
+        floor = mark[0] if mark and since > mark[0] else since
+        if cut_short and closed:
+            # Cut short by the page limit: only the newest pulls are complete.
+            floor = closed[-1]["updated_at"]
+        latest = closed[0]["updated_at"] if closed else ""
+        latest = max(latest, mark[1] if mark else "") or since
+        self.store.set_watermark("pulls", floor, latest)
+        self._synced.add("pulls")
+
+    def get_pulls(self, state: str) -> list[dict[str, Any]]:
+        """Get pull requests in a state, most recently updated first."""
+        if self.store:
+            self._sync_pulls(self._get_window_start().strftime("%Y-%m-%d"))
+            return self.store.pulls(state)
+        endpoint = f"/repos/{self.repo}/pulls"
+        params = {"state": state, "sort": "updated", "direction": "desc"}
+        return self._get_paginated(endpoint, params)
 
+    @_collection
     def collect_dora_metrics(self) -> dict[str, Any]:
         """Collect DORA metrics from CD workflow runs."""
         cd_runs = self.get_workflow_runs("CD - Azure Web App")
@@ -101,11 +688,10 @@ class GitHubMetricsCollector:
             "mttr_hours": round(mttr_hours, 2) if mttr_hours else None,
         }
 
+    @_collection
     def collect_pr_metrics(self) -> dict[str, Any]:
         """Collect PR throughput and lead time metrics."""
-        endpoint = f"/repos/{self.repo}/pulls"
-        params = {"state": "closed", "sort": "updated", "direction": "desc"}
-        prs = self._get_paginated(endpoint, params)
+        prs = self.get_pulls("closed")
 
         window_start = self._get_window_start()
         merged_prs = [
@@ -128,14 +714,15 @@ class GitHubMetricsCollector:
 
         return {
             "pr_throughput": len(merged_prs),
-            "pr_lead_time_avg_hours": round(avg_lead_time, 2)
-            if avg_lead_time
-            else None,
+            "pr_lead_time_avg_hours": (
+                round(avg_lead_time, 2) if avg_lead_time else None
+            ),
             "pr_lead_time_median_hours": (
                 round(median_lead_time, 2) if median_lead_time else None
             ),
         }
 
+    @_collection
     def collect_ci_metrics(self) -> dict[str, Any]:
         """Collect CI workflow health metrics."""
         ci_runs = self.get_workflow_runs("CI")
@@ -159,6 +746,7 @@ class GitHubMetricsCollector:
             "ci_avg_duration_minutes": round(avg_duration, 2) if avg_duration else None,
         }
 
+    @_collection
     def collect_security_metrics(self) -> dict[str, Any]:
         """Collect security workflow metrics."""
         security_runs = self.get_workflow_runs("Security")
@@ -180,21 +768,19 @@ class GitHubMetricsCollector:
             "security_last_conclusion": last_conclusion,
         }
 
+    @_collection
     def collect_dependabot_metrics(self) -> dict[str, Any]:
         """Collect Dependabot PR metrics."""
-        endpoint = f"/repos/{self.repo}/pulls"
         window_start = self._get_window_start()
 
         # Open Dependabot PRs
-        open_prs = self._get_paginated(endpoint, {"state": "open"})
+        open_prs = self.get_pulls("open")
         dependabot_open = sum(
             1 for pr in open_prs if pr.get("user", {}).get("login") == "dependabot[bot]"
         )
 
         # Merged Dependabot PRs in window
-        closed_prs = self._get_paginated(
-            endpoint, {"state": "closed", "sort": "updated", "direction": "desc"}
-        )
+        closed_prs = self.get_pulls("closed")
         dependabot_merged = sum(
             1
             for pr in closed_prs
@@ -208,8 +794,10 @@ class GitHubMetricsCollector:
             "dependabot_prs_merged": dependabot_merged,
         }
 
+    @_collection
     def collect_deploy_duration_metrics(self) -> dict[str, Any]:
         """Collect average deploy duration."""
+        # The listing DORA metrics use; successful runs are picked out below.
         cd_runs = self.get_workflow_runs("CD - Azure Web App")
 
         durations: list[float] = []
@@ -231,9 +819,10 @@ class GitHubMetricsCollector:
             ),
         }
 
+    @_collection
     def collect_all_metrics(self) -> dict[str, Any]:
         """Collect all metrics."""
-        return {
+        metrics: dict[str, Any] = {
             "generated_at": datetime.now(UTC).isoformat(),
             "window_days": self.window_days,
             "repository": self.repo,
@@ -244,12 +833,32 @@ class GitHubMetricsCollector:
             "security": self.collect_security_metrics(),
             "dependabot": self.collect_dependabot_metrics(),
         }
+        metrics["api"] = {
+            "calls": self.api_calls,
+            "calls_saved": self.api_calls_saved,
+            "truncated_listings": self.truncated,
+        }
+        if self.http_cache:
+            self.http_cache.evict()
+            metrics["api"]["cache"] = self.http_cache.stats()
+        if self.store:
+            metrics["api"]["store"] = self.store.counts()
+        return metrics
+
+    def close(self) -> None:
+        """Close the HTTP connections and the local store."""
+        self.session.close()
+        if self.store:
+            self.store.close()
 
 
 def main() -> None:
     """Main entry point for metrics collection."""
     collector = GitHubMetricsCollector()
-    metrics = collector.collect_all_metrics()
+    try:
+        metrics = collector.collect_all_metrics()
+    finally:
+        collector.close()
 
     # Ensure site directory exists
     os.makedirs("site", exist_ok=True)
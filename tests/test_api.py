@@ -1,9 +1,20 @@
 """Integration tests for FastAPI endpoints."""
 
+import json
+import time
+from collections.abc import Iterator
+
+import cbor2
+import msgpack
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 
-from app.main import app
+from app.expression.parser import MAX_HEIGHT
+from app.jobs import JobQueue, MemoryJobStore
+from app.main import OPERATIONS, app, executor, metrics, settings
+from app.microbatch import MicroBatcher
+from app.result_cache import ResultCache
 
 
 @pytest.fixture
@@ -68,6 +79,15 @@ class TestMulEndpoint:
         assert response.status_code == 200
         assert response.json() == {"result": 20}
 
+    @pytest.mark.parametrize("accept", ["application/json", "application/msgpack"])
+    def test_mul_overflow_returns_400(self, client: TestClient, accept: str) -> None:
+        """Test that an infinite result is an error in every encoding."""
+        response = client.post(
+            "/mul", json={"a": 1e308, "b": 10}, headers={"Accept": accept}
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Result is not a finite number"}
+
 
 class TestDivEndpoint:
     """Test cases for /div endpoint."""
@@ -95,3 +115,849 @@ class TestDivEndpoint:
         response = client.post("/div", json={"a": 0, "b": 5})
         assert response.status_code == 200
         assert response.json() == {"result": 0}
+
+
+class TestNumericModes:
+    """Test cases for the decimal and fraction numeric modes."""
+
+    def test_decimal_mode_is_exact(self, client: TestClient) -> None:
+        """Test that decimal mode avoids binary rounding."""
+        response = client.post("/add", json={"a": "0.1", "b": "0.2", "mode": "decimal"})
+        assert response.status_code == 200
+        assert response.json() == {"result": "0.3"}
+
+    def test_decimal_precision_and_rounding(self, client: TestClient) -> None:
+        """Test a per-request decimal context."""
+        response = client.post(
+            "/div",
+            json={
+                "a": "2",
+                "b": "3",
+                "mode": "decimal",
+                "precision": 4,
+                "rounding": "ROUND_DOWN",
+            },
+        )
+        assert response.json() == {"result": "0.6666"}
+
+    def test_fraction_mode(self, client: TestClient) -> None:
+        """Test exact rational arithmetic."""
+        response = client.post(
+            "/sub", json={"a": "1/2", "b": "1/3", "mode": "fraction"}
+        )
+        assert response.json() == {"result": "1/6"}
+
+    def test_fraction_division_by_zero_returns_400(self, client: TestClient) -> None:
+        """Test that the zero check applies to every numeric mode."""
+        response = client.post("/div", json={"a": "1", "b": "0", "mode": "fraction"})
+        assert response.status_code == 400
+
+    def test_huge_exponent_returns_422(self, client: TestClient) -> None:
+        """Test that an operand too large to convert is rejected quickly."""
+        response = client.post(
+            "/add", json={"a": "1e30000000", "b": "1", "mode": "fraction"}
+        )
+        assert response.status_code == 422
+
+    def test_result_too_long_to_print_returns_400(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a result that cannot be converted to a string is a 400."""
+        monkeypatch.setattr("app.numeric.MAX_EXPONENT", 10_000)
+        response = client.post(
+            "/add", json={"a": "1e5000", "b": "1", "mode": "fraction"}
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Result has too many digits to return"}
+
+    def test_invalid_decimal_returns_422(self, client: TestClient) -> None:
+        """Test that malformed operands are rejected."""
+        response = client.post("/mul", json={"a": "one", "b": "2", "mode": "decimal"})
+        assert response.status_code == 422
+
+    def test_invalid_float_string_returns_422(self, client: TestClient) -> None:
+        """Test that non-numeric strings are rejected in float mode."""
+        response = client.post("/add", json={"a": "one", "b": 2})
+        assert response.status_code == 422
+
+
+class TestMicroBatching:
+    """Test cases for the arithmetic routes with micro-batching enabled."""
+
+    @pytest.fixture(autouse=True)
+    def batcher(self, monkeypatch: pytest.MonkeyPatch) -> MicroBatcher:
+        """Enable a micro-batcher for the duration of a test."""
+        batcher = MicroBatcher(window=0.001, max_size=8)
+        monkeypatch.setattr("app.main.batcher", batcher)
+        return batcher
+
+    def test_add_goes_through_batcher(
+        self, client: TestClient, batcher: MicroBatcher
+    ) -> None:
+        """Test that float requests are answered by the batcher."""
+        response = client.post("/add", json={"a": 5, "b": 3})
+        assert response.json() == {"result": 8}
+        assert batcher.stats()["items"] == 1
+
+    def test_div_by_zero_returns_400(self, client: TestClient) -> None:
+        """Test that batched division keeps the 400 response."""
+        response = client.post("/div", json={"a": 1, "b": 0})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Division by zero is not allowed"}
+
+    def test_decimal_mode_bypasses_batcher(
+        self, client: TestClient, batcher: MicroBatcher
+    ) -> None:
+        """Test that exact modes are computed directly."""
+        response = client.post("/add", json={"a": "0.1", "b": "0.2", "mode": "decimal"})
+        assert response.json() == {"result": "0.3"}
+        assert batcher.stats()["items"] == 0
+
+    def test_stats_report_batcher(self, client: TestClient) -> None:
+        """Test that batch metrics are exported."""
+        client.post("/mul", json={"a": 2, "b": 3})
+        stats = client.get("/stats").json()["microbatch"]
+        assert stats["batches"] == 1
+        assert stats["fill_ratio"] == 1 / 8
+
+
+class TestResultCaching:
+    """Test cases for routes that opted in to the result cache."""
+
+    @pytest.fixture(autouse=True)
+    def cache(self, monkeypatch: pytest.MonkeyPatch) -> ResultCache:
+        """Enable the result cache for /add, /div and /eval."""
+        cache = ResultCache()
+        monkeypatch.setattr("app.main.result_cache", cache)
+        monkeypatch.setattr(
+            settings, "result_cache_routes", frozenset({"add", "div", "eval"})
+        )
+        return cache
+
+    def test_commutative_requests_hit(
+        self, client: TestClient, cache: ResultCache
+    ) -> None:
+        """Test that b+a is served from the entry stored for a+b."""
+        assert client.post("/add", json={"a": 2, "b": 3}).json() == {"result": 5}
+        assert client.post("/add", json={"a": 3, "b": 2}).json() == {"result": 5}
+        assert cache.stats()["hits"] == 1
+
+    def test_numeric_mode_is_part_of_key(
+        self, client: TestClient, cache: ResultCache
+    ) -> None:
+        """Test that a decimal request does not reuse a float result."""
+        client.post("/add", json={"a": 0.1, "b": 0.2})
+        response = client.post("/add", json={"a": 0.1, "b": 0.2, "mode": "decimal"})
+        assert response.json() == {"result": "0.3"}
+        assert cache.stats()["hits"] == 0
+
+    def test_errors_are_not_cached(
+        self, client: TestClient, cache: ResultCache
+    ) -> None:
+        """Test that division by zero is not stored."""
+        for _ in range(2):
+            assert client.post("/div", json={"a": 1, "b": 0}).status_code == 400
+        assert len(cache) == 0
+
+    def test_routes_without_opt_in_skip_cache(
+        self, client: TestClient, cache: ResultCache
+    ) -> None:
+        """Test that only configured routes use the cache."""
+        client.post("/mul", json={"a": 2, "b": 3})
+        assert cache.stats()["misses"] == 0
+
+    def test_eval_is_cached(self, client: TestClient, cache: ResultCache) -> None:
+        """Test that repeated expressions are served from the cache."""
+        body = {"expression": "a/b", "variables": {"a": 1, "b": 4}}
+        client.post("/eval", json=body)
+        assert client.post("/eval", json=body).json() == {"result": 0.25}
+        assert client.get("/stats").json()["result_cache"]["hits"] == 1
+
+    def test_eval_spellings_share_an_entry(
+        self, client: TestClient, cache: ResultCache
+    ) -> None:
+        """Test that expressions differing only in whitespace hit one entry."""
+        client.post("/eval", json={"expression": "1+2"})
+        assert client.post("/eval", json={"expression": " 1 + 2 "}).json() == {
+            "result": 3
+        }
+        assert cache.stats()["hits"] == 1
+
+
+class TestContentNegotiation:
+    """Test cases for Accept-based response encodings."""
+
+    def test_json_by_default(self, client: TestClient) -> None:
+        """Test that responses are JSON without an Accept header."""
+        response = client.post("/add", json={"a": 1, "b": 2})
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["vary"] == "Accept"
+
+    def test_msgpack(self, client: TestClient) -> None:
+        """Test that MessagePack is returned when accepted."""
+        response = client.post(
+            "/add", json={"a": 1, "b": 2}, headers={"Accept": "application/msgpack"}
+        )
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == {"result": 3}
+
+    def test_cbor_batch(self, client: TestClient) -> None:
+        """Test that batch responses can be CBOR encoded."""
+        response = client.post(
+            "/batch",
+            json={"ops": ["mul", "div"], "a": [2, 1], "b": [3, 0]},
+            headers={"Accept": "application/cbor"},
+        )
+        assert response.headers["content-type"] == "application/cbor"
+        assert cbor2.loads(response.content) == {
+            "results": [6, None],
+            "errors": [None, "Division by zero is not allowed"],
+        }
+
+
+class TestBatchEndpoint:
+    """Test cases for /batch endpoint."""
+
+    def test_batch_items(self, client: TestClient) -> None:
+        """Test a batch given as a list of items."""
+        response = client.post(
+            "/batch",
+            json={
+                "items": [
+                    {"op": "add", "a": 1, "b": 2},
+                    {"op": "div", "a": 1, "b": 0},
+                    {"op": "mul", "a": 3, "b": 4},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        assert response.json() == {
+            "results": [3, None, 12],
+            "errors": [None, "Division by zero is not allowed", None],
+        }
+
+    def test_batch_overflow_is_an_error(self, client: TestClient) -> None:
+        """Test that an overflowing item has an error and no result."""
+        response = client.post(
+            "/batch", json={"items": [{"op": "mul", "a": 1e308, "b": 10}]}
+        )
+        assert response.json() == {
+            "results": [None],
+            "errors": ["Result is not a finite number"],
+        }
+
+    def test_worker_pools_stop_with_the_app(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the lifespan shuts the executor down on exit."""
+        monkeypatch.setattr(settings, "batch_inline_items", 0)
+        with TestClient(app) as client:
+            client.post("/batch", json={"ops": ["add"], "a": [1], "b": [2]})
+            assert executor._pools
+        assert not executor._pools
+
+    def test_batch_columns(self, client: TestClient) -> None:
+        """Test a batch given as ops, a and b columns."""
+        response = client.post(
+            "/batch", json={"ops": ["sub", "div"], "a": [5, 9], "b": [2, 3]}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"results": [3, 3], "errors": [None, None]}
+
+    def test_batch_mismatched_columns_returns_422(self, client: TestClient) -> None:
+        """Test that columns of different lengths are rejected."""
+        response = client.post("/batch", json={"ops": ["add"], "a": [1, 2], "b": [3]})
+        assert response.status_code == 422
+
+    def test_large_batch_runs_in_a_worker_thread(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that batches above the inline limit leave the event loop."""
+        monkeypatch.setattr(settings, "batch_inline_items", 1)
+        before = client.get("/stats").json()["executor"]["thread"]["completed"]
+        response = client.post(
+            "/batch", json={"ops": ["add", "mul"], "a": [1, 2], "b": [3, 4]}
+        )
+        assert response.json() == {"results": [4, 8], "errors": [None, None]}
+        after = client.get("/stats").json()["executor"]["thread"]["completed"]
+        assert after == before + 1
+
+    def test_batch_both_forms_returns_422(self, client: TestClient) -> None:
+        """Test that mixing items and columns is rejected."""
+        response = client.post(
+            "/batch",
+            json={"items": [], "ops": ["add"], "a": [1], "b": [2]},
+        )
+        assert response.status_code == 422
+
+
+class TestBatchBinaryEndpoint:
+    """Test cases for /batch/binary endpoint."""
+
+    headers = {"Content-Type": "application/octet-stream", "X-Operation": "add"}
+
+    def test_planar_body(self, client: TestClient) -> None:
+        """Test that a planar float64 body gives float64 results."""
+        body = np.array([1, 2, 10, 20], dtype="<f8").tobytes()
+        response = client.post("/batch/binary", content=body, headers=self.headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert np.frombuffer(response.content, dtype="<f8").tolist() == [11, 22]
+
+    def test_interleaved_body(self, client: TestClient) -> None:
+        """Test the interleaved operand layout."""
+        body = np.array([1, 10, 2, 20], dtype="<f8").tobytes()
+        response = client.post(
+            "/batch/binary",
+            content=body,
+            headers={**self.headers, "X-Operation": "sub", "X-Layout": "interleaved"},
+        )
+        assert np.frombuffer(response.content, dtype="<f8").tolist() == [-9, -18]
+
+    def test_division_by_zero_header(self, client: TestClient) -> None:
+        """Test that divisions by zero are counted in a header."""
+        body = np.array([1, 2, 0, 1], dtype="<f8").tobytes()
+        response = client.post(
+            "/batch/binary",
+            content=body,
+            headers={**self.headers, "X-Operation": "div"},
+        )
+        assert response.headers["x-division-by-zero"] == "1"
+        assert np.isnan(np.frombuffer(response.content, dtype="<f8")[0])
+
+    def test_malformed_body_returns_400(self, client: TestClient) -> None:
+        """Test that a body without whole operand pairs is rejected."""
+        response = client.post("/batch/binary", content=bytes(12), headers=self.headers)
+        assert response.status_code == 400
+
+    def test_unknown_operation_returns_400(self, client: TestClient) -> None:
+        """Test that an unknown operation is rejected."""
+        response = client.post(
+            "/batch/binary",
+            content=bytes(16),
+            headers={**self.headers, "X-Operation": "pow"},
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Unsupported operation"}
+
+    def test_json_body_returns_415(self, client: TestClient) -> None:
+        """Test that only octet-stream bodies are accepted."""
+        response = client.post(
+            "/batch/binary", json=[1, 2], headers={"X-Operation": "add"}
+        )
+        assert response.status_code == 415
+
+
+class TestBatchArrowEndpoint:
+    """Test cases for /batch/arrow endpoint."""
+
+    def test_arrow_round_trip(self, client: TestClient) -> None:
+        """Test that an Arrow stream of operations gives an Arrow stream back."""
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({"op": ["add", "div", "mul"], "a": [1, 1, 3], "b": [2, 0, 4]})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=2)
+        response = client.post(
+            "/batch/arrow",
+            content=sink.getvalue().to_pybytes(),
+            headers={"Content-Type": "application/vnd.apache.arrow.stream"},
+        )
+        assert response.status_code == 200
+        results = pa.ipc.open_stream(response.content).read_all()
+        assert results.column("result").to_pylist() == [3, None, 12]
+        assert results.column("error").to_pylist() == [
+            None,
+            "Division by zero is not allowed",
+            None,
+        ]
+
+    def test_invalid_stream_returns_400(self, client: TestClient) -> None:
+        """Test that a body that is not an Arrow stream is rejected."""
+        pytest.importorskip("pyarrow")
+        response = client.post("/batch/arrow", content=b"not arrow")
+        assert response.status_code == 400
+
+    def test_truncated_stream_returns_400(self, client: TestClient) -> None:
+        """Test that a stream cut off in its first record batch is rejected."""
+        pa = pytest.importorskip("pyarrow")
+        table = pa.table({"op": ["add"] * 100, "a": range(100), "b": [1] * 100})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        data = sink.getvalue().to_pybytes()
+        response = client.post("/batch/arrow", content=data[: len(data) * 2 // 3])
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Invalid Arrow stream")
+
+    def test_without_pyarrow_returns_501(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that the endpoint reports missing Arrow support."""
+        monkeypatch.setattr("app.main.ARROW_AVAILABLE", False)
+        response = client.post("/batch/arrow", content=b"")
+        assert response.status_code == 501
+
+
+class TestEvalEndpoint:
+    """Test cases for /eval endpoint."""
+
+    def test_eval_expression(self, client: TestClient) -> None:
+        """Test evaluation of an expression with a variable."""
+        response = client.post(
+            "/eval", json={"expression": "3*(4+5)/2-x", "variables": {"x": 1.5}}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"result": 12}
+
+    def test_eval_syntax_error_returns_400(self, client: TestClient) -> None:
+        """Test that a malformed expression returns HTTP 400."""
+        response = client.post("/eval", json={"expression": "3*"})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Unexpected end of expression"}
+
+    def test_eval_undefined_variable_returns_400(self, client: TestClient) -> None:
+        """Test that a missing variable returns HTTP 400."""
+        response = client.post("/eval", json={"expression": "x+1"})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Undefined variable: x"}
+
+    def test_eval_division_by_zero_returns_400(self, client: TestClient) -> None:
+        """Test that dividing by zero returns HTTP 400."""
+        response = client.post("/eval", json={"expression": "1/0"})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Division by zero is not allowed"}
+
+    def test_eval_overflow_returns_400(self, client: TestClient) -> None:
+        """Test that an infinite result returns HTTP 400 instead of null."""
+        response = client.post("/eval", json={"expression": "1e308*10"})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Result is not a finite number"}
+
+    @pytest.mark.parametrize(
+        ("expression", "result"),
+        [
+            ("x" + "+1" * (MAX_HEIGHT - 1), MAX_HEIGHT),
+            ("x" + "*y" * (MAX_HEIGHT - 1), 1),
+        ],
+        ids=["sum", "product"],
+    )
+    def test_eval_tallest_expression(
+        self, client: TestClient, expression: str, result: float
+    ) -> None:
+        """Test that an expression of exactly MAX_HEIGHT levels is evaluated."""
+        response = client.post(
+            "/eval", json={"expression": expression, "variables": {"x": 1, "y": 1}}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"result": result}
+
+
+class TestEvalOffload:
+    """Test cases for expressions large enough to leave the event loop."""
+
+    def test_large_expression_runs_through_singleflight(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that large expressions are evaluated via the singleflight layer."""
+        monkeypatch.setattr(settings, "eval_inline_operations", 1)
+        before = client.get("/stats").json()["singleflight"]["executions"]
+        response = client.post(
+            "/eval", json={"expression": "x*x + x", "variables": {"x": 3}}
+        )
+        assert response.json() == {"result": 12}
+        after = client.get("/stats").json()["singleflight"]["executions"]
+        assert after == before + 1
+
+    def test_offloaded_errors_return_400(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that errors raised in the worker keep their status code."""
+        monkeypatch.setattr(settings, "eval_inline_operations", 0)
+        response = client.post(
+            "/eval", json={"expression": "1/(x-x)", "variables": {"x": 1}}
+        )
+        assert response.status_code == 400
+
+
+class TestEvalGridEndpoint:
+    """Test cases for /eval/grid endpoint."""
+
+    def test_grid_streams_chunks(self, client: TestClient) -> None:
+        """Test that results arrive as one NDJSON line per chunk."""
+        response = client.post(
+            "/eval/grid",
+            json={
+                "expression": "a/b",
+                "variables": {"a": [1, 2, 3], "b": [1, 0, 2]},
+                "chunk_size": 2,
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines == [
+            {"offset": 0, "results": [1, None]},
+            {"offset": 2, "results": [1.5]},
+        ]
+
+    def test_grid_encodes_non_finite_results(self, client: TestClient) -> None:
+        """Test that overflow and NaN are told apart from division by zero."""
+        response = client.post(
+            "/eval/grid",
+            json={
+                "expression": "a*b/c",
+                "variables": {
+                    "a": [1e308, -1e308, 0],
+                    "b": [10, 10, 1],
+                    "c": [1, 1, 0],
+                },
+            },
+        )
+        assert response.text == (
+            '{"offset": 0, "results": ["Infinity", "-Infinity", null]}\n'
+        )
+
+    def test_grid_missing_variable_returns_400(self, client: TestClient) -> None:
+        """Test that a variable without a column returns HTTP 400."""
+        response = client.post(
+            "/eval/grid", json={"expression": "a+b", "variables": {"a": [1]}}
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Undefined variable: b"}
+
+    def test_grid_mismatched_columns_returns_400(self, client: TestClient) -> None:
+        """Test that columns of different lengths return HTTP 400."""
+        response = client.post(
+            "/eval/grid",
+            json={"expression": "a+b", "variables": {"a": [1], "b": [1, 2]}},
+        )
+        assert response.status_code == 400
+
+
+class TestEvalExplainEndpoint:
+    """Test cases for /eval/explain endpoint."""
+
+    def test_explain_shows_optimized_form(self, client: TestClient) -> None:
+        """Test that the debug view shows the folded expression."""
+        response = client.post("/eval/explain", json={"expression": "x * (2 - 1)"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["source"] == "x * ( 2 - 1 )"
+        assert body["optimized"] == "x"
+        assert "def _expression(v0):" in body["code"]
+
+    def test_explain_syntax_error_returns_400(self, client: TestClient) -> None:
+        """Test that a malformed expression returns HTTP 400."""
+        response = client.post("/eval/explain", json={"expression": "("})
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["x" + "+1" * (MAX_HEIGHT - 1), "x" + "*y" * (MAX_HEIGHT - 1)],
+        ids=["sum", "product"],
+    )
+    def test_explain_tallest_expression(
+        self, client: TestClient, expression: str
+    ) -> None:
+        """Test that an expression of exactly MAX_HEIGHT levels is explained."""
+        response = client.post("/eval/explain", json={"expression": expression})
+        assert response.status_code == 200
+        assert response.json()["optimized"].count("(") == MAX_HEIGHT - 2
+
+
+class TestStatsEndpoint:
+    """Test cases for /stats endpoint."""
+
+    def test_stats_reports_expression_cache(self, client: TestClient) -> None:
+        """Test that expression cache lookups are counted."""
+        before = client.get("/stats").json()["expression_cache"]
+        client.post("/eval", json={"expression": "40 + 2"})
+        client.post("/eval", json={"expression": "40+2"})
+        after = client.get("/stats").json()["expression_cache"]
+        assert after["hits"] + after["misses"] == before["hits"] + before["misses"] + 2
+        assert after["hits"] >= before["hits"] + 1
+
+
+class TestMetricsEndpoint:
+    """Test cases for /metrics endpoint."""
+
+    def test_metrics_count_requests_by_route_and_status(
+        self, client: TestClient
+    ) -> None:
+        """Test that request latencies are recorded per route template."""
+        client.post("/add", json={"a": 1, "b": 2})
+        client.get("/jobs/unknown")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            'http_request_duration_seconds_count{method="POST",route="/add",'
+            'status="200"}'
+        ) in response.text
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/jobs/{job_id}",status="404"}'
+        ) in response.text
+
+    def test_metrics_count_operations_and_division_by_zero(
+        self, client: TestClient
+    ) -> None:
+        """Test that operations and divisions by zero are counted."""
+        before_ops = metrics.operations.value("div")
+        before_errors = metrics.division_by_zero.value("/div")
+        client.post("/div", json={"a": 1, "b": 0})
+        client.post("/div", json={"a": 1, "b": 2})
+        client.post("/batch", json={"ops": ["div"], "a": [1], "b": [0]})
+        assert metrics.operations.value("div") == before_ops + 2
+        assert metrics.division_by_zero.value("/div") == before_errors + 1
+        assert 'calculator_division_by_zero_total{route="/batch"}' in (
+            client.get("/metrics").text
+        )
+
+    def test_metrics_include_event_loop_lag(self) -> None:
+        """Test that the loop monitor runs while the app is serving."""
+        with TestClient(app) as client:
+            time.sleep(0.2)
+            text = client.get("/metrics").text
+        assert "event_loop_lag_seconds_count " in text
+        assert "# TYPE event_loop_slow_callbacks_total counter" in text
+
+    def test_metrics_openmetrics(self, client: TestClient) -> None:
+        """Test that OpenMetrics is served when asked for."""
+        response = client.get(
+            "/metrics", headers={"Accept": "application/openmetrics-text"}
+        )
+        assert response.headers["content-type"].startswith(
+            "application/openmetrics-text"
+        )
+        assert response.text.endswith("# EOF\n")
+
+
+class TestProfileEndpoint:
+    """Test cases for /debug/profile endpoint."""
+
+    @pytest.fixture
+    def token(self, monkeypatch: pytest.MonkeyPatch) -> str:
+        """Enable the profiler with a token."""
+        monkeypatch.setattr(settings, "profiler_enabled", True)
+        monkeypatch.setattr(settings, "profiler_token", "secret")
+        return "secret"
+
+    def test_disabled_by_default(self, client: TestClient) -> None:
+        """Test that the endpoint does not exist unless enabled."""
+        response = client.get("/debug/profile", params={"seconds": 0.01})
+        assert response.status_code == 404
+
+    def test_wrong_token_returns_401(self, client: TestClient, token: str) -> None:
+        """Test that the bearer token is required."""
+        response = client.get(
+            "/debug/profile",
+            params={"seconds": 0.01},
+            headers={"Authorization": "Bearer wrong"},
+        )
+        assert response.status_code == 401
+
+    def test_collapsed_stacks(self, client: TestClient, token: str) -> None:
+        """Test that the event loop thread shows up in collapsed stacks."""
+        response = client.get(
+            "/debug/profile",
+            params={"seconds": 0.05, "interval": 0.005},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "run_forever" in response.text
+
+    def test_speedscope(self, client: TestClient, token: str) -> None:
+        """Test the speedscope JSON format."""
+        response = client.get(
+            "/debug/profile",
+            params={"seconds": 0.02, "format": "speedscope"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200
+        document = response.json()
+        assert document["$schema"].startswith("https://www.speedscope.app/")
+        assert document["profiles"]
+
+
+class TestJobsEndpoint:
+    """Test cases for /jobs endpoints."""
+
+    def test_batch_job(self, client: TestClient) -> None:
+        """Test that a batch job returns what /batch would."""
+        response = client.post(
+            "/jobs",
+            json={"kind": "batch", "params": {"ops": ["add"], "a": [1], "b": [2]}},
+        )
+        assert response.status_code == 202
+        job = response.json()
+        assert job["kind"] == "batch"
+        result = client.get(f"/jobs/{job['id']}/result", params={"wait": 5})
+        assert result.status_code == 200
+        assert result.json() == {"results": [3], "errors": [None]}
+        status = client.get(f"/jobs/{job['id']}").json()
+        assert status["status"] == "succeeded"
+        assert status["progress"] == 1.0
+
+    def test_grid_job_returns_ndjson(self, client: TestClient) -> None:
+        """Test that a grid job returns the chunks /eval/grid would."""
+        response = client.post(
+            "/jobs",
+            json={
+                "kind": "grid",
+                "params": {
+                    "expression": "a / b",
+                    "variables": {"a": [1, 2, 3], "b": [1, 0, 3]},
+                    "chunk_size": 2,
+                },
+            },
+        )
+        result = client.get(f"/jobs/{response.json()['id']}/result?wait=5")
+        assert result.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in result.text.splitlines()]
+        assert lines == [
+            {"offset": 0, "results": [1, None]},
+            {"offset": 2, "results": [1]},
+        ]
+
+    def test_failed_job_returns_409(self, client: TestClient) -> None:
+        """Test that the error of a failed job is reported."""
+        response = client.post(
+            "/jobs",
+            json={
+                "kind": "eval",
+                "params": {"expression": "1 / x", "variables": {"x": 0}},
+            },
+        )
+        result = client.get(f"/jobs/{response.json()['id']}/result?wait=5")
+        assert result.status_code == 409
+        assert result.json() == {
+            "detail": "Job failed: Division by zero is not allowed"
+        }
+
+    def test_overflowing_eval_job_fails(self, client: TestClient) -> None:
+        """Test that an eval job with an infinite result fails."""
+        response = client.post(
+            "/jobs", json={"kind": "eval", "params": {"expression": "1e308*10"}}
+        )
+        result = client.get(f"/jobs/{response.json()['id']}/result?wait=5")
+        assert result.status_code == 409
+        assert result.json() == {"detail": "Job failed: Result is not a finite number"}
+
+    def test_invalid_expression_is_rejected_on_submit(self, client: TestClient) -> None:
+        """Test that a job whose expression does not parse is not queued."""
+        response = client.post(
+            "/jobs", json={"kind": "eval", "params": {"expression": "1 +"}}
+        )
+        assert response.status_code == 400
+
+    def test_unknown_kind_returns_422(self, client: TestClient) -> None:
+        """Test that only known job kinds are accepted."""
+        response = client.post("/jobs", json={"kind": "pow", "params": {}})
+        assert response.status_code == 422
+
+    def test_unknown_job_returns_404(self, client: TestClient) -> None:
+        """Test that unknown job ids are reported as not found."""
+        assert client.get("/jobs/missing").status_code == 404
+        assert client.get("/jobs/missing/result").status_code == 404
+
+    def test_full_queue_returns_503(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that submissions beyond the pending limit are refused."""
+        monkeypatch.setattr(
+            "app.main.jobs", JobQueue(MemoryJobStore(), workers=1, max_pending=0)
+        )
+        response = client.post(
+            "/jobs", json={"kind": "eval", "params": {"expression": "1"}}
+        )
+        assert response.status_code == 503
+
+
+class TestStreamEndpoint:
+    """Test cases for /stream endpoint."""
+
+    def test_stream_evaluates_ndjson(self, client: TestClient) -> None:
+        """Test that a streamed body is answered line by line."""
+
+        def body() -> Iterator[bytes]:
+            yield b'{"op": "add", "a": 1, "b": 2, "id": 1}\n'
+            yield b'{"op": "div", "a": 1, "b": 0, "id": 2}\n'
+
+        response = client.post(
+            "/stream",
+            content=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == [
+            {"id": 1, "result": 3},
+            {"id": 2, "error": "Division by zero is not allowed"},
+        ]
+
+
+class TestWebSocketSession:
+    """Test cases for /ws endpoint."""
+
+    def test_operations_and_expressions(self, client: TestClient) -> None:
+        """Test that replies carry the id of their request."""
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"id": 1, "op": "add", "a": 2, "b": 3})
+            ws.send_json(
+                {"id": 2, "expression": "a*b/100", "variables": {"a": 50, "b": 8}}
+            )
+            ws.send_json({"id": 3, "op": "div", "a": "1", "b": "3", "mode": "fraction"})
+            replies = {
+                reply["id"]: reply for reply in (ws.receive_json() for _ in range(3))
+            }
+        assert replies == {
+            1: {"id": 1, "result": 5},
+            2: {"id": 2, "result": 4},
+            3: {"id": 3, "result": "1/3"},
+        }
+
+    def test_errors_are_reported_per_message(self, client: TestClient) -> None:
+        """Test that a failing message does not close the session."""
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"id": "z", "op": "div", "a": 1, "b": 0})
+            assert ws.receive_json() == {
+                "id": "z",
+                "error": "Division by zero is not allowed",
+            }
+            ws.send_json({"id": "m", "op": "mul", "a": 1})
+            assert ws.receive_json() == {"id": "m", "error": "b: Field required"}
+            ws.send_json({"id": "p", "op": "pow", "a": 1, "b": 1})
+            assert "error" in ws.receive_json()
+            ws.send_text("not json")
+            assert ws.receive_json() == {"id": None, "error": "Invalid JSON"}
+            ws.send_text("[" * 5000 + "]" * 5000)
+            assert ws.receive_json() == {"id": None, "error": "Invalid JSON"}
+            ws.send_bytes(b'{"id": "b", "op": "add", "a": 1, "b": 1}')
+            assert ws.receive_json() == {
+                "id": None,
+                "error": "Expected a text message",
+            }
+            ws.send_json({"id": "ok", "op": "sub", "a": 3, "b": 1})
+            assert ws.receive_json() == {"id": "ok", "result": 2}
+
+    def test_unexpected_errors_are_answered(
+        self,
+        client: TestClient,
+        monkeypatch: pytest.MonkeyPatch,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """Test that an unexpected exception still gets a reply for its id."""
+
+        def overflow(a: float, b: float) -> float:
+            raise OverflowError("math range error")
+
+        monkeypatch.setitem(OPERATIONS, "add", overflow)
+        with client.websocket_connect("/ws") as ws:
+            ws.send_json({"id": 7, "op": "add", "a": 1, "b": 2})
+            assert ws.receive_json() == {"id": 7, "error": "Internal error"}
+            ws.send_json({"id": 8, "op": "sub", "a": 3, "b": 1})
+            assert ws.receive_json() == {"id": 8, "result": 2}
+        assert "OverflowError" in caplog.text
@@ -0,0 +1,117 @@
+"""Unit tests for batch evaluation of Arrow IPC streams."""
+
+import io
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from app.arrow import (  # noqa: E402
+    evaluate_batches,
+    evaluate_record_batch,
+    open_batches,
+)
+
+
+def ipc_stream(table: "pa.Table", max_chunksize: int | None = None) -> bytes:
+    """Encode a table as an Arrow IPC stream."""
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=max_chunksize):
+            writer.write_batch(batch)
+    return sink.getvalue()
+
+
+class TestOpenBatches:
+    """Test cases for open_batches function."""
+
+    def test_missing_column_raises(self) -> None:
+        """Test that a stream without the operand columns is rejected."""
+        stream = ipc_stream(pa.table({"op": ["add"], "a": [1.0]}))
+        with pytest.raises(ValueError, match="Missing column: b"):
+            open_batches(stream)
+
+    def test_non_numeric_operand_raises(self) -> None:
+        """Test that string operands are rejected."""
+        stream = ipc_stream(pa.table({"op": ["add"], "a": ["1"], "b": [2.0]}))
+        with pytest.raises(ValueError, match="must be numeric"):
+            open_batches(stream)
+
+    def test_invalid_stream_raises(self) -> None:
+        """Test that bytes that are not Arrow IPC are rejected."""
+        with pytest.raises(ValueError, match="Invalid Arrow stream"):
+            open_batches(b"not arrow at all")
+
+
+class TestEvaluateRecordBatch:
+    """Test cases for evaluate_record_batch function."""
+
+    def test_mixed_operations(self) -> None:
+        """Test that each row is dispatched to its own operation."""
+        batch = pa.record_batch(
+            {"op": ["add", "sub", "mul", "div"], "a": [6] * 4, "b": [3.0] * 4}
+        )
+        results = evaluate_record_batch(batch)
+        assert results.column("result").to_pylist() == [9, 3, 18, 2]
+        assert results.column("error").null_count == 4
+
+    def test_errors_are_per_row(self) -> None:
+        """Test that failing rows get an error and a null result."""
+        batch = pa.record_batch(
+            {
+                "op": ["div", "pow", None, "mul"],
+                "a": [1.0, 2.0, 3.0, 1e308],
+                "b": [0.0, 1.0, 1.0, 10.0],
+            }
+        )
+        results = evaluate_record_batch(batch)
+        assert results.column("result").to_pylist() == [None] * 4
+        assert results.column("error").to_pylist() == [
+            "Division by zero is not allowed",
+            "Unsupported operation",
+            "Unsupported operation",
+            "Result is not a finite number",
+        ]
+
+    def test_dictionary_encoded_ops_and_id(self) -> None:
+        """Test dictionary-encoded operations and the id passthrough."""
+        ops = pa.array(["mul", "mul", "add"]).dictionary_encode()
+        batch = pa.record_batch(
+            {"id": ["x", "y", "z"], "op": ops, "a": [2, 3, 4], "b": [5, 6, 7]}
+        )
+        results = evaluate_record_batch(batch)
+        assert results.schema.names == ["id", "result", "error"]
+        assert results.column("id").to_pylist() == ["x", "y", "z"]
+        assert results.column("result").to_pylist() == [10, 18, 11]
+
+
+class TestEvaluateBatches:
+    """Test cases for evaluate_batches function."""
+
+    def test_one_output_batch_per_input_batch(self) -> None:
+        """Test that record batches are evaluated one at a time."""
+        table = pa.table({"op": ["add"] * 5, "a": range(5), "b": [1.0] * 5})
+        reader = open_batches(ipc_stream(table, max_chunksize=2))
+        output = pa.ipc.open_stream(b"".join(evaluate_batches(reader)))
+        batches = list(output)
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        assert pa.Table.from_batches(batches).column("result").to_pylist() == [
+            1,
+            2,
+            3,
+            4,
+            5,
+        ]
+
+    def test_empty_stream(self) -> None:
+        """Test that a stream without batches gives a stream without batches."""
+        table = pa.table(
+            {
+                "op": pa.array([], pa.string()),
+                "a": pa.array([], pa.float64()),
+                "b": pa.array([], pa.float64()),
+            }
+        )
+        reader = open_batches(ipc_stream(table))
+        output = pa.ipc.open_stream(b"".join(evaluate_batches(reader)))
+        assert output.read_all().num_rows == 0
@@ -0,0 +1,71 @@
+"""Unit tests for vectorized batch evaluation."""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.batch import evaluate_batch, evaluate_coded
+
+
+class TestEvaluateBatch:
+    """Test cases for evaluate_batch function."""
+
+    def test_mixed_operations(self) -> None:
+        """Test that each item is dispatched to its own operation."""
+        batch = evaluate_batch(["add", "sub", "mul", "div"], [6, 6, 6, 6], [3] * 4)
+        assert batch.values() == [9, 3, 18, 2]
+        assert batch.errors() == [None] * 4
+
+    def test_single_operation(self) -> None:
+        """Test a batch where every item uses the same operation."""
+        batch = evaluate_batch(["mul"] * 3, [1, 2, 3], [4, 5, 6])
+        assert batch.values() == [4, 10, 18]
+
+    def test_division_by_zero_is_per_item(self) -> None:
+        """Test that a zero divisor fails only its own item."""
+        batch = evaluate_batch(["div", "add", "div"], [1, 1, 8], [0, 0, 2])
+        assert batch.values() == [None, 1, 4]
+        assert batch.errors() == ["Division by zero is not allowed", None, None]
+        assert math.isnan(batch.results[0])
+
+    def test_unsupported_operation(self) -> None:
+        """Test that unknown operations are reported per item."""
+        batch = evaluate_batch(["pow", "add"], [2, 2], [3, 3])
+        assert batch.values() == [None, 5]
+        assert batch.errors() == ["Unsupported operation", None]
+
+    def test_overflow_is_an_error(self) -> None:
+        """Test that infinite results are reported as errors, not values."""
+        batch = evaluate_batch(["mul", "add"], [1e308, 1], [10, 1])
+        assert batch.values() == [None, 2]
+        assert batch.errors() == ["Result is not a finite number", None]
+
+    def test_empty_batch(self) -> None:
+        """Test that an empty batch yields empty results."""
+        batch = evaluate_batch([], [], [])
+        assert batch.values() == []
+        assert batch.errors() == []
+
+    def test_length_mismatch_raises(self) -> None:
+        """Test that columns of different lengths are rejected."""
+        with pytest.raises(ValueError):
+            evaluate_batch(["add"], [1, 2], [3, 4])
+
+
+class TestEvaluateCoded:
+    """Test cases for evaluate_coded function."""
+
+    def test_codes_index_into_names(self) -> None:
+        """Test that each item uses the operation its code points to."""
+        batch = evaluate_coded(["mul", "add"], np.array([0, 1, 0]), [2, 3, 4], [5] * 3)
+        assert batch.values() == [10, 8, 20]
+
+    def test_unmatched_codes_are_unsupported(self) -> None:
+        """Test that unknown names and out-of-range codes fail their item."""
+        batch = evaluate_coded(["pow", "add"], np.array([0, 1, -1]), [1] * 3, [1] * 3)
+        assert batch.errors() == [
+            "Unsupported operation",
+            None,
+            "Unsupported operation",
+        ]
@@ -0,0 +1,66 @@
+"""Unit tests for batch evaluation of raw float64 buffers."""
+
+import numpy as np
+import pytest
+
+from app.binary import FLOAT64, evaluate_binary, split_operands
+
+
+class TestSplitOperands:
+    """Test cases for split_operands function."""
+
+    def test_planar_layout(self) -> None:
+        """Test that the first half holds a and the second half b."""
+        a, b = split_operands(np.array([1, 2, 3, 4], dtype=FLOAT64).tobytes())
+        assert a.tolist() == [1, 2]
+        assert b.tolist() == [3, 4]
+
+    def test_interleaved_layout(self) -> None:
+        """Test that a and b alternate in the interleaved layout."""
+        buffer = np.array([1, 2, 3, 4], dtype=FLOAT64).tobytes()
+        a, b = split_operands(buffer, "interleaved")
+        assert a.tolist() == [1, 3]
+        assert b.tolist() == [2, 4]
+
+    def test_operands_are_views_of_the_buffer(self) -> None:
+        """Test that the operands share memory with the buffer."""
+        buffer = bytearray(np.array([1, 2], dtype=FLOAT64).tobytes())
+        a, b = split_operands(memoryview(buffer))
+        buffer[:8] = np.array([5], dtype=FLOAT64).tobytes()
+        assert a[0] == 5
+
+    @pytest.mark.parametrize("size", [4, 8, 24])
+    def test_odd_value_count_raises(self, size: int) -> None:
+        """Test that a buffer without whole a/b pairs is rejected."""
+        with pytest.raises(ValueError):
+            split_operands(bytes(size))
+
+
+class TestEvaluateBinary:
+    """Test cases for evaluate_binary function."""
+
+    def test_results_are_float64_bytes(self) -> None:
+        """Test that results come back as little-endian float64 values."""
+        buffer = np.array([6, 8, 3, 2], dtype=FLOAT64).tobytes()
+        results, division_by_zero = evaluate_binary("mul", buffer)
+        assert np.frombuffer(results, dtype=FLOAT64).tolist() == [18, 16]
+        assert division_by_zero == 0
+
+    def test_division_by_zero_gives_nan(self) -> None:
+        """Test that zero divisors give NaN and are counted."""
+        buffer = np.array([1, 8, 0, 2], dtype=FLOAT64).tobytes()
+        results, division_by_zero = evaluate_binary("div", buffer)
+        values = np.frombuffer(results, dtype=FLOAT64)
+        assert np.isnan(values[0])
+        assert values[1] == 4
+        assert division_by_zero == 1
+
+    def test_empty_buffer(self) -> None:
+        """Test that an empty buffer gives an empty result."""
+        results, _ = evaluate_binary("add", b"")
+        assert len(results) == 0
+
+    def test_unknown_operation_raises(self) -> None:
+        """Test that an unknown operation is rejected."""
+        with pytest.raises(ValueError, match="Unsupported operation"):
+            evaluate_binary("pow", bytes(16))
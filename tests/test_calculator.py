@@ -1,8 +1,22 @@
 """Unit tests for calculator business logic."""
 
+import math
+
+import numpy as np
 import pytest
 
-from app.calculator import DivisionByZeroError, add, divide, multiply, subtract
+from app.calculator import (
+    DivisionByZeroError,
+    add,
+    add_many,
+    divide,
+    divide_many,
+    multiply,
+    multiply_many,
+    subtract,
+    subtract_many,
+    zero_divisor_mask,
+)
 
 
 class TestAdd:
@@ -105,3 +119,55 @@ class TestDivide:
     def test_divide_zero_by_number(self) -> None:
         """Test division of zero by a number."""
         assert divide(0, 5) == 0
+
+
+class TestVectorized:
+    """Test cases for the element-wise batch kernels."""
+
+    def test_add_many_sequences(self) -> None:
+        """Test element-wise addition of plain lists."""
+        assert add_many([1, 2, 3], [4, 5, 6]).tolist() == [5, 7, 9]
+
+    def test_subtract_many_arrays(self) -> None:
+        """Test element-wise subtraction of NumPy arrays."""
+        result = subtract_many(np.array([5.0, 0.0]), np.array([3.0, 2.5]))
+        assert result.tolist() == [2.0, -2.5]
+
+    def test_multiply_many_broadcasts_scalar(self) -> None:
+        """Test that a scalar operand is applied to every element."""
+        assert multiply_many([1, 2, 3], 2).tolist() == [2, 4, 6]
+
+    def test_kernels_match_scalar_functions(self) -> None:
+        """Test that batch kernels agree with their scalar counterparts."""
+        a = [7.5, -2.0, 0.1]
+        b = [2.5, 4.0, 0.2]
+        assert add_many(a, b).tolist() == [add(x, y) for x, y in zip(a, b, strict=True)]
+        assert divide_many(a, b).tolist() == [
+            divide(x, y) for x, y in zip(a, b, strict=True)
+        ]
+
+    def test_mismatched_shapes_raise_value_error(self) -> None:
+        """Test that operands of different lengths are rejected."""
+        with pytest.raises(ValueError):
+            add_many([1, 2, 3], [1, 2])
+
+    def test_divide_many_zero_gives_nan(self) -> None:
+        """Test that zero divisors produce NaN instead of raising."""
+        result = divide_many([10, 10, 0], [2, 0, 5])
+        assert result[0] == 5
+        assert math.isnan(result[1])
+        assert result[2] == 0
+
+    def test_divide_many_raise_policy(self) -> None:
+        """Test that the raise policy mirrors divide()."""
+        with pytest.raises(DivisionByZeroError):
+            divide_many([1, 2], [1, 0], on_zero="raise")
+
+    def test_zero_divisor_mask(self) -> None:
+        """Test that the mask flags only zero divisors."""
+        assert zero_divisor_mask([1, 0, -0.0, 2]).tolist() == [
+            False,
+            True,
+            True,
+            False,
+        ]
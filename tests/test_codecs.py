@@ -0,0 +1,58 @@
+"""Unit tests for response content negotiation."""
+
+import math
+
+import pytest
+
+from app.codecs import CBOR, JSON, MSGPACK, encode_json, negotiate
+
+
+class TestNegotiate:
+    """Test cases for negotiate function."""
+
+    @pytest.mark.parametrize("accept", [None, "", "*/*", "application/json"])
+    def test_default_is_json(self, accept: str | None) -> None:
+        """Test that JSON is used when the client has no preference."""
+        assert negotiate(accept) == JSON
+
+    @pytest.mark.parametrize(
+        ("accept", "expected"),
+        [
+            ("application/msgpack", MSGPACK),
+            ("application/x-msgpack", MSGPACK),
+            ("application/cbor", CBOR),
+            ("Application/CBOR", CBOR),
+        ],
+    )
+    def test_binary_types(self, accept: str, expected: str) -> None:
+        """Test that the binary codecs are chosen when requested."""
+        assert negotiate(accept) == expected
+
+    def test_highest_quality_wins(self) -> None:
+        """Test that q-values rank the acceptable types."""
+        accept = "application/json;q=0.5, application/cbor;q=0.9, */*;q=0.1"
+        assert negotiate(accept) == CBOR
+
+    def test_first_entry_wins_ties(self) -> None:
+        """Test that equal qualities keep the client's order."""
+        assert negotiate("application/msgpack, application/cbor") == MSGPACK
+
+    def test_unsupported_types_fall_back_to_json(self) -> None:
+        """Test that a header without supported types still gets JSON."""
+        assert negotiate("text/html, application/xml") == JSON
+
+    def test_zero_quality_is_not_acceptable(self) -> None:
+        """Test that q=0 rules a type out."""
+        assert negotiate("application/cbor;q=0") == JSON
+
+
+class TestEncodeJson:
+    """Test cases for encode_json function."""
+
+    def test_compact_output(self) -> None:
+        """Test that JSON is encoded without whitespace."""
+        assert encode_json({"result": 3.0}) == b'{"result":3.0}'
+
+    def test_non_finite_floats_become_null(self) -> None:
+        """Test that NaN and infinity are encoded as null."""
+        assert encode_json([math.nan, math.inf]) == b"[null,null]"
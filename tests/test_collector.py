@@ -0,0 +1,574 @@
+"""Unit tests for the GitHub metrics collector."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from metrics.main import MAX_PAGES, DiskCache, GitHubMetricsCollector
+
+API = "https://api.test"
+REPO = "octo/calculator"
+
+
+class FakeSession:
+    """Stand-in for requests.Session serving paginated listings from memory.
+
+    Listings map an API path to the key wrapping its items (None for a bare
+    list) and the items, newest first. Requests are recorded as (path, query)
+    pairs.
+    """
+
+    def __init__(
+        self,
+        listings: dict[str, tuple[str | None, list[dict[str, Any]]]],
+        links: str = "last",
+    ) -> None:
+        self.listings = listings
+        self.links = links
+        self.requests: list[tuple[str, dict[str, str]]] = []
+        self.lock = threading.Lock()
+
+    def get(
+        self, url: str, headers: dict[str, str] | None = None, timeout: float = 0
+    ) -> requests.Response:
+        parsed = urlparse(url)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        with self.lock:
+            self.requests.append((parsed.path, query))
+        if parsed.path not in self.listings:
+            return response(url, 404, b"{}")
+        key, items = self.listings[parsed.path]
+        items = [item for item in items if matches(item, query)]
+
+        per_page = int(query.get("per_page", "30"))
+        page = int(query.get("page", "1"))
+        last = max((len(items) + per_page - 1) // per_page, 1)
+        page_items = items[(page - 1) * per_page :][:per_page]
+        body = json.dumps({key: page_items} if key else page_items).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return response(url, 304, b"", {"ETag": etag})
+
+        base = f"{API}{parsed.path}?per_page={per_page}"
+        links = []
+        if page < last:
+            links.append(f'<{base}&page={page + 1}>; rel="next"')
+        if self.links == "last":
+            links.append(f'<{base}&page={last}>; rel="last"')
+        elif self.links == "last-without-page":
+            links.append(f'<{base}&after=cursor>; rel="last"')
+        return response(url, 200, body, {"ETag": etag, "Link": ", ".join(links)})
+
+    def paths(self) -> list[str]:
+        """Return the paths requested so far."""
+        return [path for path, _ in self.requests]
+
+    def close(self) -> None:
+        pass
+
+
+def matches(item: dict[str, Any], query: dict[str, str]) -> bool:
+    """Apply the server-side filters the collector uses."""
+    created = query.get("created", ">=").removeprefix(">=")
+    status = query.get("status")
+    state = query.get("state", "all")
+    return (
+        item.get("created_at", "") >= created
+        and status in (None, item.get("status"), item.get("conclusion"))
+        and state in ("all", item.get("state"))
+    )
+
+
+def response(
+    url: str, status: int, body: bytes, headers: dict[str, str] | None = None
+) -> requests.Response:
+    """Build a requests.Response."""
+    result = requests.Response()
+    result.url = url
+    result.status_code = status
+    result._content = body
+    result.headers = CaseInsensitiveDict(headers or {})
+    result.encoding = "utf-8"
+    return result
+
+
+def numbered(count: int) -> list[dict[str, Any]]:
+    """Return count pull requests, newest first."""
+    return [
+        {"number": count - i, "state": "closed", "created_at": "2026-01-01T00:00:00Z"}
+        for i in range(count)
+    ]
+
+
+def stamp(hours_ago: float) -> str:
+    """Return a GitHub timestamp the given number of hours ago."""
+    moment = datetime.now(UTC) - timedelta(hours=hours_ago)
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def workflow_runs(workflow_id: int, count: int) -> list[dict[str, Any]]:
+    """Return count runs of a workflow, one a day, newest first."""
+    return [
+        {
+            "id": workflow_id * 1000 + i,
+            "workflow_id": workflow_id,
+            "status": "completed",
+            "conclusion": "failure" if i % 4 == 3 else "success",
+            "created_at": stamp(24 * i + 1),
+            "run_started_at": stamp(24 * i + 1),
+            "updated_at": stamp(24 * i + 0.5),
+        }
+        for i in range(count)
+    ]
+
+
+def actions(runs: dict[str, int]) -> dict[str, tuple[str | None, list[Any]]]:
+    """Return workflow and per-workflow run listings for {name: run count}."""
+    prefix = f"/repos/{REPO}/actions/workflows"
+    workflows: list[dict[str, Any]] = [
+        {"id": i, "name": name} for i, name in enumerate(runs, start=1)
+    ]
+    listings: dict[str, tuple[str | None, list[Any]]] = {
+        prefix: ("workflows", workflows)
+    }
+    for workflow in workflows:
+        listings[f"{prefix}/{workflow['id']}/runs"] = (
+            "workflow_runs",
+            workflow_runs(workflow["id"], runs[workflow["name"]]),
+        )
+    return listings
+
+
+def pull(
+    number: int, state: str, hours_ago: float, author: str = "dev"
+) -> dict[str, Any]:
+    """Return a pull request last updated the given number of hours ago."""
+    return {
+        "number": number,
+        "state": state,
+        "user": {"login": author},
+        "created_at": stamp(hours_ago + 24),
+        "merged_at": stamp(hours_ago) if state == "closed" else None,
+        "updated_at": stamp(hours_ago),
+    }
+
+
+def pulls_listing(*pulls: dict[str, Any]) -> dict[str, tuple[str | None, list[Any]]]:
+    """Return a pull request listing, most recently updated first."""
+    ordered = sorted(pulls, key=lambda pull: pull["updated_at"], reverse=True)
+    return {f"/repos/{REPO}/pulls": (None, ordered)}
+
+
+@pytest.fixture
+def api(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Point collectors at the fake API, without token, cache or store."""
+    for name in ("GITHUB_TOKEN", "METRICS_CACHE_DIR", "METRICS_STORE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("GITHUB_API_URL", API)
+    monkeypatch.setenv("GITHUB_REPOSITORY", REPO)
+    monkeypatch.setenv("METRICS_WINDOW_DAYS", "30")
+
+
+@pytest.fixture
+def collector(api: None) -> GitHubMetricsCollector:
+    """Create a collector against an empty fake API."""
+    collector = GitHubMetricsCollector()
+    collector.session = FakeSession({})  # type: ignore[assignment]
+    return collector
+
+
+def cached(
+    monkeypatch: pytest.MonkeyPatch, cache_dir: Path, token: str
+) -> GitHubMetricsCollector:
+    """Create a collector with an on-disk HTTP cache."""
+    monkeypatch.setenv("METRICS_CACHE_DIR", str(cache_dir))
+    monkeypatch.setenv("GITHUB_TOKEN", token)
+    return GitHubMetricsCollector()
+
+
+def stored(
+    monkeypatch: pytest.MonkeyPatch, path: Path, days: int = 30
+) -> GitHubMetricsCollector:
+    """Create a collector syncing into a local store."""
+    monkeypatch.setenv("METRICS_STORE_PATH", str(path))
+    monkeypatch.setenv("METRICS_WINDOW_DAYS", str(days))
+    return GitHubMetricsCollector()
+
+
+def serve(
+    collector: GitHubMetricsCollector,
+    listings: dict[str, tuple[str | None, list[dict[str, Any]]]],
+    links: str = "last",
+) -> FakeSession:
+    """Point the collector at a fake API with the given listings."""
+    session = FakeSession(listings, links)
+    collector.session = session  # type: ignore[assignment]
+    return session
+
+
+class TestPagination:
+    """Test cases for paginated listings."""
+
+    @pytest.mark.parametrize("links", ["last", "next", "last-without-page"])
+    def test_all_pages_are_joined_in_order(
+        self, collector: GitHubMetricsCollector, links: str
+    ) -> None:
+        """Test that every page is fetched, whatever the Link header offers."""
+        path = f"/repos/{REPO}/pulls"
+        session = serve(collector, {path: (None, numbered(250))}, links)
+        pulls = collector._get_paginated(path)
+        assert [pull["number"] for pull in pulls] == list(range(250, 0, -1))
+        assert len(session.requests) == 3
+        assert collector.truncated == []
+
+    @pytest.mark.parametrize("links", ["last", "next"])
+    def test_long_listings_are_truncated(
+        self, collector: GitHubMetricsCollector, links: str
+    ) -> None:
+        """Test that listings beyond max_pages are cut short and recorded."""
+        path = f"/repos/{REPO}/pulls"
+        session = serve(collector, {path: (None, numbered(250))}, links)
+        assert len(collector._get_paginated(path, max_pages=2)) == 200
+        assert len(session.requests) == 2
+        assert collector.truncated == [path]
+
+    def test_wrapped_items(self, collector: GitHubMetricsCollector) -> None:
+        """Test that items wrapped in an object are unwrapped."""
+        path = f"/repos/{REPO}/actions/workflows"
+        serve(collector, {path: ("workflows", [{"id": 1, "name": "CI"}])})
+        assert collector._get_paginated(path, items_key="workflows") == [
+            {"id": 1, "name": "CI"}
+        ]
+
+
+class TestResponseMemo:
+    """Test cases for sharing responses within a collection."""
+
+    def test_responses_are_shared_within_a_collection(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that one collection requests each endpoint once."""
+        path = f"/repos/{REPO}/pulls"
+        session = serve(collector, {path: (None, numbered(3))})
+        with collector.collection():
+            collector._get(path)
+            collector._get(path)
+        assert len(session.requests) == 1
+        assert collector.api_calls_saved == 1
+
+    def test_responses_are_dropped_after_a_collection(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that each public collect call fetches fresh responses."""
+        path = f"/repos/{REPO}/pulls"
+        session = serve(collector, {path: (None, numbered(3))})
+        collector.collect_pr_metrics()
+        collector.collect_pr_metrics()
+        assert session.paths() == [path, path]
+        assert collector._responses == {}
+
+    def test_requests_outside_a_collection_are_not_kept(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that direct calls do not grow the memo."""
+        path = f"/repos/{REPO}/pulls"
+        session = serve(collector, {path: (None, numbered(3))})
+        collector.get_pulls("closed")
+        collector.get_pulls("closed")
+        assert len(session.requests) == 2
+        assert collector._responses == {}
+
+    def test_nested_collections_share_responses(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that collect calls inside a collection reuse its responses."""
+        path = f"/repos/{REPO}/pulls"
+        session = serve(collector, {path: (None, numbered(3))})
+        with collector.collection():
+            collector.collect_pr_metrics()
+            collector.collect_dependabot_metrics()
+        assert session.paths().count(path) == 2  # "closed" and "open"
+
+
+class TestWorkflowRuns:
+    """Test cases for listing runs per workflow."""
+
+    def test_runs_are_listed_per_workflow_within_the_window(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that only the named workflow is listed, from the window start."""
+        session = serve(collector, actions({"CI": 40, "Lint": 5}))
+        runs = collector.get_workflow_runs("ci")
+        path, query = session.requests[-1]
+        assert path == f"/repos/{REPO}/actions/workflows/1/runs"
+        window_start = query["created"].removeprefix(">=")
+        assert 30 <= len(runs) < 40
+        assert all(run["created_at"] >= window_start for run in runs)
+        assert {run["workflow_id"] for run in runs} == {1}
+
+    def test_unknown_workflow_has_no_runs(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that a workflow missing from the repository gives no runs."""
+        session = serve(collector, actions({"CI": 3}))
+        assert collector.get_workflow_runs("Security") == []
+        assert session.paths() == [f"/repos/{REPO}/actions/workflows"]
+
+    def test_workflows_are_resolved_once(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that workflow names are resolved to ids with one listing."""
+        session = serve(collector, actions({"CI": 3, "Security": 3}))
+        collector.get_workflow_runs("CI")
+        collector.get_workflow_runs("Security")
+        assert session.paths().count(f"/repos/{REPO}/actions/workflows") == 1
+
+    def test_cd_runs_are_listed_once_per_collection(
+        self, collector: GitHubMetricsCollector
+    ) -> None:
+        """Test that DORA and deploy duration metrics share one CD listing."""
+        listings = actions({"CD - Azure Web App": 8, "CI": 3, "Security": 3})
+        listings[f"/repos/{REPO}/pulls"] = (None, [])
+        session = serve(collector, listings)
+        metrics = collector.collect_all_metrics()
+        cd = f"/repos/{REPO}/actions/workflows/1/runs"
+        assert session.paths().count(cd) == 1
+        assert metrics["dora"]["deployments_total"] == 8
+        assert metrics["dora"]["deployments_failed"] == 2
+        assert metrics["deploy_health"]["deploy_avg_duration_minutes"] == 30
+
+
+class TestDiskCache:
+    """Test cases for the on-disk HTTP cache."""
+
+    def test_unchanged_responses_are_revalidated(
+        self,
+        api: None,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        """Test that a later collection is answered with 304s from the cache."""
+        path = f"/repos/{REPO}/pulls"
+        listings: dict[str, tuple[str | None, list[Any]]] = {path: (None, numbered(3))}
+        first = cached(monkeypatch, tmp_path, "one")
+        serve(first, listings)
+        assert len(first.get_pulls("closed")) == 3
+        second = cached(monkeypatch, tmp_path, "one")
+        serve(second, listings)
+        assert len(second.get_pulls("closed")) == 3
+        assert second.http_cache is not None
+        assert second.http_cache.not_modified == 1
+
+    def test_entries_are_not_shared_between_tokens(
+        self,
+        api: None,
+        monkeypatch: pytest.MonkeyPatch,
+        tmp_path: Path,
+    ) -> None:
+        """Test that a collector with another token does not reuse responses."""
+        path = f"/repos/{REPO}/pulls"
+        listings: dict[str, tuple[str | None, list[Any]]] = {path: (None, numbered(3))}
+        first = cached(monkeypatch, tmp_path, "one")
+        serve(first, listings)
+        first.get_pulls("closed")
+        other = cached(monkeypatch, tmp_path, "two")
+        serve(other, listings)
+        other.get_pulls("closed")
+        assert other.http_cache is not None
+        assert other.http_cache.not_modified == 0
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+    def test_revalidation_refreshes_entries_atomically(self, tmp_path: Path) -> None:
+        """Test that a 304 refreshes the entry without leaving temporary files."""
+        cache = DiskCache(str(tmp_path), max_age=60, max_bytes=1 << 20)
+        url = f"{API}/repos/{REPO}/pulls"
+        cache.put(url, response(url, 200, b"[1]", {"ETag": '"a"'}))
+        entry = cache.get(url)
+        assert entry is not None
+        entry["stored_at"] = 0
+        assert cache.revalidated(url, entry).json() == [1]
+        refreshed = cache.get(url)
+        assert refreshed is not None
+        assert refreshed["stored_at"] > 0
+        assert [path.suffix for path in tmp_path.iterdir()] == [".json"]
+
+    def test_eviction_removes_stale_temporary_files(self, tmp_path: Path) -> None:
+        """Test that temporary files left by interrupted writes are evicted."""
+        cache = DiskCache(str(tmp_path), max_age=3600, max_bytes=1 << 20)
+        stale, fresh = tmp_path / "a.1.tmp", tmp_path / "b.1.tmp"
+        stale.write_text("{")
+        fresh.write_text("{")
+        old = time.time() - 600
+        os.utime(stale, (old, old))
+        cache.evict()
+        assert not stale.exists()
+        assert fresh.exists()
+
+    def test_oldest_entries_are_evicted_over_the_cap(self, tmp_path: Path) -> None:
+        """Test that entries beyond max_bytes are evicted oldest first."""
+        cache = DiskCache(str(tmp_path), max_age=3600, max_bytes=300)
+        urls = [f"{API}/repos/{REPO}/pulls/{number}" for number in range(3)]
+        for age, url in zip((30, 20, 10), urls, strict=True):
+            cache.put(url, response(url, 200, b"x" * 100, {"ETag": '"a"'}))
+            stamp = time.time() - age
+            os.utime(cache._path(url), (stamp, stamp))
+        cache.evict()
+        assert cache.get(urls[0]) is None
+        assert cache.get(urls[2]) is not None
+
+
+class TestIncrementalSync:
+    """Test cases for syncing into a local store."""
+
+    def test_old_open_pulls_are_stored(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that open pull requests are kept however long ago they changed."""
+        collector = stored(monkeypatch, tmp_path / "metrics.db")
+        serve(
+            collector,
+            pulls_listing(
+                pull(2, "closed", 1, "dependabot[bot]"),
+                pull(1, "open", 24 * 100, "dependabot[bot]"),
+            ),
+        )
+        assert collector.collect_dependabot_metrics() == {
+            "dependabot_prs_open": 1,
+            "dependabot_prs_merged": 1,
+        }
+        collector.close()
+
+    def test_closed_pulls_leave_the_open_set(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that a pull request closed since the last sync is no longer open."""
+        first = stored(monkeypatch, tmp_path / "metrics.db")
+        serve(first, pulls_listing(pull(1, "open", 48), pull(2, "open", 24)))
+        assert len(first.get_pulls("open")) == 2
+        first.close()
+        second = stored(monkeypatch, tmp_path / "metrics.db")
+        serve(second, pulls_listing(pull(1, "closed", 1), pull(2, "open", 24)))
+        assert [pr["number"] for pr in second.get_pulls("open")] == [2]
+        assert [pr["number"] for pr in second.get_pulls("closed")] == [1]
+        second.close()
+
+    def test_later_syncs_start_before_the_watermark(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that runs are fetched again from the watermark minus the overlap."""
+        listings = actions({"CI": 5})
+        first = stored(monkeypatch, tmp_path / "metrics.db")
+        serve(first, listings)
+        assert len(first.get_workflow_runs("CI")) == 5
+        first.close()
+        second = stored(monkeypatch, tmp_path / "metrics.db")
+        session = serve(second, listings)
+        assert len(second.get_workflow_runs("CI")) == 5
+        assert second.store is not None
+        mark = second.store.watermark("runs:1")
+        assert mark is not None
+        latest = datetime.fromisoformat(mark[1].replace("Z", "+00:00"))
+        since = (latest - timedelta(hours=6)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        assert session.requests[-1][1]["created"] == f">={since}"
+        second.close()
+
+    def test_unfinished_runs_are_fetched_again(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that a run finished after the overlap gets its final conclusion."""
+        listings = actions({"CI": 5})
+        runs = listings[f"/repos/{REPO}/actions/workflows/1/runs"][1]
+        runs[2].update(status="in_progress", conclusion=None)
+        first = stored(monkeypatch, tmp_path / "metrics.db")
+        serve(first, listings)
+        failed = first.get_workflow_runs("CI", "failure")
+        assert [run["id"] for run in failed] == [runs[3]["id"]]
+        first.close()
+        runs[2].update(status="completed", conclusion="failure")
+        second = stored(monkeypatch, tmp_path / "metrics.db")
+        session = serve(second, listings)
+        failed = second.get_workflow_runs("CI", "failure")
+        assert sorted(run["id"] for run in failed) == [runs[2]["id"], runs[3]["id"]]
+        assert session.requests[-1][1]["created"] == f">={runs[2]['created_at']}"
+        second.close()
+
+    def test_a_longer_window_is_backfilled(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that widening the window fetches runs from the new start."""
+        listings = actions({"CI": 20})
+        first = stored(monkeypatch, tmp_path / "metrics.db", days=7)
+        serve(first, listings)
+        assert len(first.get_workflow_runs("CI")) < 10
+        first.close()
+        second = stored(monkeypatch, tmp_path / "metrics.db", days=30)
+        session = serve(second, listings)
+        assert len(second.get_workflow_runs("CI")) == 20
+        window_start = second._get_window_start().strftime("%Y-%m-%d")
+        assert session.requests[-1][1]["created"] == f">={window_start}"
+        assert second.store is not None
+        assert second.store.watermark("runs:1") == (
+            window_start,
+            listings[f"/repos/{REPO}/actions/workflows/1/runs"][1][0]["created_at"],
+        )
+        second.close()
+
+    def test_closed_pulls_are_fetched_back_to_the_watermark(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that a later sync stops at the first page past the watermark."""
+        listings = pulls_listing(*(pull(i, "closed", i) for i in range(250)))
+        first = stored(monkeypatch, tmp_path / "metrics.db")
+        session = serve(first, listings)
+        first.get_pulls("closed")
+        closed = [query for _, query in session.requests if query["state"] == "closed"]
+        assert len(closed) == 3
+        first.close()
+        second = stored(monkeypatch, tmp_path / "metrics.db")
+        session = serve(second, listings)
+        assert len(second.get_pulls("closed")) == 250
+        closed = [query for _, query in session.requests if query["state"] == "closed"]
+        assert len(closed) == 1
+        second.close()
+
+    def test_closed_pulls_stop_at_the_page_limit(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that the closed walk is bounded by MAX_PAGES and recorded."""
+        count = MAX_PAGES * 100 + 50
+        listings = pulls_listing(*(pull(i, "closed", i / 60) for i in range(count)))
+        collector = stored(monkeypatch, tmp_path / "metrics.db")
+        session = serve(collector, listings)
+        assert len(collector.get_pulls("closed")) == MAX_PAGES * 100
+        closed = [query for _, query in session.requests if query["state"] == "closed"]
+        assert len(closed) == MAX_PAGES
+        assert collector.truncated == [f"/repos/{REPO}/pulls"]
+        assert collector.store is not None
+        mark = collector.store.watermark("pulls")
+        assert mark is not None
+        assert (
+            mark[0]
+            == listings[f"/repos/{REPO}/pulls"][1][MAX_PAGES * 100 - 1]["updated_at"]
+        )
+        collector.close()
+
+    def test_close_closes_the_store(
+        self, api: None, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        """Test that closing the collector closes its store."""
+        collector = stored(monkeypatch, tmp_path / "metrics.db")
+        collector.close()
+        assert collector.store is not None
+        with pytest.raises(sqlite3.ProgrammingError):
+            collector.store.counts()
@@ -0,0 +1,126 @@
+"""Unit tests for cost-based offloading of operations."""
+
+import asyncio
+import os
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from app.calculator import DivisionByZeroError
+from app.executor import Cost, Executor
+from app.expression import compile_expression
+
+# Pure-Python work that holds the GIL for a noticeable time.
+HEAVY = range(5_000_000)
+
+
+@pytest.fixture
+def executor() -> Iterator[Executor]:
+    """Create an executor with a thread pool only."""
+    executor = Executor(threads=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture
+def process_executor() -> Iterator[Executor]:
+    """Create an executor with a process pool."""
+    executor = Executor(threads=2, processes=2)
+    yield executor
+    executor.shutdown()
+
+
+async def max_loop_lag(work: "asyncio.Future[object]") -> float:
+    """Return the longest the event loop was blocked while work ran."""
+    loop = asyncio.get_running_loop()
+    lag = 0.0
+    while not work.done():
+        start = loop.time()
+        await asyncio.sleep(0.005)
+        lag = max(lag, loop.time() - start - 0.005)
+    await work
+    return lag
+
+
+class TestExecutor:
+    """Test cases for Executor."""
+
+    def test_inline_runs_on_the_event_loop_thread(self, executor: Executor) -> None:
+        """Test that INLINE work is called directly."""
+        thread = asyncio.run(executor.run(Cost.INLINE, threading.get_ident))
+        assert thread == threading.get_ident()
+        assert executor.stats()["thread"]["submitted"] == 0
+
+    def test_thread_work_runs_in_a_worker_thread(self, executor: Executor) -> None:
+        """Test that THREAD work leaves the event loop thread and is counted."""
+        thread = asyncio.run(executor.run(Cost.THREAD, threading.get_ident))
+        assert thread != threading.get_ident()
+        stats = executor.stats()["thread"]
+        assert stats["submitted"] == stats["completed"] == 1
+        assert stats["running"] == stats["queued"] == 0
+
+    def test_process_work_falls_back_to_threads(self, executor: Executor) -> None:
+        """Test that PROCESS work uses threads when no process pool exists."""
+        pid = asyncio.run(executor.run(Cost.PROCESS, os.getpid))
+        assert pid == os.getpid()
+        assert executor.stats()["thread"]["completed"] == 1
+        assert "process" not in executor.stats()
+
+    def test_exceptions_propagate(self, executor: Executor) -> None:
+        """Test that a failing call raises in the caller and is counted."""
+        compiled = compile_expression("1 / x")
+        with pytest.raises(DivisionByZeroError):
+            asyncio.run(executor.run(Cost.THREAD, compiled.evaluate, {"x": 0}))
+        assert executor.stats()["thread"]["failed"] == 1
+
+    def test_pools_restart_after_shutdown(self, executor: Executor) -> None:
+        """Test that work submitted after shutdown starts a new pool."""
+        first = asyncio.run(executor.run(Cost.THREAD, threading.get_ident))
+        executor.shutdown()
+        second = asyncio.run(executor.run(Cost.THREAD, threading.get_ident))
+        assert first != threading.get_ident() != second
+        assert executor.stats()["thread"]["completed"] == 2
+
+
+class TestProcessPool:
+    """Test cases for the process pool of Executor."""
+
+    def test_process_work_runs_in_a_worker_process(
+        self, process_executor: Executor
+    ) -> None:
+        """Test that PROCESS work runs in another process."""
+        pid = asyncio.run(process_executor.run(Cost.PROCESS, os.getpid))
+        assert pid != os.getpid()
+        assert process_executor.stats()["process"]["completed"] == 1
+
+    def test_compiled_expressions_cross_processes(
+        self, process_executor: Executor
+    ) -> None:
+        """Test that a compiled expression is evaluated in a worker process."""
+        compiled = compile_expression("x * (y + 1)")
+        result = asyncio.run(
+            process_executor.run(Cost.PROCESS, compiled.evaluate, {"x": 2, "y": 3})
+        )
+        assert result == 8
+        with pytest.raises(DivisionByZeroError):
+            asyncio.run(
+                process_executor.run(
+                    Cost.PROCESS, compile_expression("1 / x").evaluate, {"x": 0}
+                )
+            )
+
+    def test_event_loop_stays_responsive_under_load(
+        self, process_executor: Executor
+    ) -> None:
+        """Test that CPU-heavy work in the pool does not block the event loop."""
+
+        async def scenario(cost: Cost) -> float:
+            work = asyncio.gather(
+                *(process_executor.run(cost, sum, HEAVY) for _ in range(4))
+            )
+            return await max_loop_lag(work)
+
+        asyncio.run(process_executor.run(Cost.PROCESS, os.getpid))  # Warm up.
+        assert asyncio.run(scenario(Cost.PROCESS)) < 0.1
+        assert asyncio.run(scenario(Cost.INLINE)) > 0.2
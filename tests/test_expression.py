@@ -0,0 +1,206 @@
+"""Unit tests for the expression engine."""
+
+import math
+
+import numpy as np
+import pytest
+
+from app.calculator import DivisionByZeroError
+from app.expression import (
+    ExpressionCache,
+    ExpressionSyntaxError,
+    UndefinedVariableError,
+    compile_expression,
+    optimize,
+    parse,
+)
+from app.expression.grid import evaluate_grid
+from app.expression.parser import MAX_DEPTH, BinaryOp, Number, Variable, normalize
+
+
+class TestParser:
+    """Test cases for the expression parser."""
+
+    def test_precedence(self) -> None:
+        """Test that multiplication binds tighter than addition."""
+        assert parse("1+2*x") == BinaryOp(
+            "+", Number(1.0), BinaryOp("*", Number(2.0), Variable("x"))
+        )
+
+    def test_left_associativity(self) -> None:
+        """Test that subtraction associates to the left."""
+        assert str(parse("8-4-2")) == "(8.0 - 4.0) - 2.0"
+
+    def test_normalize_ignores_whitespace(self) -> None:
+        """Test that spacing does not change the normalized form."""
+        assert normalize("3*(4+5)") == normalize(" 3 * ( 4 + 5 ) ")
+
+    def test_normalize_keeps_token_boundaries(self) -> None:
+        """Test that whitespace between numbers is not collapsed."""
+        assert normalize("1 2") != normalize("12")
+
+    @pytest.mark.parametrize("source", ["", "1+", "(1", "1)", "2**3", "x y", "1 $ 2"])
+    def test_invalid_expressions(self, source: str) -> None:
+        """Test that malformed expressions raise a syntax error."""
+        with pytest.raises(ExpressionSyntaxError):
+            parse(source)
+
+    def test_nesting_limit(self) -> None:
+        """Test that very deep nesting is rejected instead of overflowing."""
+        with pytest.raises(ExpressionSyntaxError):
+            parse("(" * (MAX_DEPTH + 1) + "1" + ")" * (MAX_DEPTH + 1))
+
+
+class TestCompiler:
+    """Test cases for compiled expressions."""
+
+    def test_evaluate_constant_expression(self) -> None:
+        """Test an expression without variables."""
+        assert compile_expression("3*(4+5)/2").evaluate() == 13.5
+
+    def test_evaluate_with_variables(self) -> None:
+        """Test an expression with variables."""
+        compiled = compile_expression("3*(4+5)/2-x")
+        assert compiled.variables == ("x",)
+        assert compiled.evaluate({"x": 3.5}) == 10
+
+    def test_unary_minus(self) -> None:
+        """Test negation of sub-expressions."""
+        assert compile_expression("-(2+3)*-2").evaluate() == 10
+
+    def test_long_chain(self) -> None:
+        """Test that long flat chains compile without nesting calls."""
+        assert compile_expression("+".join(["1"] * 250)).evaluate() == 250
+
+    def test_undefined_variable(self) -> None:
+        """Test that a missing variable raises a dedicated error."""
+        with pytest.raises(UndefinedVariableError):
+            compile_expression("x+y").evaluate({"x": 1})
+
+    def test_division_by_zero(self) -> None:
+        """Test that the divide primitive's zero check is preserved."""
+        with pytest.raises(DivisionByZeroError):
+            compile_expression("1/(x-x)").evaluate({"x": 2})
+
+
+class TestOptimizer:
+    """Test cases for the optimization pass."""
+
+    def test_constant_folding(self) -> None:
+        """Test that constant subexpressions are evaluated once at compile time."""
+        assert optimize(parse("3*(4+5)/2")) == Number(13.5)
+
+    @pytest.mark.parametrize("source", ["x*1", "1*x", "x+0", "0+x", "x-0", "x/1"])
+    def test_identities(self, source: str) -> None:
+        """Test that neutral operands are removed."""
+        assert optimize(parse(source)) == Variable("x")
+
+    def test_identity_after_folding(self) -> None:
+        """Test that folded constants feed into identity simplification."""
+        assert optimize(parse("x*(3-2)+(4-4)")) == Variable("x")
+
+    def test_multiplication_by_zero_is_kept(self) -> None:
+        """Test that x*0 is not simplified, as x may be infinite."""
+        assert str(optimize(parse("x*0"))) == "x * 0.0"
+
+    def test_constant_division_by_zero_is_not_folded(self) -> None:
+        """Test that a constant zero divisor still raises at evaluation."""
+        compiled = compile_expression("x + 1/0")
+        assert str(compiled.optimized) == "x + (1.0 / 0.0)"
+        with pytest.raises(DivisionByZeroError):
+            compiled.evaluate({"x": 1})
+
+    def test_common_subexpressions_are_shared(self) -> None:
+        """Test that repeated subterms are computed once."""
+        compiled = compile_expression("(a*b) + (a*b)*2 + (b*a)")
+        assert compiled.code.count("_mul(v0, v1)") == 1
+        assert compiled.evaluate({"a": 2, "b": 3}) == 24
+
+    def test_removed_variable_must_still_be_bound(self) -> None:
+        """Test that variables are taken from the source, not the optimized tree."""
+        compiled = compile_expression("x*1")
+        with pytest.raises(UndefinedVariableError):
+            compiled.evaluate({})
+
+
+class TestExpressionCache:
+    """Test cases for the compiled-expression LRU cache."""
+
+    def test_hits_share_normalized_source(self) -> None:
+        """Test that differently spaced sources hit the same entry."""
+        cache = ExpressionCache(maxsize=4)
+        first = cache.get("a*b + 1")
+        second = cache.get("a * b+1")
+        assert first is second
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Test that the oldest unused entry is evicted first."""
+        cache = ExpressionCache(maxsize=2)
+        cache.get("1")
+        cache.get("2")
+        cache.get("1")
+        cache.get("3")
+        assert len(cache) == 2
+        assert cache.stats()["evictions"] == 1
+        cache.get("1")
+        assert cache.stats()["hits"] == 2
+
+    def test_syntax_errors_are_not_cached(self) -> None:
+        """Test that invalid expressions do not occupy cache slots."""
+        cache = ExpressionCache()
+        with pytest.raises(ExpressionSyntaxError):
+            cache.get("1+")
+        assert len(cache) == 0
+
+
+class TestGridEvaluation:
+    """Test cases for chunked grid evaluation."""
+
+    def test_matches_scalar_evaluation(self) -> None:
+        """Test that every row equals the scalar result."""
+        compiled = compile_expression("(a*b) + (a*b)/c - 1")
+        a, b, c = np.arange(1, 11.0), np.linspace(0.5, 5, 10), np.arange(2, 12.0)
+        chunks = list(evaluate_grid(compiled, {"a": a, "b": b, "c": c}, chunk_size=4))
+        assert [offset for offset, _, _ in chunks] == [0, 4, 8]
+        assert [len(values) for _, values, _ in chunks] == [4, 4, 2]
+        results = np.concatenate([values for _, values, _ in chunks])
+        expected = [
+            compiled.evaluate({"a": x, "b": y, "c": z})
+            for x, y, z in zip(a, b, c, strict=True)
+        ]
+        assert results.tolist() == pytest.approx(expected)
+
+    def test_division_by_zero_rows_are_nan(self) -> None:
+        """Test that only the rows dividing by zero become NaN."""
+        compiled = compile_expression("1/x")
+        ((_, results, division_by_zero),) = evaluate_grid(compiled, {"x": [2, 0, 4]})
+        assert results[0] == 0.5
+        assert math.isnan(results[1])
+        assert results[2] == 0.25
+        assert division_by_zero.tolist() == [False, True, False]
+
+    def test_nested_division_by_zero_is_flagged(self) -> None:
+        """Test that NaN inputs are not mistaken for divisions by zero."""
+        compiled = compile_expression("x + 1/(y - 1)")
+        ((_, results, division_by_zero),) = evaluate_grid(
+            compiled, {"x": [math.nan, 0], "y": [2, 1]}
+        )
+        assert math.isnan(results[0]) and math.isnan(results[1])
+        assert division_by_zero.tolist() == [False, True]
+
+    def test_constant_expression_is_broadcast(self) -> None:
+        """Test that an expression without variables fills every row."""
+        ((_, results, _),) = evaluate_grid(compile_expression("2+3"), {"x": [0, 0, 0]})
+        assert results.tolist() == [5, 5, 5]
+
+    def test_missing_column(self) -> None:
+        """Test that a variable without a column is reported eagerly."""
+        with pytest.raises(UndefinedVariableError):
+            evaluate_grid(compile_expression("x+y"), {"x": [1]})
+
+    def test_mismatched_columns(self) -> None:
+        """Test that columns of different lengths are rejected."""
+        with pytest.raises(ValueError):
+            evaluate_grid(compile_expression("x+y"), {"x": [1], "y": [1, 2]})
@@ -0,0 +1,148 @@
+"""Tests for the raw ASGI fast path of the arithmetic routes."""
+
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.types import Receive, Scope, Send
+
+from app.fastpath import FastPathMiddleware, parse_operands
+from app.main import OPERATIONS, app
+
+
+class CountingApp:
+    """ASGI wrapper counting the requests that reach the full app."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            self.calls += 1
+        await app(scope, receive, send)
+
+
+@pytest.fixture
+def inner() -> CountingApp:
+    """Create the app behind the fast path."""
+    return CountingApp()
+
+
+@pytest.fixture
+def fast_client(inner: CountingApp) -> TestClient:
+    """Create a test client with the fast path in front of the app."""
+    return TestClient(FastPathMiddleware(inner, operations=OPERATIONS))
+
+
+class TestParseOperands:
+    """Test cases for parse_operands function."""
+
+    @pytest.mark.parametrize(
+        ("body", "expected"),
+        [
+            (b'{"a": 1, "b": 2.5}', (1.0, 2.5)),
+            (b'{"b": -3, "a": 0.5}', (0.5, -3.0)),
+            (b'{"a": 1, "b": 2, "mode": "float"}', (1.0, 2.0)),
+        ],
+    )
+    def test_plain_float_bodies(
+        self, body: bytes, expected: tuple[float, float]
+    ) -> None:
+        """Test that two JSON numbers are parsed as floats."""
+        assert parse_operands(body) == expected
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            b"not json",
+            b"[1, 2]",
+            b'{"a": 1}',
+            b'{"a": "1", "b": 2}',
+            b'{"a": true, "b": 2}',
+            b'{"a": 1, "b": 2, "mode": "decimal"}',
+            b'{"a": 1, "b": 2, "precision": 5}',
+            b'{"a": 1e999999, "b": 2}',
+        ],
+    )
+    def test_other_bodies_are_left_to_the_full_route(self, body: bytes) -> None:
+        """Test that anything but two plain numbers is not parsed."""
+        assert parse_operands(body) is None
+
+
+class TestFastPathMiddleware:
+    """Test cases for FastPathMiddleware."""
+
+    def test_plain_request_skips_the_app(
+        self, fast_client: TestClient, inner: CountingApp
+    ) -> None:
+        """Test that a plain float request is answered by the fast path."""
+        response = fast_client.post("/mul", json={"a": 6, "b": 7})
+        assert response.status_code == 200
+        assert response.json() == {"result": 42}
+        assert inner.calls == 0
+
+    def test_division_by_zero_returns_400(
+        self, fast_client: TestClient, inner: CountingApp
+    ) -> None:
+        """Test that division by zero keeps its status code and detail."""
+        response = fast_client.post("/div", json={"a": 1, "b": 0})
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Division by zero is not allowed"}
+        assert inner.calls == 0
+
+    @pytest.mark.parametrize(
+        ("path", "body"),
+        [
+            ("/add", {"a": 1, "b": 2}),
+            ("/sub", {"a": 0.1, "b": 0.3}),
+            ("/div", {"a": 1, "b": 0}),
+            ("/mul", {"a": 1e308, "b": 10}),
+            ("/add", {"a": "x", "b": 2}),
+            ("/add", {"a": 1}),
+            ("/add", {"a": "0.1", "b": "0.2", "mode": "decimal"}),
+            ("/mul", [1, 2]),
+        ],
+    )
+    def test_responses_match_the_full_routes(
+        self, fast_client: TestClient, path: str, body: Any
+    ) -> None:
+        """Test that status codes and bodies are those of the full routes."""
+        expected = TestClient(app).post(path, json=body)
+        response = fast_client.post(path, json=body)
+        assert response.status_code == expected.status_code
+        assert response.json() == expected.json()
+
+    def test_invalid_input_is_replayed_to_the_app(
+        self, fast_client: TestClient, inner: CountingApp
+    ) -> None:
+        """Test that requests the fast path cannot serve reach the app."""
+        response = fast_client.post("/add", json={"a": "x", "b": 2})
+        assert response.status_code == 422
+        assert inner.calls == 1
+
+    def test_non_json_accept_goes_to_the_app(
+        self, fast_client: TestClient, inner: CountingApp
+    ) -> None:
+        """Test that other response encodings are left to the app."""
+        response = fast_client.post(
+            "/add", json={"a": 1, "b": 2}, headers={"Accept": "application/cbor"}
+        )
+        assert response.headers["content-type"] == "application/cbor"
+        assert inner.calls == 1
+
+    def test_disabled_operation_goes_to_the_app(self, inner: CountingApp) -> None:
+        """Test that applies() can hand an operation back to the app."""
+        client = TestClient(
+            FastPathMiddleware(inner, OPERATIONS, applies=lambda op: op != "add")
+        )
+        client.post("/add", json={"a": 1, "b": 2})
+        client.post("/sub", json={"a": 1, "b": 2})
+        assert inner.calls == 1
+
+    def test_other_routes_go_to_the_app(
+        self, fast_client: TestClient, inner: CountingApp
+    ) -> None:
+        """Test that only the arithmetic routes are intercepted."""
+        assert fast_client.get("/health").json() == {"status": "ok"}
+        assert fast_client.get("/add").status_code == 405
+        assert inner.calls == 2
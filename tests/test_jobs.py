@@ -0,0 +1,270 @@
+"""Unit tests for background jobs."""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from app.jobs import (
+    Job,
+    JobQueue,
+    JobQueueFull,
+    JobStatus,
+    JobStore,
+    MemoryJobStore,
+    Progress,
+    SQLiteJobStore,
+)
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[JobStore]:
+    """Create an empty job store of each kind."""
+    if request.param == "memory":
+        yield MemoryJobStore(max_result_bytes=10)
+    else:
+        sqlite_store = SQLiteJobStore(str(tmp_path / "jobs.db"), max_result_bytes=10)
+        yield sqlite_store
+        sqlite_store.close()
+
+
+def finished(job_id: str, finished_at: float, size: int = 0) -> Job:
+    """Create a succeeded job."""
+    return Job(
+        id=job_id,
+        kind="batch",
+        status=JobStatus.SUCCEEDED,
+        progress=1.0,
+        finished_at=finished_at,
+        expires_at=finished_at + 60,
+        media_type="application/json",
+        result_size=size,
+    )
+
+
+class TestJobStore:
+    """Test cases shared by the job stores."""
+
+    def test_put_and_get(self, store: JobStore) -> None:
+        """Test that a stored job and its result can be read back."""
+        store.put(finished("a", 0, size=4), b"1234")
+        job = store.get("a", now=10)
+        assert job is not None
+        assert job.status is JobStatus.SUCCEEDED
+        assert job.media_type == "application/json"
+        assert store.result("a", now=10) == b"1234"
+
+    def test_unknown_job(self, store: JobStore) -> None:
+        """Test that unknown ids give None."""
+        assert store.get("missing", now=0) is None
+        assert store.result("missing", now=0) is None
+
+    def test_expired_jobs_are_hidden_and_purged(self, store: JobStore) -> None:
+        """Test that jobs past their expiry time are forgotten."""
+        store.put(finished("a", 0, size=1), b"x")
+        store.put(finished("b", 100, size=1), b"y")
+        assert store.get("a", now=60) is None
+        assert store.purge(now=60) <= 1
+        assert store.get("b", now=60) is not None
+
+    def test_oldest_results_are_evicted_over_the_cap(self, store: JobStore) -> None:
+        """Test that results beyond max_result_bytes evict the oldest ones."""
+        store.put(finished("a", 1, size=4), b"aaaa")
+        store.put(finished("b", 2, size=4), b"bbbb")
+        store.put(finished("c", 3, size=4), b"cccc")
+        assert store.get("a", now=10) is None
+        assert store.result("b", now=10) == b"bbbb"
+        assert store.result("c", now=10) == b"cccc"
+
+
+class TestSQLiteJobStore:
+    """Test cases for SQLiteJobStore."""
+
+    def test_jobs_survive_reopening(self, tmp_path: Path) -> None:
+        """Test that results are still there after a restart."""
+        path = str(tmp_path / "jobs.db")
+        first = SQLiteJobStore(path)
+        first.put(finished("a", 0, size=2), b"ok")
+        first.close()
+        second = SQLiteJobStore(path)
+        assert second.result("a", now=10) == b"ok"
+        second.close()
+
+    def test_unfinished_jobs_are_interrupted(self, tmp_path: Path) -> None:
+        """Test that jobs left running by a previous process are failed."""
+        path = str(tmp_path / "jobs.db")
+        first = SQLiteJobStore(path)
+        first.put(Job(id="a", kind="grid", status=JobStatus.RUNNING))
+        first.close()
+        second = SQLiteJobStore(path)
+        assert second.interrupt(now=5, ttl=60, stale_before=5) == 1
+        job = second.get("a", now=10)
+        assert job is not None
+        assert job.status is JobStatus.FAILED
+        assert job.error == "Interrupted by a restart"
+        second.close()
+
+    def test_renewed_jobs_are_not_interrupted(self, tmp_path: Path) -> None:
+        """Test that jobs another live process keeps renewing are left alone."""
+        path = str(tmp_path / "jobs.db")
+        first = SQLiteJobStore(path)
+        first.put(Job(id="a", kind="grid", created_at=0))
+        first.put(Job(id="b", kind="grid", created_at=0))
+        first.renew(["a"], now=100)
+        second = SQLiteJobStore(path)
+        assert second.interrupt(now=110, ttl=60, stale_before=80) == 1
+        renewed = second.get("a", now=110)
+        assert renewed is not None
+        assert renewed.status is JobStatus.QUEUED
+        first.close()
+        second.close()
+
+    def test_adds_lease_column_to_old_databases(self, tmp_path: Path) -> None:
+        """Test that a database created before job leases is upgraded."""
+        path = str(tmp_path / "jobs.db")
+        db = sqlite3.connect(path)
+        db.execute(
+            "CREATE TABLE jobs ("
+            " id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,"
+            " progress REAL NOT NULL, created_at REAL NOT NULL,"
+            " finished_at REAL, expires_at REAL, error TEXT, media_type TEXT,"
+            " result_size INTEGER NOT NULL, result BLOB)"
+        )
+        db.close()
+        store = SQLiteJobStore(path)
+        store.put(Job(id="a", kind="grid"))
+        store.renew(["a"], now=10)
+        assert store.interrupt(now=20, ttl=60, stale_before=5) == 0
+        store.close()
+
+
+class TestJobQueue:
+    """Test cases for JobQueue."""
+
+    def test_job_runs_and_stores_its_result(self) -> None:
+        """Test that a submitted job runs on a worker and its result is kept."""
+        queue = JobQueue(MemoryJobStore(), workers=1)
+        job = queue.submit("batch", lambda progress: (b"[1]", "application/json"))
+        assert job.status is JobStatus.QUEUED
+        queue.shutdown()
+        done = queue.get(job.id)
+        assert done is not None
+        assert done.status is JobStatus.SUCCEEDED
+        assert done.progress == 1.0
+        assert queue.result(job.id) == b"[1]"
+
+    def test_progress_is_visible_while_running(self) -> None:
+        """Test that progress reported by a running job can be polled."""
+        queue = JobQueue(MemoryJobStore(), workers=1)
+        halfway, release = threading.Event(), threading.Event()
+
+        def work(progress: Progress) -> tuple[bytes, str]:
+            progress(0.5)
+            halfway.set()
+            release.wait()
+            return b"", "application/json"
+
+        job = queue.submit("grid", work)
+        assert halfway.wait(5)
+        running = queue.get(job.id)
+        assert running is not None
+        assert running.status is JobStatus.RUNNING
+        assert running.progress == 0.5
+        release.set()
+        queue.shutdown()
+
+    def test_failure_is_recorded(self) -> None:
+        """Test that an exception fails the job with its message."""
+        queue = JobQueue(MemoryJobStore(), workers=1)
+
+        def work(progress: Progress) -> tuple[bytes, str]:
+            raise ValueError("boom")
+
+        job = queue.submit("eval", work)
+        queue.shutdown()
+        failed = queue.get(job.id)
+        assert failed is not None
+        assert failed.status is JobStatus.FAILED
+        assert failed.error == "boom"
+        assert queue.result(job.id) is None
+        assert queue.stats()["failed"] == 1
+
+    def test_oversized_result_fails_the_job(self) -> None:
+        """Test that a result larger than the store allows is rejected."""
+        queue = JobQueue(MemoryJobStore(max_result_bytes=2), workers=1)
+        job = queue.submit("batch", lambda progress: (b"too big", "text/plain"))
+        queue.shutdown()
+        failed = queue.get(job.id)
+        assert failed is not None
+        assert failed.status is JobStatus.FAILED
+        assert "exceeds the limit" in (failed.error or "")
+
+    def test_pending_jobs_are_bounded(self) -> None:
+        """Test that submit fails once max_pending jobs are in progress."""
+        queue = JobQueue(MemoryJobStore(), workers=1, max_pending=1)
+        release = threading.Event()
+
+        def work(progress: Progress) -> tuple[bytes, str]:
+            release.wait()
+            return b"", "application/json"
+
+        queue.submit("batch", work)
+        with pytest.raises(JobQueueFull):
+            queue.submit("batch", work)
+        release.set()
+        queue.shutdown()
+
+    def test_jobs_in_progress_are_renewed(self, tmp_path: Path) -> None:
+        """Test that a sibling queue on the same store leaves live jobs alone."""
+        clock = FakeClock()
+        path = str(tmp_path / "jobs.db")
+        store = SQLiteJobStore(path)
+        queue = JobQueue(store, workers=1, lease=0.03, clock=clock)
+        release = threading.Event()
+
+        def work(progress: Progress) -> tuple[bytes, str]:
+            release.wait()
+            return b"[]", "application/json"
+
+        job = queue.submit("batch", work)
+        clock.now += 60
+        time.sleep(0.1)  # Several lease renewals.
+        sibling_store = SQLiteJobStore(path)
+        sibling = JobQueue(sibling_store, clock=clock)
+        running = sibling.get(job.id)
+        assert running is not None
+        assert not running.finished
+        release.set()
+        queue.shutdown()
+        store.close()
+        sibling_store.close()
+
+    def test_shutdown_queue_restarts_on_submit(self) -> None:
+        """Test that a stopped queue starts its workers again when needed."""
+        queue = JobQueue(MemoryJobStore(), workers=1)
+        queue.shutdown()
+        job = queue.submit("batch", lambda progress: (b"[]", "application/json"))
+        queue.shutdown()
+        assert queue.result(job.id) == b"[]"
+
+    def test_results_expire_after_ttl(self) -> None:
+        """Test that finished jobs are forgotten after ttl seconds."""
+        clock = FakeClock()
+        queue = JobQueue(MemoryJobStore(), workers=1, ttl=60, clock=clock)
+        job = queue.submit("batch", lambda progress: (b"[]", "application/json"))
+        queue.shutdown()
+        clock.now += 61
+        assert queue.get(job.id) is None
@@ -0,0 +1,72 @@
+"""Tests for the event loop lag monitor."""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.loopmonitor import LoopMonitor
+from app.telemetry import Metrics
+
+
+def block_the_loop(seconds: float) -> None:
+    """Block the calling thread, and so the event loop, for a while."""
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """Test cases for LoopMonitor class."""
+
+    def test_measures_lag(self) -> None:
+        """Test that lag is recorded continuously while the loop is idle."""
+        metrics = Metrics()
+
+        async def scenario() -> None:
+            monitor = LoopMonitor(metrics, interval=0.005, threshold=0.1)
+            monitor.start()
+            await asyncio.sleep(0.1)
+            await monitor.stop()
+
+        asyncio.run(scenario())
+        assert metrics.loop_lag.count() >= 5
+        assert metrics.slow_callbacks.value() == 0
+
+    def test_reports_blocking_callback_with_stack(
+        self, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test that a blocking call is counted and logged with its stack."""
+        metrics = Metrics()
+
+        async def scenario() -> None:
+            monitor = LoopMonitor(metrics, interval=0.005, threshold=0.05)
+            monitor.start()
+            await asyncio.sleep(0.02)
+            block_the_loop(0.3)
+            await asyncio.sleep(0.02)
+            await monitor.stop()
+
+        with caplog.at_level(logging.WARNING, logger="app.loopmonitor"):
+            asyncio.run(scenario())
+        assert metrics.slow_callbacks.value() == 1
+        assert "Event loop blocked for" in caplog.text
+        assert "block_the_loop" in caplog.text
+
+    def test_stop_without_start(self) -> None:
+        """Test that stopping an idle monitor does nothing."""
+        asyncio.run(LoopMonitor(Metrics()).stop())
+
+    def test_restarts_on_a_new_loop(self) -> None:
+        """Test that a stopped monitor can run again on another event loop."""
+        metrics = Metrics()
+        monitor = LoopMonitor(metrics, interval=0.005)
+
+        async def scenario() -> None:
+            monitor.start()
+            await asyncio.sleep(0.03)
+            await monitor.stop()
+
+        asyncio.run(scenario())
+        first = metrics.loop_lag.count()
+        asyncio.run(scenario())
+        assert metrics.loop_lag.count() > first
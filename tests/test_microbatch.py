@@ -0,0 +1,76 @@
+"""Unit tests for the micro-batching scheduler."""
+
+import asyncio
+
+import pytest
+
+from app.calculator import DivisionByZeroError
+from app.microbatch import MicroBatcher
+
+
+class TestMicroBatcher:
+    """Test cases for MicroBatcher."""
+
+    def test_concurrent_requests_share_one_batch(self) -> None:
+        """Test that requests inside one window are evaluated together."""
+        batcher = MicroBatcher(window=0.01, max_size=100)
+
+        async def run() -> list[float]:
+            return await asyncio.gather(
+                *(batcher.submit("add", i, 1) for i in range(10))
+            )
+
+        assert asyncio.run(run()) == [i + 1 for i in range(10)]
+        stats = batcher.stats()
+        assert stats["batches"] == 1
+        assert stats["items"] == 10
+        assert stats["fill_ratio"] == 0.1
+
+    def test_full_batch_flushes_immediately(self) -> None:
+        """Test that reaching max_size does not wait for the window."""
+        batcher = MicroBatcher(window=60, max_size=4)
+
+        async def run() -> list[float]:
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.submit("mul", i, 2) for i in range(8))),
+                timeout=5,
+            )
+
+        assert asyncio.run(run()) == [i * 2 for i in range(8)]
+        assert batcher.stats()["batches"] == 2
+        assert batcher.stats()["fill_ratio"] == 1.0
+
+    def test_operations_are_batched_separately(self) -> None:
+        """Test that each operation gets its own kernel call."""
+        batcher = MicroBatcher(window=0.01)
+
+        async def run() -> list[float]:
+            return await asyncio.gather(
+                batcher.submit("add", 6, 3),
+                batcher.submit("sub", 6, 3),
+                batcher.submit("add", 1, 1),
+            )
+
+        assert asyncio.run(run()) == [9, 3, 2]
+        assert batcher.stats()["batches"] == 2
+
+    def test_division_by_zero_fails_only_its_caller(self) -> None:
+        """Test that a zero divisor raises for one request only."""
+        batcher = MicroBatcher(window=0.01)
+
+        async def run() -> list[object]:
+            return await asyncio.gather(
+                batcher.submit("div", 1, 0),
+                batcher.submit("div", 8, 2),
+                return_exceptions=True,
+            )
+
+        zero, ok = asyncio.run(run())
+        assert isinstance(zero, DivisionByZeroError)
+        assert ok == 4
+
+    def test_unknown_operation_raises(self) -> None:
+        """Test that a failing kernel call is reported to the caller."""
+        batcher = MicroBatcher(window=0)
+        with pytest.raises(KeyError):
+            asyncio.run(batcher.submit("pow", 2, 3))
@@ -0,0 +1,89 @@
+"""Unit tests for the numeric backends."""
+
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from app.calculator import add, divide
+from app.numeric import NumericMode, context_for, to_json, to_number
+
+
+class TestToNumber:
+    """Test cases for to_number function."""
+
+    def test_float_mode(self) -> None:
+        """Test that float mode returns plain floats."""
+        assert to_number("2.5", NumericMode.FLOAT) == 2.5
+
+    def test_decimal_from_float_uses_shortest_repr(self) -> None:
+        """Test that 0.1 becomes Decimal('0.1'), not its binary expansion."""
+        assert to_number(0.1, NumericMode.DECIMAL) == Decimal("0.1")
+
+    def test_fraction_from_string(self) -> None:
+        """Test that rationals can be given as a/b strings."""
+        assert to_number("1/3", NumericMode.FRACTION) == Fraction(1, 3)
+
+    @pytest.mark.parametrize("value", ["abc", "NaN", "Infinity"])
+    def test_decimal_rejects_invalid_values(self, value: str) -> None:
+        """Test that non-finite or malformed decimals are rejected."""
+        with pytest.raises(ValueError):
+            to_number(value, NumericMode.DECIMAL)
+
+    def test_fraction_rejects_zero_denominator(self) -> None:
+        """Test that a zero denominator is a value error."""
+        with pytest.raises(ValueError):
+            to_number("1/0", NumericMode.FRACTION)
+
+    @pytest.mark.parametrize(
+        ("value", "message"),
+        [
+            ("1e30000000", "Exponent too large"),
+            ("1E-1001", "Exponent too large"),
+            ("1e" + "9" * 5000, "Exponent too large"),
+            ("1" * 1001, "Too many digits"),
+            ("1" * 600 + "/" + "3" * 600, "Too many digits"),
+        ],
+        ids=["exponent", "negative", "long exponent", "integer", "ratio"],
+    )
+    @pytest.mark.parametrize("mode", [NumericMode.DECIMAL, NumericMode.FRACTION])
+    def test_rejects_oversized_operands(
+        self, value: str, message: str, mode: NumericMode
+    ) -> None:
+        """Test that huge exact operands are rejected before conversion."""
+        with pytest.raises(ValueError, match=message):
+            to_number(value, mode)
+
+    def test_accepts_operands_at_the_limits(self) -> None:
+        """Test that the largest allowed operands still convert."""
+        assert to_number("1e" + "0" * 50 + "1000", NumericMode.FRACTION) == 10**1000
+        assert to_number("9" * 1000, NumericMode.DECIMAL) == Decimal("9" * 1000)
+
+
+class TestExactArithmetic:
+    """Test cases for the calculator functions on exact number types."""
+
+    def test_decimal_addition_is_exact(self) -> None:
+        """Test the classic 0.1 + 0.2 case."""
+        assert add(Decimal("0.1"), Decimal("0.2")) == Decimal("0.3")
+
+    def test_fraction_division_is_exact(self) -> None:
+        """Test that rational division does not round."""
+        assert divide(Fraction(1), Fraction(3)) == Fraction(1, 3)
+
+    def test_context_applies_precision_and_rounding(self) -> None:
+        """Test that the per-request decimal context is honoured."""
+        with context_for(NumericMode.DECIMAL, precision=3, rounding="ROUND_UP"):
+            assert divide(Decimal(2), Decimal(3)) == Decimal("0.667")
+        assert divide(Decimal(2), Decimal(3)) != Decimal("0.667")
+
+    def test_to_json(self) -> None:
+        """Test that only exact results are serialized as strings."""
+        assert to_json(1.5) == 1.5
+        assert to_json(Decimal("1.50")) == "1.50"
+        assert to_json(Fraction(2, 4)) == "1/2"
+
+    def test_to_json_rejects_huge_fractions(self) -> None:
+        """Test that integers too long to print give a value error."""
+        with pytest.raises(ValueError, match="too many digits"):
+            to_json(Fraction(10**5000))
@@ -0,0 +1,94 @@
+"""Tests for the sampling profiler."""
+
+import threading
+import time
+
+from app.profiler import Profile, collapsed, sample, speedscope
+
+
+def spin_until(stop: threading.Event) -> None:
+    """Keep a thread busy until told to stop."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def busy_profile() -> Profile:
+    """Sample while a named thread runs spin_until."""
+    stop = threading.Event()
+    thread = threading.Thread(target=spin_until, args=(stop,), name="spinner")
+    thread.start()
+    try:
+        return sample(0.1, interval=0.002)
+    finally:
+        stop.set()
+        thread.join()
+
+
+class TestSample:
+    """Test cases for sample function."""
+
+    def test_samples_other_threads(self) -> None:
+        """Test that a busy thread's stack is seen, outermost call first."""
+        profile = busy_profile()
+        assert profile.samples > 1
+        spinner = [
+            (frames, count)
+            for (thread, frames), count in profile.stacks.items()
+            if thread == "spinner"
+        ]
+        assert spinner
+        stacks = [[name for name, _, _ in frames] for frames, _ in spinner]
+        spinning = [names for names in stacks if "spin_until" in names]
+        assert spinning
+        assert all(
+            names.index("Thread.run") < names.index("spin_until") for names in spinning
+        )
+        assert sum(count for _, count in spinner) <= profile.samples
+
+    def test_leaves_out_calling_thread(self) -> None:
+        """Test that the sampling thread does not profile itself."""
+        profile = sample(0.01, interval=0.002)
+        own = threading.current_thread().name
+        assert all(thread != own for thread, _ in profile.stacks)
+
+    def test_runs_for_duration(self) -> None:
+        """Test that sampling stops after the requested duration."""
+        start = time.perf_counter()
+        profile = sample(0.05, interval=0.01)
+        assert 0.04 <= time.perf_counter() - start < 0.5
+        assert profile.duration >= 0.04
+
+
+class TestCollapsed:
+    """Test cases for collapsed function."""
+
+    def test_one_line_per_stack(self) -> None:
+        """Test the "thread;outer;inner count" format."""
+        profile = Profile(interval=0.01)
+        profile.stacks["main", (("outer", "a.py", 1), ("inner", "a.py", 5))] = 3
+        assert collapsed(profile) == "main;outer (a.py:1);inner (a.py:5) 3\n"
+
+    def test_empty_profile(self) -> None:
+        """Test that an empty profile renders as no lines."""
+        assert collapsed(Profile()) == ""
+
+
+class TestSpeedscope:
+    """Test cases for speedscope function."""
+
+    def test_shares_frames_between_threads(self) -> None:
+        """Test one sampled profile per thread over a shared frame table."""
+        profile = Profile(interval=0.01)
+        profile.stacks["a", (("f", "x.py", 1), ("g", "x.py", 2))] = 2
+        profile.stacks["b", (("f", "x.py", 1),)] = 1
+        document = speedscope(profile)
+        assert document["shared"]["frames"] == [
+            {"name": "f", "file": "x.py", "line": 1},
+            {"name": "g", "file": "x.py", "line": 2},
+        ]
+        first, second = document["profiles"]
+        assert first["name"] == "a"
+        assert first["samples"] == [[0, 1]]
+        assert first["weights"] == [0.02]
+        assert second["samples"] == [[0]]
+        assert second["endValue"] == 0.01
@@ -0,0 +1,74 @@
+"""Unit tests for the memoizing result cache."""
+
+from app.result_cache import ResultCache, operation_key
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestOperationKey:
+    """Test cases for operation_key function."""
+
+    def test_commutative_operations_share_key(self) -> None:
+        """Test that a+b and b+a map to the same entry."""
+        assert operation_key("add", 1.0, 2.0) == operation_key("add", 2.0, 1.0)
+        assert operation_key("mul", 3.0, 4.0) == operation_key("mul", 4.0, 3.0)
+
+    def test_non_commutative_operations_keep_order(self) -> None:
+        """Test that a-b and b-a are different entries."""
+        assert operation_key("sub", 1.0, 2.0) != operation_key("sub", 2.0, 1.0)
+        assert operation_key("div", 1.0, 2.0) != operation_key("div", 2.0, 1.0)
+
+    def test_signed_zero_is_distinguished(self) -> None:
+        """Test that 0.0 and -0.0 do not collide, as x*0.0 != x*-0.0."""
+        assert operation_key("mul", 5.0, 0.0) != operation_key("mul", 5.0, -0.0)
+
+    def test_mode_is_part_of_key(self) -> None:
+        """Test that the same operands in different modes do not collide."""
+        assert operation_key("add", "1", "2", "float") != operation_key(
+            "add", "1", "2", "decimal"
+        )
+
+
+class TestResultCache:
+    """Test cases for ResultCache."""
+
+    def test_hit_and_miss_counters(self) -> None:
+        """Test that lookups are counted."""
+        cache = ResultCache()
+        assert cache.get("k") is None
+        cache.put("k", 42.0)
+        assert cache.get("k") == 42.0
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_entries_expire_after_ttl(self) -> None:
+        """Test that stale entries are not served."""
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.put("k", 1.0)
+        clock.now = 9.9
+        assert cache.get("k") == 1.0
+        clock.now = 10.0
+        assert cache.get("k") is None
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+
+    def test_size_bound_evicts_least_recently_used(self) -> None:
+        """Test that the cache never exceeds maxsize."""
+        cache = ResultCache(maxsize=2)
+        cache.put("a", 1.0)
+        cache.put("b", 2.0)
+        cache.get("a")
+        cache.put("c", 3.0)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1.0
+        assert cache.stats()["evictions"] == 1
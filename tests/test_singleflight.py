@@ -0,0 +1,95 @@
+"""Unit tests for request coalescing."""
+
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test cases for SingleFlight."""
+
+    def test_concurrent_callers_share_one_computation(self) -> None:
+        """Test that identical concurrent requests compute once."""
+        flights = SingleFlight()
+        calls = 0
+
+        async def compute() -> int:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return 42
+
+        async def run() -> list[int]:
+            return await asyncio.gather(*(flights.do("k", compute) for _ in range(10)))
+
+        assert asyncio.run(run()) == [42] * 10
+        assert calls == 1
+        assert flights.stats() == {"executions": 1, "shared": 9, "in_flight": 0}
+
+    def test_different_keys_run_separately(self) -> None:
+        """Test that distinct computations are not merged."""
+        flights = SingleFlight()
+
+        async def value(x: int) -> int:
+            await asyncio.sleep(0)
+            return x
+
+        async def run() -> list[int]:
+            return await asyncio.gather(
+                flights.do(1, lambda: value(1)), flights.do(2, lambda: value(2))
+            )
+
+        assert asyncio.run(run()) == [1, 2]
+        assert flights.stats()["executions"] == 2
+
+    def test_finished_computations_are_not_reused(self) -> None:
+        """Test that sequential callers each compute, unlike a cache."""
+        flights = SingleFlight()
+
+        async def compute() -> int:
+            return 1
+
+        async def run() -> None:
+            await flights.do("k", compute)
+            await flights.do("k", compute)
+
+        asyncio.run(run())
+        assert flights.stats()["executions"] == 2
+
+    def test_exception_is_shared(self) -> None:
+        """Test that every waiting caller sees the failure."""
+        flights = SingleFlight()
+
+        async def fail() -> int:
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run() -> list[object]:
+            return await asyncio.gather(
+                *(flights.do("k", fail) for _ in range(3)), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, ValueError) for result in results)
+
+    def test_cancelled_leader_does_not_cancel_followers(self) -> None:
+        """Test that the computation outlives the caller that started it."""
+        flights = SingleFlight()
+
+        async def compute() -> int:
+            await asyncio.sleep(0.02)
+            return 7
+
+        async def run() -> int:
+            leader = asyncio.ensure_future(flights.do("k", compute))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flights.do("k", compute))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        assert asyncio.run(run()) == 7
@@ -0,0 +1,116 @@
+"""Unit tests for NDJSON stream evaluation."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+
+from app.stream import evaluate_ndjson
+
+
+async def _chunks(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def _run(*chunks: bytes, max_line_bytes: int = 1024) -> list[list[dict[str, object]]]:
+    """Evaluate a stream and return the decoded records of each output chunk."""
+
+    async def collect() -> list[bytes]:
+        return [out async for out in evaluate_ndjson(_chunks(*chunks), max_line_bytes)]
+
+    return [
+        [json.loads(line) for line in out.decode().splitlines()]
+        for out in asyncio.run(collect())
+    ]
+
+
+class TestEvaluateNdjson:
+    """Test cases for evaluate_ndjson function."""
+
+    def test_results_follow_input_order(self) -> None:
+        """Test that each line gets a result or an error, in order."""
+        outputs = _run(
+            b'{"op": "add", "a": 1, "b": 2}\n'
+            b'{"op": "div", "a": 1, "b": 0}\n'
+            b'{"op": "mul", "a": 3, "b": 4, "id": "x"}\n'
+        )
+        assert outputs == [
+            [
+                {"result": 3},
+                {"error": "Division by zero is not allowed"},
+                {"id": "x", "result": 12},
+            ]
+        ]
+
+    def test_lines_split_across_chunks(self) -> None:
+        """Test that a line is evaluated once its newline arrives."""
+        outputs = _run(
+            b'{"op": "sub", "a"', b': 5, "b": 2}\n{"op": "add",', b' "a": 1, "b": 1}'
+        )
+        assert outputs == [[{"result": 3}], [{"result": 2}]]
+
+    def test_results_are_yielded_per_chunk(self) -> None:
+        """Test that results do not wait for the end of the input."""
+        outputs = _run(
+            b'{"op": "add", "a": 1, "b": 1}\n', b'{"op": "add", "a": 2, "b": 2}\n'
+        )
+        assert outputs == [[{"result": 2}], [{"result": 4}]]
+
+    def test_invalid_lines_get_errors(self) -> None:
+        """Test that malformed lines do not stop the stream."""
+        outputs = _run(
+            b"not json\n[1]\n"
+            b'{"op": 1, "a": 1, "b": 1}\n'
+            b'{"op": "add", "a": "1", "b": 1}\n'
+            b"\n"
+            b'{"op": "pow", "a": 1, "b": 1}\n'
+        )
+        assert outputs == [
+            [
+                {"error": "Invalid JSON"},
+                {"error": "Expected a JSON object"},
+                {"error": "Field 'op' must be a string"},
+                {"error": "Fields 'a' and 'b' must be numbers"},
+                {"error": "Unsupported operation"},
+            ]
+        ]
+
+    def test_out_of_range_numbers_fail_their_line(self) -> None:
+        """Test that overflow in or out only affects its own line."""
+        outputs = _run(
+            b'{"op": "add", "a": 1' + b"0" * 400 + b', "b": 1}\n'
+            b'{"op": "mul", "a": 1e308, "b": 10}\n'
+            b'{"op": "add", "a": NaN, "b": 1}\n'
+            b'{"op": "add", "a": 1, "b": 1}\n'
+        )
+        assert outputs == [
+            [
+                {"error": "Fields 'a' and 'b' must be within the float range"},
+                {"error": "Result is not a finite number"},
+                {"error": "Invalid JSON"},
+                {"result": 2},
+            ]
+        ]
+
+    def test_deeply_nested_line_fails_alone(self) -> None:
+        """Test that JSON nested too deeply to decode only fails its own line."""
+        nested = b"[" * 5000 + b"]" * 5000
+        outputs = _run(
+            b'{"op": "add", "a": 1, "b": 1, "id": ' + nested + b"}\n"
+            b'{"op": "add", "a": 2, "b": 2}\n',
+            max_line_bytes=65_536,
+        )
+        assert outputs == [[{"error": "Invalid JSON"}, {"result": 4}]]
+
+    def test_over_long_line_is_skipped(self) -> None:
+        """Test that a line longer than the limit is never buffered in full."""
+        outputs = _run(
+            b'{"op": "add", "a": 1, "b": 1}\n' + b" " * 40,
+            b" " * 40,
+            b' "rest"}\n{"op": "add", "a": 2, "b": 2}\n',
+            max_line_bytes=32,
+        )
+        assert outputs == [
+            [{"result": 2}, {"error": "Line too long"}],
+            [{"result": 4}],
+        ]
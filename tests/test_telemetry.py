@@ -0,0 +1,133 @@
+"""Tests for the Prometheus metrics instruments and middleware."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from starlette.types import Message, Receive, Scope, Send
+
+from app.telemetry import Counter, Histogram, Metrics, MetricsMiddleware
+
+
+class TestCounter:
+    """Test cases for Counter."""
+
+    def test_counts_per_label_set(self) -> None:
+        """Test that each label set has its own count."""
+        counter = Counter("ops", "Operations.", ("op",))
+        counter.inc("add")
+        counter.inc("add")
+        counter.inc("div", amount=3)
+        assert counter.value("add") == 2
+        assert counter.value("div") == 3
+        assert counter.value("mul") == 0
+
+
+class TestHistogram:
+    """Test cases for Histogram."""
+
+    def test_buckets_are_cumulative(self) -> None:
+        """Test that bucket samples count observations up to their bound."""
+        histogram = Histogram("latency", "Latency.", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, "/add")
+        samples = {
+            (suffix, values): value for suffix, _, values, value in histogram.samples()
+        }
+        assert samples[("_bucket", ("/add", "0.1"))] == 2
+        assert samples[("_bucket", ("/add", "1.0"))] == 3
+        assert samples[("_bucket", ("/add", "+Inf"))] == 4
+        assert samples[("_count", ("/add",))] == 4
+        assert samples[("_sum", ("/add",))] == 2.65
+        assert histogram.count("/add") == 4
+        assert histogram.count("/sub") == 0
+
+
+class TestRender:
+    """Test cases for Metrics.render."""
+
+    def test_prometheus_format(self) -> None:
+        """Test the Prometheus text format of counters and histograms."""
+        metrics = Metrics(buckets=(0.5,))
+        metrics.operations.inc("add")
+        metrics.request_duration.observe(0.25, "POST", "/add", "200")
+        text = metrics.render()
+        assert "# TYPE calculator_operations_total counter" in text
+        assert 'calculator_operations_total{op="add"} 1\n' in text
+        assert (
+            'http_request_duration_seconds_bucket{method="POST",route="/add",'
+            'status="200",le="0.5"} 1\n'
+        ) in text
+        assert "# TYPE http_requests_in_flight gauge" in text
+        assert "# EOF" not in text
+
+    def test_openmetrics_format(self) -> None:
+        """Test that OpenMetrics names counter families without _total."""
+        metrics = Metrics()
+        metrics.division_by_zero.inc("/div")
+        text = metrics.render(openmetrics=True)
+        assert "# TYPE calculator_division_by_zero counter" in text
+        assert 'calculator_division_by_zero_total{route="/div"} 1\n' in text
+        assert text.endswith("# EOF\n")
+
+    def test_label_values_are_escaped(self) -> None:
+        """Test that quotes, backslashes and newlines in labels are escaped."""
+        metrics = Metrics()
+        metrics.operations.inc('a"b\\c\nd')
+        assert r'{op="a\"b\\c\nd"}' in metrics.render()
+
+
+class TestMetricsMiddleware:
+    """Test cases for MetricsMiddleware."""
+
+    def test_unrouted_requests_use_known_paths(self) -> None:
+        """Test that requests answered without a route are labelled by path."""
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await send({"type": "http.response.start", "status": 204, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        metrics = Metrics()
+        client = TestClient(MetricsMiddleware(app, metrics, paths=["/add"]))
+        client.post("/add")
+        client.get("/elsewhere")
+        assert metrics.request_duration.count("POST", "/add", "204") == 1
+        assert metrics.request_duration.count("GET", "other", "204") == 1
+        assert metrics.in_flight.value == 0
+
+    def test_unknown_methods_share_one_label(self) -> None:
+        """Test that made-up request methods do not add series."""
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            await send({"type": "http.response.start", "status": 405, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        metrics = Metrics()
+        client = TestClient(MetricsMiddleware(app, metrics, paths=["/add"]))
+        for i in range(5):
+            client.request(f"M{i}X", "/add")
+        client.request("DELETE", "/add")
+        assert metrics.request_duration.count("OTHER", "/add", "405") == 5
+        assert metrics.request_duration.count("M0X", "/add", "405") == 0
+        assert metrics.request_duration.count("DELETE", "/add", "405") == 1
+
+    def test_in_flight_counts_running_requests(self) -> None:
+        """Test that the in-flight gauge covers the whole request."""
+        metrics = Metrics()
+        seen = []
+
+        async def app(scope: Scope, receive: Receive, send: Send) -> None:
+            seen.append(metrics.in_flight.value)
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: Message) -> None:
+            pass
+
+        middleware = MetricsMiddleware(app, metrics)
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+        asyncio.run(middleware(scope, receive, send))
+        assert seen == [1]
+        assert metrics.in_flight.value == 0